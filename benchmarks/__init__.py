@@ -0,0 +1,6 @@
+"""
+Benchmarks de desempenho do VisionMap Creator
+
+Execute a partir da raiz do projeto, por exemplo:
+    python -m benchmarks.bench_hit_test
+"""
\ No newline at end of file
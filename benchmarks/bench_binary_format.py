@@ -0,0 +1,119 @@
+"""
+Benchmark da variante binária colunar do .vmap contra o pickle e o JSON Lines
+
+Salva o mesmo mapa sintético (200 mil nós) nos três formatos e compara o tamanho
+do arquivo, o tempo de salvar, o tempo até os dados do primeiro desenho (nós da
+área visível inicial, com seus textos) e o tempo de leitura do documento completo.
+Uso: python -m benchmarks.bench_binary_format
+"""
+
+import os
+import pickle
+import random
+import tempfile
+import time
+
+from src.models.document import Document
+from src.utils.file_manager import (save_visionmap_to_file, load_visionmap_from_file,
+                                    read_binary_document, BinaryVisionMap)
+
+
+CONTAINERS = 2000
+BOXES = 198000
+CONNECTIONS = 100000
+
+# Área visível inicial (uma janela de 1920x1080 no canto do mapa)
+VIEWPORT = (0, 0, 1920, 1080)
+
+
+def build_document():
+    """Cria um documento com containers, caixas, anotações e conexões aleatórias."""
+    rng = random.Random(42)
+    document = Document()
+    containers = [document.add_container(rng.uniform(0, 200000), rng.uniform(0, 200000))
+                  for _ in range(CONTAINERS)]
+    for i in range(BOXES):
+        x, y = rng.uniform(0, 200000), rng.uniform(0, 200000)
+        if i % 10 == 0:
+            box = document.add_note(x, y, f"Anotação {i}", full_text=f"Texto completo da anotação {i}\n" * 5)
+        else:
+            box = document.add_box(x, y, f"Item {i}")
+        if i % 3 == 0:
+            rng.choice(containers).add_box(box)
+    for _ in range(CONNECTIONS):
+        document.add_connection(*rng.sample(document.boxes, 2))
+    return document
+
+
+def save_pickle(file_path, document):
+    """Salva no formato antigo: um dicionário de estados serializado com pickle."""
+    boxes, containers, connections = document.as_lists()
+    data = {
+        'boxes': [box.get_state() for box in boxes],
+        'containers': [container.get_state() for container in containers],
+        'connections': [connection.get_state() for connection in connections]
+    }
+    with open(file_path, 'wb') as f:
+        pickle.dump(data, f)
+
+
+def first_paint_pickle(file_path):
+    """O pickle precisa ser lido inteiro antes de saber o que está visível."""
+    with open(file_path, 'rb') as f:
+        data = pickle.load(f)
+    x1, y1, x2, y2 = VIEWPORT
+    return [state['text'] for state in data['boxes'] if x1 <= state['x'] <= x2 and y1 <= state['y'] <= y2]
+
+
+def first_paint_binary(file_path):
+    """Consulta a geometria direto do arquivo mapeado e decodifica só os textos visíveis."""
+    source = BinaryVisionMap(file_path)
+    texts = source.nodes['text']
+    visible = [source.string(texts[row]) for row in source.rows_in_rect(*VIEWPORT)]
+    source.release()
+    return visible
+
+
+def timed(function, *args):
+    """Retorna o tempo (s) de uma chamada."""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    document = build_document()
+    paths = {}
+    for name in ("pickle", "jsonl", "binário"):
+        fd, paths[name] = tempfile.mkstemp(suffix=".vmap")
+        os.close(fd)
+    
+    try:
+        save = {
+            "pickle": timed(save_pickle, paths["pickle"], document),
+            "jsonl": timed(save_visionmap_to_file, paths["jsonl"], *document.as_lists()),
+            "binário": timed(lambda: save_visionmap_to_file(paths["binário"], *document.as_lists(), binary=True)),
+        }
+        first_paint = {
+            "pickle": timed(first_paint_pickle, paths["pickle"]),
+            "binário": timed(first_paint_binary, paths["binário"]),
+        }
+        load = {
+            "pickle": timed(load_visionmap_from_file, paths["pickle"]),
+            "jsonl": timed(load_visionmap_from_file, paths["jsonl"]),
+            "binário": timed(read_binary_document, paths["binário"]),
+        }
+        
+        print(f"{len(document.boxes) + len(document.containers)} nós, {len(document.connections)} conexões")
+        print(f"{'formato':>10} {'tamanho (MB)':>13} {'salvar (s)':>11} {'1º desenho (s)':>15} {'leitura (s)':>12}")
+        for name, path in paths.items():
+            paint = f"{first_paint[name]:.3f}" if name in first_paint else "-"
+            print(f"{name:>10} {os.path.getsize(path) / 1e6:>13.1f} {save[name]:>11.3f} "
+                  f"{paint:>15} {load[name]:>12.3f}")
+    finally:
+        for path in paths.values():
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
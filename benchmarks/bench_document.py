@@ -0,0 +1,78 @@
+"""
+Benchmark da leitura de arquivos e da exportação Mermaid sem o Tk
+
+Salva um mapa sintético em um arquivo temporário e compara o tempo de leitura
+apenas como documento (sem janela) com o tempo de criar os elementos em um canvas.
+Uso: python -m benchmarks.bench_document
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from src.models.document import Document
+from src.utils.mermaid_export import export_to_mermaid
+from src.utils.file_manager import save_visionmap_to_file, load_visionmap_from_file
+
+
+CONTAINERS = 200
+BOXES = 10000
+CONNECTIONS = 5000
+
+
+def build_document():
+    """Cria um documento com containers, caixas, anotações e conexões aleatórias."""
+    rng = random.Random(42)
+    document = Document()
+    containers = [document.add_container(rng.uniform(0, 50000), rng.uniform(0, 50000))
+                  for _ in range(CONTAINERS)]
+    for i in range(BOXES):
+        x, y = rng.uniform(0, 50000), rng.uniform(0, 50000)
+        box = document.add_note(x, y) if i % 10 == 0 else document.add_box(x, y)
+        if i % 3 == 0:
+            rng.choice(containers).add_box(box)
+    for _ in range(CONNECTIONS):
+        document.add_connection(*rng.sample(document.boxes, 2))
+    return document
+
+
+def main():
+    document = build_document()
+    
+    fd, file_path = tempfile.mkstemp(suffix=".vmap")
+    os.close(fd)
+    try:
+        save_visionmap_to_file(file_path, *document.as_lists())
+        
+        start = time.perf_counter()
+        boxes, containers, connections = load_visionmap_from_file(file_path)
+        headless_load = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        export_to_mermaid(boxes, containers, connections)
+        headless_export = time.perf_counter() - start
+        
+        print(f"{'leitura sem Tk (s)':>22}: {headless_load:.3f}")
+        print(f"{'exportação Mermaid (s)':>22}: {headless_export:.3f}")
+        
+        # Para comparação, a mesma leitura criando os elementos em um canvas (requer display)
+        try:
+            import tkinter as tk
+            root = tk.Tk()
+        except Exception as e:
+            print(f"{'leitura com canvas':>22}: indisponível ({e})")
+            return
+        
+        root.withdraw()
+        canvas = tk.Canvas(root)
+        start = time.perf_counter()
+        load_visionmap_from_file(file_path, canvas)
+        print(f"{'leitura com canvas (s)':>22}: {time.perf_counter() - start:.3f}")
+        root.destroy()
+    finally:
+        os.remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+Benchmark de latência ao arrastar um container com muitas conexões internas
+
+Compara a atualização imediata das conexões (comportamento anterior) com o
+agendador que agrupa as atualizações em uma passagem por quadro.
+Uso: python -m benchmarks.bench_drag
+"""
+
+import random
+import time
+import tkinter as tk
+
+from src.models.box import VisionMapBox
+from src.models.container import Container
+from src.models.connection import Connection
+from src.models.connection_scheduler import ConnectionScheduler
+
+
+BOXES = 250
+CONNECTIONS = 500
+FRAMES = 60
+
+
+def build_container(canvas):
+    """Cria um container com caixas internas ligadas por conexões aleatórias."""
+    rng = random.Random(42)
+    container = Container(canvas, 1500, 1500, width=2800, height=2800)
+    boxes = []
+    for _ in range(BOXES):
+        box = VisionMapBox(canvas, rng.uniform(300, 2700), rng.uniform(300, 2700))
+        container.add_box(box)
+        boxes.append(box)
+    for _ in range(CONNECTIONS):
+        box1, box2 = rng.sample(boxes, 2)
+        Connection(canvas, box1, box2)
+    return container
+
+
+def drag(root, container, events_per_frame):
+    """Arrasta o container e retorna o tempo médio por quadro, em milissegundos."""
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        for _ in range(events_per_frame):
+            container.move_to(container.x + 1, container.y + 1)
+        # Processa as tarefas ociosas, como o Tk faz entre os quadros
+        root.update_idletasks()
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def main():
+    root = tk.Tk()
+    root.withdraw()
+    
+    print(f"{'eventos/quadro':>15} | {'imediato (ms)':>14} | {'agendado (ms)':>14}")
+    print("-" * 50)
+    
+    for events_per_frame in (1, 4):
+        results = []
+        for use_scheduler in (False, True):
+            canvas = tk.Canvas(root)
+            if use_scheduler:
+                canvas.connection_scheduler = ConnectionScheduler(canvas.after_idle)
+            container = build_container(canvas)
+            root.update_idletasks()
+            
+            results.append(drag(root, container, events_per_frame))
+            canvas.destroy()
+        
+        print(f"{events_per_frame:>15} | {results[0]:>14.2f} | {results[1]:>14.2f}")
+    
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
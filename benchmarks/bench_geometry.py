@@ -0,0 +1,76 @@
+"""
+Benchmark das consultas de geometria sobre o mapa inteiro
+
+Compara os limites do conteúdo calculados com compreensões de lista sobre os
+atributos dos elementos (comportamento anterior) com as operações em lote do
+GeometryStore, além do custo de transladar todos os elementos.
+Uso: python -m benchmarks.bench_geometry
+"""
+
+import random
+import time
+
+from src.utils.geometry_store import GeometryStore, GeometryView, numpy
+
+
+ELEMENTS = 100000
+REPEATS = 20
+
+
+class Element(GeometryView):
+    """Elemento mínimo com a geometria no armazenamento colunar."""
+    
+    def __init__(self, store, x, y, width, height):
+        store.attach(self, x, y, width, height)
+
+
+class PlainElement:
+    """Elemento com a geometria em atributos comuns, como antes."""
+    
+    def __init__(self, x, y, width, height):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+
+def timed(function):
+    """Retorna o tempo médio de uma chamada, em milissegundos."""
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        function()
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def list_bounds(elements):
+    return (min([e.x - e.width/2 for e in elements]), min([e.y - e.height/2 for e in elements]),
+            max([e.x + e.width/2 for e in elements]), max([e.y + e.height/2 for e in elements]))
+
+
+def list_translate(elements):
+    for e in elements:
+        e.x += 1
+        e.y += 1
+
+
+def main():
+    rng = random.Random(42)
+    geometry = [(rng.uniform(0, 100000), rng.uniform(0, 100000), rng.uniform(50, 300), rng.uniform(50, 200))
+                for _ in range(ELEMENTS)]
+    
+    plain = [PlainElement(*g) for g in geometry]
+    store = GeometryStore()
+    for g in geometry:
+        Element(store, *g)
+    
+    print(f"{ELEMENTS} elementos, NumPy {'disponível' if numpy is not None else 'indisponível'}")
+    print(f"{'operação':>12} | {'atributos (ms)':>15} | {'colunar (ms)':>13}")
+    print("-" * 47)
+    print(f"{'limites':>12} | {timed(lambda: list_bounds(plain)):>15.2f} | {timed(store.bounds):>13.2f}")
+    print(f"{'translação':>12} | {timed(lambda: list_translate(plain)):>15.2f} | "
+          f"{timed(lambda: store.translate(None, 1, 1)):>13.2f}")
+    print(f"{'sobreposição':>12} | {'-':>15} | {timed(lambda: store.query_overlap(0, 0, 20000, 20000)):>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Benchmark de latência de clique (hit testing) em função do número de elementos
+
+Compara a varredura linear das listas da aplicação com a consulta ao índice espacial
+e com o find_overlapping do Tk combinado ao registro de itens do canvas.
+Uso: python -m benchmarks.bench_hit_test
+"""
+
+import random
+import time
+import tkinter as tk
+
+from src.models.box import VisionMapBox
+from src.models.container import Container
+from src.utils.spatial_index import SpatialIndex
+from src.utils.item_registry import CanvasItemRegistry
+
+
+ELEMENT_COUNTS = [1000, 5000, 20000, 50000]
+CLICKS = 2000
+
+
+def build_map(canvas, count, world_size):
+    """Cria caixas e containers em posições aleatórias."""
+    rng = random.Random(42)
+    boxes = []
+    containers = []
+    for i in range(count):
+        x = rng.uniform(0, world_size)
+        y = rng.uniform(0, world_size)
+        if i % 20 == 0:
+            containers.append(Container(canvas, x, y))
+        else:
+            boxes.append(VisionMapBox(canvas, x, y))
+    return boxes, containers
+
+
+def linear_hit(boxes, containers, x, y):
+    """Hit testing original: percorre as listas na ordem."""
+    for box in boxes:
+        if box.contains_point(x, y):
+            return box
+    for container in containers:
+        if container.contains_point(x, y):
+            return container
+    return None
+
+
+def indexed_hit(index, x, y):
+    """Hit testing pelo índice espacial, respeitando a ordem de empilhamento."""
+    containers_hit = None
+    for element in index.query_point(x, y):
+        if not isinstance(element, Container):
+            return element
+        if containers_hit is None:
+            containers_hit = element
+    return containers_hit
+
+
+def canvas_hit(canvas, registry, x, y):
+    """Hit testing pelos itens do canvas Tk (do topo para o fundo)."""
+    containers_hit = None
+    for element in registry.owners_of(reversed(canvas.find_overlapping(x, y, x, y))):
+        if not isinstance(element, Container):
+            return element
+        if containers_hit is None:
+            containers_hit = element
+    return containers_hit
+
+
+def time_per_click(hit_test, points):
+    """Tempo médio por clique, em microssegundos."""
+    start = time.perf_counter()
+    for x, y in points:
+        hit_test(x, y)
+    return (time.perf_counter() - start) / len(points) * 1e6
+
+
+def main():
+    root = tk.Tk()
+    root.withdraw()
+    
+    print(f"{'elementos':>10} | {'linear (us/clique)':>20} | {'índice (us/clique)':>20} | {'canvas Tk (us/clique)':>22}")
+    print("-" * 82)
+    
+    for count in ELEMENT_COUNTS:
+        canvas = tk.Canvas(root)
+        index = SpatialIndex()
+        canvas.spatial_index = index
+        registry = CanvasItemRegistry()
+        canvas.item_registry = registry
+        
+        # Manter a densidade aproximadamente constante
+        world_size = int((count ** 0.5) * 150)
+        boxes, containers = build_map(canvas, count, world_size)
+        
+        rng = random.Random(7)
+        points = [(rng.uniform(0, world_size), rng.uniform(0, world_size)) for _ in range(CLICKS)]
+        
+        linear_time = time_per_click(lambda x, y: linear_hit(boxes, containers, x, y), points)
+        indexed_time = time_per_click(lambda x, y: indexed_hit(index, x, y), points)
+        canvas_time = time_per_click(lambda x, y: canvas_hit(canvas, registry, x, y), points)
+        
+        print(f"{count:>10} | {linear_time:>20.1f} | {indexed_time:>20.1f} | {canvas_time:>22.1f}")
+        
+        canvas.destroy()
+    
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
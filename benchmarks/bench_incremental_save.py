@@ -0,0 +1,60 @@
+"""
+Benchmark do salvamento incremental (diário) contra o salvamento completo
+
+Salva um mapa sintético por completo e mede, em seguida, o tempo de salvar uma
+única alteração no diário, o tempo de abrir o arquivo com o diário e o tempo de
+incorporar o diário ao arquivo principal.
+Uso: python -m benchmarks.bench_incremental_save
+"""
+
+import os
+import tempfile
+import time
+
+from benchmarks.bench_document import build_document
+from src.utils.file_manager import (save_visionmap_to_file, append_visionmap_journal,
+                                    compact_visionmap_journal, load_visionmap_from_file)
+from src.utils.journal import journal_path
+
+
+SAVES = 20
+
+
+def main():
+    document = build_document()
+    
+    fd, file_path = tempfile.mkstemp(suffix=".vmap")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        save_visionmap_to_file(file_path, *document.as_lists())
+        full_save = time.perf_counter() - start
+        
+        # Cada salvamento grava uma única caixa editada
+        start = time.perf_counter()
+        for i in range(SAVES):
+            box = document.boxes[i]
+            box.text = f"Editado {i}"
+            append_visionmap_journal(file_path, [box], [])
+        incremental_save = (time.perf_counter() - start) / SAVES
+        
+        start = time.perf_counter()
+        load_visionmap_from_file(file_path)
+        load_with_journal = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        compact_visionmap_journal(file_path)
+        compaction = time.perf_counter() - start
+        
+        print(f"{'salvamento completo (s)':>28}: {full_save:.4f}")
+        print(f"{'salvamento incremental (s)':>28}: {incremental_save:.4f}")
+        print(f"{'leitura com diário (s)':>28}: {load_with_journal:.4f}")
+        print(f"{'compactação (s)':>28}: {compaction:.4f}")
+    finally:
+        for path in (file_path, journal_path(file_path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
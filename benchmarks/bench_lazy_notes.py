@@ -0,0 +1,90 @@
+"""
+Benchmark da leitura de mapas com muitas anotações longas
+
+Compara o tempo de leitura e a memória do documento quando os textos completos
+das anotações vêm junto com os registros (formato 2) e quando ficam na seção do
+final do arquivo e são lidos sob demanda (formato 3).
+Uso: python -m benchmarks.bench_lazy_notes
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from src.models.document import Document
+from src.utils.file_manager import save_visionmap_to_file, read_visionmap_document
+
+
+NOTES = 5000
+
+# Parágrafos por anotação (cada um com cerca de 400 caracteres)
+PARAGRAPHS = 10
+
+
+def build_document():
+    """Cria um documento com anotações de várias páginas."""
+    rng = random.Random(42)
+    words = ["mapa", "visão", "anotação", "pesquisa", "conexão", "container", "resumo", "página"]
+    document = Document()
+    for i in range(NOTES):
+        paragraphs = [" ".join(rng.choice(words) for _ in range(60)) for _ in range(PARAGRAPHS)]
+        document.add_note(rng.uniform(0, 50000), rng.uniform(0, 50000), f"Anotação {i}",
+                          full_text="\n\n".join(paragraphs))
+    return document
+
+
+def write_inline(file_path, document):
+    """Grava o documento no formato 2, com os textos completos junto dos registros."""
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'format': 'visionmap', 'version': 2}) + "\n")
+        for note in document.boxes:
+            record = note.get_state()
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def measure(file_path):
+    """Retorna (segundos, bytes alocados) da leitura do arquivo como documento."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    document = read_visionmap_document(file_path)
+    elapsed = time.perf_counter() - start
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del document
+    return elapsed, allocated
+
+
+def main():
+    document = build_document()
+    
+    paths = []
+    try:
+        for _ in range(2):
+            fd, file_path = tempfile.mkstemp(suffix=".vmap")
+            os.close(fd)
+            paths.append(file_path)
+        inline_path, lazy_path = paths
+        
+        write_inline(inline_path, document)
+        save_visionmap_to_file(lazy_path, *document.as_lists())
+        
+        for label, file_path in (("textos junto dos registros", inline_path),
+                                 ("textos sob demanda", lazy_path)):
+            elapsed, allocated = measure(file_path)
+            print(f"{label:>28}: {elapsed:.3f} s, {allocated / 2**20:.1f} MB")
+        
+        # Abrir uma anotação lê apenas a sua linha
+        lazy = read_visionmap_document(lazy_path)
+        start = time.perf_counter()
+        lazy.boxes[NOTES // 2].full_text
+        print(f"{'primeiro texto lido (ms)':>28}: {(time.perf_counter() - start) * 1000:.2f}")
+    finally:
+        for file_path in paths:
+            os.remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
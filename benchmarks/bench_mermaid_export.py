@@ -0,0 +1,68 @@
+"""
+Benchmark da exportação Mermaid em fluxo para mapas sintéticos de 25 mil a 100 mil caixas
+
+Para cada tamanho mede o tempo de gravar o código em um arquivo (os.devnull),
+o melhor de REPEAT execuções, e o pico de memória alocada durante a gravação
+(tracemalloc, em outra execução). O tempo por caixa constante indica tempo
+linear. O pico é um trecho do texto de tamanho fixo (CHUNK_LINES linhas) mais
+o conjunto de identificadores dos containers: o código gerado nunca fica
+inteiro na memória.
+Uso: python -m benchmarks.bench_mermaid_export
+"""
+
+import os
+import random
+import time
+import tracemalloc
+
+from src.models.document import Document
+from src.utils.mermaid_export import iter_mermaid, write_mermaid
+
+
+SIZES = (25000, 50000, 100000)
+REPEAT = 3
+
+
+def build_document(count):
+    """Cria um documento com count caixas (um terço em containers) e count / 2 conexões."""
+    rng = random.Random(42)
+    document = Document()
+    containers = [document.add_container(rng.uniform(0, 100000), rng.uniform(0, 100000), title=f"Grupo {i}")
+                  for i in range(count // 100)]
+    for i in range(count):
+        x, y = rng.uniform(0, 100000), rng.uniform(0, 100000)
+        if i % 10 == 0:
+            box = document.add_note(x, y, f"Anotação {i}")
+        else:
+            box = document.add_box(x, y, f'Caixa {i} com "aspas" e <tags>')
+        if i % 3 == 0:
+            rng.choice(containers).add_box(box)
+    for i in range(count // 2):
+        document.add_connection(*rng.sample(document.boxes, 2), f"rótulo {i}" if i % 2 else "")
+    return document.as_lists()
+
+
+def main():
+    print(f"{'caixas':>8} {'tempo (s)':>10} {'µs/caixa':>9} {'pico (MB)':>10} {'código (MB)':>12}")
+    for count in SIZES:
+        lists = build_document(count)
+        
+        with open(os.devnull, 'w', encoding='utf-8') as f:
+            elapsed = float('inf')
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                write_mermaid(*lists, f)
+                elapsed = min(elapsed, time.perf_counter() - start)
+            
+            tracemalloc.start()
+            write_mermaid(*lists, f)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        
+        size = sum(len(chunk.encode('utf-8')) for chunk in iter_mermaid(*lists))
+        print(f"{count:>8} {elapsed:>10.3f} {elapsed / count * 1e6:>9.2f} "
+              f"{peak / 2**20:>10.1f} {size / 2**20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Benchmark e verificação do movimento de containers profundamente aninhados
+
+Monta uma árvore com vários níveis de containers (cada nível com suas caixas e
+anotações), move o container raiz e confere que cada descendente foi deslocado
+exatamente uma vez, medindo o tempo por movimento (requer display; os testes
+em tests/test_nesting.py cobrem o mesmo comportamento sem janela).
+Uso: python -m benchmarks.bench_nesting
+"""
+
+import time
+import tkinter as tk
+
+from src.models.box import VisionMapBox
+from src.models.note_box import NoteBox
+from src.models.container import Container
+from src.utils.spatial_index import SpatialIndex
+
+
+LEVELS = 10
+BOXES_PER_LEVEL = 300
+MOVES = 20
+
+
+def build_tree(canvas):
+    """Cria LEVELS containers aninhados, cada um com BOXES_PER_LEVEL caixas e anotações."""
+    containers = []
+    elements = []
+    parent = None
+    for level in range(LEVELS):
+        size = 20000 - level * 1500
+        container = Container(canvas, 10000, 10000, width=size, height=size)
+        if parent is not None:
+            parent.add_child_container(container)
+        containers.append(container)
+        elements.append(container)
+        
+        for i in range(BOXES_PER_LEVEL):
+            cls = NoteBox if i % 10 == 0 else VisionMapBox
+            box = cls(canvas, 10000 + i, 10000 + level)
+            container.add_box(box)
+            elements.append(box)
+        parent = container
+    return containers, elements
+
+
+def check_positions(canvas, elements, expected):
+    """Confere que o modelo e os itens do canvas de cada elemento estão na posição esperada."""
+    for element in elements:
+        x, y = expected[element]
+        if (element.x, element.y) != (x, y):
+            raise RuntimeError("elemento fora da posição esperada")
+        x1, y1, x2, y2 = canvas.coords(element.rect)
+        if abs((x1 + x2) / 2 - x) >= 1e-6 or abs((y1 + y2) / 2 - y) >= 1e-6:
+            raise RuntimeError("item do canvas fora da posição esperada")
+
+
+def main():
+    root = tk.Tk()
+    root.withdraw()
+    canvas = tk.Canvas(root)
+    canvas.spatial_index = SpatialIndex()
+    
+    containers, elements = build_tree(canvas)
+    top = containers[0]
+    expected = {element: (element.x, element.y) for element in elements}
+    
+    # Primeiro movimento: inclui o cálculo da subárvore (depois mantida em cache)
+    start = time.perf_counter()
+    top.move_to(top.x + 1, top.y + 1)
+    first = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    for _ in range(MOVES - 1):
+        top.move_to(top.x + 1, top.y + 1)
+    cached = (time.perf_counter() - start) / (MOVES - 1) * 1000
+    
+    expected = {element: (x + MOVES, y + MOVES) for element, (x, y) in expected.items()}
+    check_positions(canvas, elements, expected)
+    
+    # Mudança de hierarquia: o cache é descartado e a subárvore menor passa a ser movida
+    middle = containers[LEVELS // 2]
+    middle.parent_container.remove_child_container(middle)
+    top.move_to(top.x + 1, top.y + 1)
+    moved = set(top.get_subtree())
+    for element in elements:
+        x, y = expected[element]
+        expected[element] = (x + 1, y + 1) if element in moved else (x, y)
+    check_positions(canvas, elements, expected)
+    
+    print(f"{LEVELS} níveis, {len(elements)} elementos")
+    print(f"primeiro movimento: {first:.2f} ms | com cache: {cached:.2f} ms")
+    print("posições conferidas: cada elemento foi movido exatamente uma vez")
+    
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
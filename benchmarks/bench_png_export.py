@@ -0,0 +1,44 @@
+"""
+Benchmark da exportação PNG em blocos de um mapa sintético com 50 mil elementos
+
+Usa o mesmo documento do benchmark do SVG (100 mil x 100 mil unidades),
+exportado em escala 0.1 (cerca de 10 mil x 10 mil pixels). Mede o tempo com um
+processo e com um processo por núcleo (no mínimo dois), e o tamanho do arquivo resultante.
+Requer o Pillow.
+Uso: python -m benchmarks.bench_png_export
+"""
+
+import os
+import tempfile
+import time
+
+from benchmarks.bench_svg_export import build_document, CONTAINERS, BOXES, CONNECTIONS
+from src.utils.png_export import export_to_png
+
+
+SCALE = 0.1
+
+
+def main():
+    lists = build_document().as_lists()
+    
+    fd, file_path = tempfile.mkstemp(suffix=".png")
+    os.close(fd)
+    try:
+        print(f"{'elementos':>24}: {CONTAINERS + BOXES + CONNECTIONS}")
+        # Pelo menos dois processos, para que o pool seja exercitado mesmo com um núcleo
+        pool_size = max(os.cpu_count() or 1, 2)
+        for label, workers in (("1 processo", 1), (f"{pool_size} processos", pool_size)):
+            start = time.perf_counter()
+            width, height = export_to_png(*lists, file_path, scale=SCALE, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{'exportação PNG, ' + label + ' (s)':>24}: {elapsed:.3f}")
+        
+        print(f"{'imagem (pixels)':>24}: {width}x{height}")
+        print(f"{'tamanho (MB)':>24}: {os.path.getsize(file_path) / 2**20:.1f}")
+    finally:
+        os.remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""
+Benchmark da exportação SVG de um mapa sintético com 50 mil elementos
+
+Mede o tempo de gerar o SVG direto do documento (sem o Tk e sem janela) e o
+tamanho do arquivo resultante.
+Uso: python -m benchmarks.bench_svg_export
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from src.models.document import Document
+from src.utils.svg_export import export_to_svg
+
+
+CONTAINERS = 500
+BOXES = 35000
+CONNECTIONS = 14500
+
+
+def build_document():
+    """Cria um documento com containers, caixas, anotações e conexões com rótulos."""
+    rng = random.Random(42)
+    document = Document()
+    containers = [document.add_container(rng.uniform(0, 100000), rng.uniform(0, 100000), title=f"Grupo {i}")
+                  for i in range(CONTAINERS)]
+    for i in range(BOXES):
+        x, y = rng.uniform(0, 100000), rng.uniform(0, 100000)
+        if i % 10 == 0:
+            box = document.add_note(x, y, f"Anotação {i}")
+        else:
+            box = document.add_box(x, y, f"Caixa {i} com um texto que ocupa duas linhas")
+        if i % 3 == 0:
+            rng.choice(containers).add_box(box)
+    for i in range(CONNECTIONS):
+        document.add_connection(*rng.sample(document.boxes, 2), f"rótulo {i}" if i % 2 else "")
+    return document
+
+
+def main():
+    document = build_document()
+    
+    fd, file_path = tempfile.mkstemp(suffix=".svg")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        export_to_svg(*document.as_lists(), file_path)
+        elapsed = time.perf_counter() - start
+        
+        print(f"{'elementos':>18}: {CONTAINERS + BOXES + CONNECTIONS}")
+        print(f"{'exportação SVG (s)':>18}: {elapsed:.3f}")
+        print(f"{'tamanho (MB)':>18}: {os.path.getsize(file_path) / 2**20:.1f}")
+    finally:
+        os.remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
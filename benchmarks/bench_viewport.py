@@ -0,0 +1,78 @@
+"""
+Benchmark da renderização virtualizada
+
+Cria um mapa grande com e sem virtualização e compara o tempo de criação, o
+número de itens vivos no canvas e o tempo médio de uma rolagem.
+Uso: python -m benchmarks.bench_viewport
+"""
+
+import random
+import time
+import tkinter as tk
+
+from src.models.box import VisionMapBox
+from src.models.connection import Connection
+from src.utils.spatial_index import SpatialIndex
+from src.utils.item_registry import CanvasItemRegistry
+from src.ui.viewport import ViewportManager
+
+
+BOXES = 20000
+CONNECTIONS = 10000
+AREA = 200000
+SCROLLS = 50
+
+
+def build_map(canvas):
+    """Cria caixas espalhadas pela área e conexões entre caixas próximas."""
+    rng = random.Random(42)
+    boxes = [VisionMapBox(canvas, rng.uniform(0, AREA), rng.uniform(0, AREA))
+             for _ in range(BOXES)]
+    boxes.sort(key=lambda box: (box.x // 2000, box.y))
+    for _ in range(CONNECTIONS):
+        i = rng.randrange(len(boxes) - 1)
+        Connection(canvas, boxes[i], boxes[i + 1])
+
+
+def run(root, virtualized):
+    """Retorna (tempo de criação em s, itens no canvas, ms por rolagem)."""
+    canvas = tk.Canvas(root, width=1200, height=800, scrollregion=(0, 0, AREA, AREA))
+    canvas.spatial_index = SpatialIndex()
+    canvas.connection_index = SpatialIndex()
+    canvas.item_registry = CanvasItemRegistry()
+    canvas.viewport = ViewportManager(canvas, canvas.spatial_index, canvas.connection_index)
+    canvas.viewport.enabled = virtualized
+    
+    start = time.perf_counter()
+    build_map(canvas)
+    root.update_idletasks()
+    created = time.perf_counter() - start
+    items = len(canvas.find_all())
+    
+    start = time.perf_counter()
+    for i in range(SCROLLS):
+        canvas.xview_moveto(i / SCROLLS)
+        canvas.viewport.schedule_refresh()
+        root.update_idletasks()
+    scroll = (time.perf_counter() - start) / SCROLLS * 1000
+    
+    canvas.destroy()
+    return created, items, scroll
+
+
+def main():
+    root = tk.Tk()
+    root.withdraw()
+    
+    print(f"{'modo':>12} | {'criação (s)':>11} | {'itens':>7} | {'rolagem (ms)':>12}")
+    print("-" * 52)
+    for virtualized in (False, True):
+        created, items, scroll = run(root, virtualized)
+        name = "virtualizado" if virtualized else "completo"
+        print(f"{name:>12} | {created:>11.2f} | {items:>7} | {scroll:>12.2f}")
+    
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -6,24 +6,192 @@ import tkinter as tk
 from tkinter import simpledialog, colorchooser
 from abc import ABC, abstractmethod
 
+from ..utils.geometry_store import GeometryView, get_geometry_store
+from .interaction import get_interaction
 
-class VisualElement(ABC):
-    """Classe abstrata base para todos os elementos visuais."""
+
+# Último identificador estável atribuído a um elemento. Os identificadores são
+# usados nas tags do canvas e salvos nos arquivos (hierarquia e conexões)
+_last_element_id = 0
+
+
+def new_element_id():
+    """Retorna um novo identificador inteiro único para um elemento."""
+    global _last_element_id
+    _last_element_id += 1
+    return _last_element_id
+
+
+def reserve_element_id(uid):
+    """Registra um identificador já existente (ex.: lido de um arquivo) e o retorna.
     
-    def __init__(self, canvas, x, y, width, height):
+    Os próximos identificadores gerados por new_element_id serão maiores que ele.
+    """
+    global _last_element_id
+    if uid > _last_element_id:
+        _last_element_id = uid
+    return uid
+
+
+def element_id(uid=None):
+    """Retorna o identificador informado (reservando-o) ou um novo, se for None."""
+    return new_element_id() if uid is None else reserve_element_id(uid)
+
+
+# Abaixo deste zoom os elementos são desenhados de forma simplificada
+# (sem textos, barras de título, setas e rótulos)
+DETAIL_ZOOM = 0.5
+
+
+def get_zoom(canvas):
+    """Retorna o fator de zoom do canvas (coordenadas do canvas = coordenadas do modelo * zoom)."""
+    return getattr(canvas, 'zoom', 1.0)
+
+
+def show_details(canvas):
+    """Indica se o zoom atual permite desenhar os detalhes dos elementos."""
+    return get_zoom(canvas) >= DETAIL_ZOOM
+
+
+def scaled_font(size, zoom, *style):
+    """Retorna a fonte Arial com o tamanho ajustado ao zoom."""
+    return ("Arial", max(1, int(round(size * zoom)))) + style
+
+
+class VisualElement(GeometryView, ABC):
+    """Classe abstrata base para todos os elementos visuais.
+    
+    A geometria (x, y, width, height) fica no GeometryStore do canvas; os
+    atributos são lidos e escritos diretamente nas colunas do armazenamento.
+    Os elementos usam __slots__ e o estado de arrasto fica no controlador de
+    interações do canvas (ver models.interaction).
+    """
+    
+    __slots__ = ('canvas', 'uid', 'tag', '_geometry', '_slot', 'selected', 'connections', 'rendered')
+    
+    def __init__(self, canvas, x, y, width, height, uid=None):
         self.canvas = canvas
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
         
-        # Atributos para controle de seleção e movimento
+        # Identificador estável (preservado ao salvar e abrir) e tag que marca
+        # todos os itens do elemento no canvas
+        self.uid = element_id(uid)
+        self.tag = f"el_{self.uid}"
+        
+        get_geometry_store(canvas).attach(self, x, y, width, height)
+        
+        # Atributo para controle de seleção
         self.selected = False
-        self.offset_x = 0
-        self.offset_y = 0
         
         # Lista de conexões
         self.connections = []
+        
+        # Indica se os itens do elemento existem no canvas (ver show/hide)
+        self.rendered = False
+        
+        # Registrar o elemento no índice espacial do canvas, se houver, e
+        # agendar a verificação de pertinência a containers
+        self._update_index()
+        self._mark_membership_dirty()
+    
+    def get_bounds(self):
+        """Retorna a caixa delimitadora (x1, y1, x2, y2) do elemento."""
+        return (self.x - self.width/2, self.y - self.height/2,
+                self.x + self.width/2, self.y + self.height/2)
+    
+    def _update_index(self):
+        """Atualiza a posição do elemento no índice espacial do canvas."""
+        index = getattr(self.canvas, 'spatial_index', None)
+        if index is not None:
+            index.update(self, self.get_bounds())
+        
+        # O elemento pode ter entrado ou saído da área visível
+        viewport = getattr(self.canvas, 'viewport', None)
+        if viewport is not None:
+            viewport.schedule_refresh()
+    
+    def _remove_from_index(self):
+        """Remove o elemento do índice espacial, do armazenamento de geometria e das verificações pendentes."""
+        index = getattr(self.canvas, 'spatial_index', None)
+        if index is not None:
+            index.remove(self)
+        
+        self._geometry.detach(self)
+        get_interaction(self.canvas).forget(self)
+        
+        membership = getattr(self.canvas, 'membership', None)
+        if membership is not None:
+            membership.discard(self)
+        
+        changes = getattr(self.canvas, 'changes', None)
+        if changes is not None:
+            changes.mark_deleted(self)
+    
+    def _mark_membership_dirty(self, resized=False):
+        """Avisa o motor de pertinência de que a geometria do elemento mudou."""
+        membership = getattr(self.canvas, 'membership', None)
+        if membership is not None:
+            membership.mark_dirty(self, resized)
+        
+        # Toda mudança de geometria também precisa ir para o próximo salvamento
+        self._mark_changed()
+    
+    def _mark_changed(self):
+        """Registra que o elemento mudou desde o último salvamento (ver models.changes)."""
+        changes = getattr(self.canvas, 'changes', None)
+        if changes is not None:
+            changes.mark(self)
+    
+    def _register_items(self, *item_ids):
+        """Associa itens do canvas a este elemento no registro de itens do canvas."""
+        registry = getattr(self.canvas, 'item_registry', None)
+        if registry is not None:
+            registry.register(self, *item_ids)
+    
+    def _unregister_items(self, *item_ids):
+        """Remove a associação dos itens do canvas a este elemento."""
+        registry = getattr(self.canvas, 'item_registry', None)
+        if registry is not None:
+            registry.unregister(*item_ids)
+    
+    def _init_items(self):
+        """Cria os itens do elemento, a menos que ele esteja fora da área visível do canvas virtualizado."""
+        viewport = getattr(self.canvas, 'viewport', None)
+        if viewport is None or viewport.wants(self):
+            self.show()
+    
+    def show(self):
+        """Cria os itens do elemento no canvas, se ainda não existirem."""
+        if self.rendered:
+            return
+        
+        self._create_items()
+        self.rendered = True
+        
+        viewport = getattr(self.canvas, 'viewport', None)
+        if viewport is not None:
+            viewport.add(self)
+    
+    def hide(self):
+        """Remove os itens do elemento do canvas, mantendo o modelo."""
+        if not self.rendered:
+            return
+        
+        self._delete_items()
+        self.rendered = False
+        
+        viewport = getattr(self.canvas, 'viewport', None)
+        if viewport is not None:
+            viewport.discard(self)
+    
+    @abstractmethod
+    def _create_items(self):
+        """Cria os itens do elemento no canvas a partir do estado do modelo."""
+        pass
+    
+    @abstractmethod
+    def _delete_items(self):
+        """Remove os itens do elemento do canvas."""
+        pass
     
     @abstractmethod
     def contains_point(self, x, y):
@@ -57,10 +225,16 @@ class VisualElement(ABC):
     
     def bring_to_front(self):
         """Traz o elemento para a frente."""
-        # Implementação padrão - subclasses devem sobrescrever
-        pass
+        # Atualiza apenas a ordem no índice espacial - subclasses devem
+        # sobrescrever para reordenar os itens do canvas e chamar super()
+        index = getattr(self.canvas, 'spatial_index', None)
+        if index is not None:
+            index.raise_to_top(self)
     
     def send_to_back(self):
         """Envia o elemento para trás."""
-        # Implementação padrão - subclasses devem sobrescrever
-        pass
\ No newline at end of file
+        # Atualiza apenas a ordem no índice espacial - subclasses devem
+        # sobrescrever para reordenar os itens do canvas e chamar super()
+        index = getattr(self.canvas, 'spatial_index', None)
+        if index is not None:
+            index.lower_to_bottom(self)
\ No newline at end of file
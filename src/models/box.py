@@ -4,15 +4,25 @@ Modelo para caixas básicas no VisionMap
 
 import tkinter as tk
 from tkinter import simpledialog, colorchooser
-from .base import VisualElement
+from .base import VisualElement, get_zoom, show_details, scaled_font
+from .interaction import get_interaction
+from .lazy_text import lazy_text_property
 
 
 class VisionMapBox(VisualElement):
     """Classe que representa uma caixa básica no visionmap."""
     
+    # Tipo do elemento no documento (ver models.document)
+    kind = 'box'
+    
+    __slots__ = ('_text', 'fill_color', 'outline_color', 'container', 'rect', 'text_id')
+    
+    # Texto exibido (pode chegar de um arquivo binário ainda não decodificado)
+    text = lazy_text_property('text')
+    
     def __init__(self, canvas, x, y, text="Novo Item", width=100, height=50, 
-                 fill_color="lightblue", outline_color="#CCCCCC"):
-        super().__init__(canvas, x, y, width, height)
+                 fill_color="lightblue", outline_color="#CCCCCC", uid=None):
+        super().__init__(canvas, x, y, width, height, uid)
         
         self.text = text
         self.fill_color = fill_color
@@ -21,37 +31,70 @@ class VisionMapBox(VisualElement):
         # Referência ao container pai, se houver
         self.container = None
         
+        # Itens no canvas (criados por show quando a caixa está visível)
+        self.rect = None
+        self.text_id = None
+        self._init_items()
+    
+    def _canvas_tags(self):
+        """Retorna as tags dos itens da caixa: a do elemento e as das subárvores que a contêm."""
+        tags = [self.tag]
+        if self.container is not None:
+            tags.extend(container.subtree_tag for container in self.container._ancestor_chain())
+        return tuple(tags)
+    
+    def _create_items(self):
+        """Cria o retângulo e o texto da caixa no canvas."""
+        zoom = get_zoom(self.canvas)
+        x, y, width, height = self.x * zoom, self.y * zoom, self.width * zoom, self.height * zoom
+        tags = self._canvas_tags()
+        
         # Criar a caixa no canvas
-        self.rect = canvas.create_rectangle(
+        outline, line_width = ("red", 3) if self.selected else (self.outline_color, 1)
+        self.rect = self.canvas.create_rectangle(
             x - width/2, y - height/2, 
             x + width/2, y + height/2,
-            fill=self.fill_color, outline=self.outline_color, width=1
+            fill=self.fill_color, outline=outline, width=line_width,
+            tags=tags
         )
         
-        # Adicionar texto à caixa
-        self.text_id = canvas.create_text(
-            x, y, text=text, width=width-10,
-            font=("Arial", 10), fill="black"
-        )
+        # Adicionar texto à caixa (omitido quando o zoom é pequeno demais para lê-lo)
+        if show_details(self.canvas):
+            self.text_id = self.canvas.create_text(
+                x, y, text=self.text, width=width-10*zoom,
+                font=scaled_font(10, zoom), fill="black", tags=tags
+            )
+        self._register_items(self.rect, self.text_id)
+    
+    def _delete_items(self):
+        """Remove os itens da caixa do canvas."""
+        self.canvas.delete(self.tag)
+        self._unregister_items(self.rect, self.text_id)
+        self.rect = None
+        self.text_id = None
     
     def update(self):
         """Atualiza a aparência da caixa."""
-        self.canvas.itemconfig(self.rect, fill=self.fill_color, outline=self.outline_color)
+        if self.rendered:
+            self.canvas.itemconfig(self.rect, fill=self.fill_color, outline=self.outline_color)
     
     def move_to(self, x, y):
         """Move a caixa para coordenadas absolutas."""
         dx = x - self.x
         dy = y - self.y
         
-        self.canvas.move(self.rect, dx, dy)
-        self.canvas.move(self.text_id, dx, dy)
+        # Todos os itens da caixa compartilham a tag do elemento
+        zoom = get_zoom(self.canvas)
+        self.canvas.move(self.tag, dx * zoom, dy * zoom)
         
         self.x = x
         self.y = y
+        self._update_index()
+        self._mark_membership_dirty()
         
         # Atualizar todas as conexões
         for connection in self.connections:
-            connection.update()
+            connection.schedule_update()
 
     def contains_point(self, x, y):
         """Verifica se um ponto está dentro da caixa."""
@@ -61,55 +104,65 @@ class VisionMapBox(VisualElement):
     def select(self, event_x, event_y):
         """Seleciona a caixa e prepara para movimento."""
         self.selected = True
-        self.offset_x = event_x - self.x
-        self.offset_y = event_y - self.y
-        self.canvas.itemconfig(self.rect, outline="red", width=3)
+        get_interaction(self.canvas).start_drag(self, event_x, event_y)
+        if self.rendered:
+            self.canvas.itemconfig(self.rect, outline="red", width=3)
     
     def deselect(self):
         """Desseleciona a caixa."""
         self.selected = False
-        self.canvas.itemconfig(self.rect, outline=self.outline_color, width=2)
+        get_interaction(self.canvas).end_drag(self)
+        if self.rendered:
+            self.canvas.itemconfig(self.rect, outline=self.outline_color, width=2)
         
     def change_color(self):
         """Muda a cor da caixa usando um seletor de cores."""
         color = colorchooser.askcolor(initialcolor=self.fill_color, title="Escolha a cor da caixa")
         if color[1]:  # Se uma cor foi selecionada (não foi cancelado)
             self.fill_color = color[1]
-            self.canvas.itemconfig(self.rect, fill=self.fill_color)
+            self._mark_changed()
+            if self.rendered:
+                self.canvas.itemconfig(self.rect, fill=self.fill_color)
     
     def bring_to_front(self):
         """Traz a caixa para a frente (topo das camadas)."""
-        # Trazer o retângulo e o texto para a frente
-        self.canvas.tag_raise(self.rect)
-        self.canvas.tag_raise(self.text_id)
+        # Trazer o retângulo e o texto (todos os itens da caixa) para a frente
+        self.canvas.tag_raise(self.tag)
+        super().bring_to_front()
     
     def send_to_back(self):
         """Envia a caixa para trás (fundo das camadas)."""
-        # Enviar o retângulo e o texto para o fundo
-        self.canvas.tag_lower(self.rect)
-        self.canvas.tag_lower(self.text_id)
+        # Enviar o retângulo e o texto (todos os itens da caixa) para o fundo
+        self.canvas.tag_lower(self.tag)
+        super().send_to_back()
     
     def move(self, x, y):
         """Move a caixa para uma nova posição."""
-        dx = x - self.offset_x - self.x
-        dy = y - self.offset_y - self.y
+        offset_x, offset_y = get_interaction(self.canvas).drag_offset(self)
+        dx = x - offset_x - self.x
+        dy = y - offset_y - self.y
         
-        self.canvas.move(self.rect, dx, dy)
-        self.canvas.move(self.text_id, dx, dy)
+        # Todos os itens da caixa compartilham a tag do elemento
+        zoom = get_zoom(self.canvas)
+        self.canvas.move(self.tag, dx * zoom, dy * zoom)
         
         self.x += dx
         self.y += dy
+        self._update_index()
+        self._mark_membership_dirty()
         
         # Atualizar todas as conexões
         for connection in self.connections:
-            connection.update()
+            connection.schedule_update()
     
     def edit_text(self):
         """Edita o texto da caixa."""
         new_text = simpledialog.askstring("Editar Texto", "Digite o novo texto:", initialvalue=self.text)
         if new_text:
             self.text = new_text
-            self.canvas.itemconfig(self.text_id, text=new_text)
+            self._mark_changed()
+            if self.text_id:
+                self.canvas.itemconfig(self.text_id, text=new_text)
     
     def delete(self):
         """Remove a caixa do canvas."""
@@ -118,8 +171,8 @@ class VisionMapBox(VisualElement):
             conn.delete()
         
         # Remover a caixa
-        self.canvas.delete(self.rect)
-        self.canvas.delete(self.text_id)
+        self.hide()
+        self._remove_from_index()
         
         # Remover do container, se pertencer a algum
         if self.container:
@@ -128,6 +181,7 @@ class VisionMapBox(VisualElement):
     def get_state(self):
         """Retorna o estado da caixa para salvamento."""
         return {
+            'id': self.uid,
             'x': self.x,
             'y': self.y,
             'width': self.width,
@@ -135,7 +189,7 @@ class VisionMapBox(VisualElement):
             'text': self.text,
             'fill_color': self.fill_color,
             'outline_color': self.outline_color,
-            'container_id': id(self.container) if self.container else None
+            'container_id': self.container.uid if self.container else None
         }
     
     @classmethod
@@ -146,5 +200,5 @@ class VisionMapBox(VisualElement):
         outline_color = state.get('outline_color', "#CCCCCC")
         
         box = cls(canvas, state['x'], state['y'], state['text'], 
-                state['width'], state['height'], fill_color, outline_color)
+                state['width'], state['height'], fill_color, outline_color, state.get('id'))
         return box
\ No newline at end of file
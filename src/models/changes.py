@@ -0,0 +1,60 @@
+"""
+Registro dos elementos alterados desde o último salvamento (usado pelo salvamento incremental)
+"""
+
+
+class ChangeTracker:
+    """Acumula os elementos criados ou alterados e os identificadores dos excluídos.
+    
+    Os modelos avisam o registro sempre que algo que vai para o arquivo muda
+    (geometria, textos, cores, hierarquia, conexões). No salvamento incremental,
+    apenas esses elementos são gravados no diário do arquivo (ver
+    utils.file_manager.append_visionmap_journal), em vez do mapa inteiro. Outros
+    consumidores (ex.: o salvamento automático) recebem as mesmas marcas em seus
+    próprios registros, incluídos em listeners.
+    """
+    
+    def __init__(self):
+        # Elementos criados ou alterados (dict usado como conjunto ordenado)
+        self.changed = {}
+        
+        # Identificadores dos elementos excluídos
+        self.deleted = {}
+        
+        # Outros registros que recebem as mesmas marcas (esvaziados de forma independente)
+        self.listeners = []
+        
+        # Desligado enquanto um arquivo é aberto: os elementos lidos já estão no arquivo
+        self.recording = True
+    
+    def __bool__(self):
+        return bool(self.changed or self.deleted)
+    
+    def mark(self, element):
+        """Registra que o elemento foi criado ou alterado."""
+        # Ignorar ajustes feitos durante a exclusão (ex.: sair do container)
+        if not self.recording or element.uid in self.deleted:
+            return
+        self.changed[element] = None
+        for listener in self.listeners:
+            listener.mark(element)
+    
+    def mark_deleted(self, element):
+        """Registra que o elemento foi excluído."""
+        if not self.recording:
+            return
+        self.changed.pop(element, None)
+        self.deleted[element.uid] = None
+        for listener in self.listeners:
+            listener.mark_deleted(element)
+    
+    def take(self):
+        """Retorna (alterados, identificadores excluídos) e esvazia o registro."""
+        changed, deleted = list(self.changed), list(self.deleted)
+        self.clear()
+        return changed, deleted
+    
+    def clear(self):
+        """Descarta todas as alterações (após um salvamento completo ou ao limpar o canvas)."""
+        self.changed.clear()
+        self.deleted.clear()
\ No newline at end of file
@@ -6,11 +6,18 @@ import tkinter as tk
 from tkinter import simpledialog
 import math
 
+from .base import element_id, get_zoom, show_details, scaled_font
+
 
 class Connection:
     """Classe que representa uma conexão entre duas entidades (caixas ou containers)."""
     
-    def __init__(self, canvas, obj1, obj2, label_text=""):
+    kind = 'connection'
+    
+    __slots__ = ('canvas', 'obj1', 'obj2', 'label_text', 'arrow', 'uid', 'tag', 'label_tag',
+                 'coords', 'line', 'text_id', 'rendered', 'highlighted', 'click_width')
+    
+    def __init__(self, canvas, obj1, obj2, label_text="", uid=None):
         self.canvas = canvas
         self.obj1 = obj1
         self.obj2 = obj2
@@ -18,6 +25,11 @@ class Connection:
         # Definir se a conexão tem seta ou não (por padrão, tem seta)
         self.arrow = True
         
+        # Identificador estável e tags de todos os itens desta conexão no canvas
+        self.uid = element_id(uid)
+        self.tag = f"conn_{self.uid}"
+        self.label_tag = f"conn_label_{self.uid}"
+        
         # Adicionar esta conexão às listas de conexões
         if hasattr(obj1, 'connections'):
             obj1.connections.append(self)
@@ -25,22 +37,64 @@ class Connection:
         if hasattr(obj2, 'connections'):
             obj2.connections.append(self)
         
-        # Criar a linha no canvas
-        self.line = self.canvas.create_line(
-            self.obj1.x, self.obj1.y,
-            self.obj2.x, self.obj2.y,
-            width=2, fill="gray", arrow=tk.LAST if self.arrow else None
-        )
+        # Geometria atual da linha (x1, y1, x2, y2), mantida no modelo para que o
+        # hit testing não precise consultar o canvas
+        self.coords = (self.obj1.x, self.obj1.y, self.obj2.x, self.obj2.y)
         
-        # Texto da conexão (inicialmente vazio)
+        # Itens no canvas (linha e texto), criados por show() quando a conexão está visível
+        self.line = None
         self.text_id = None
-        if label_text:
-            self.create_label()
+        self.rendered = False
+        self.highlighted = False
         
         # Área de detecção de clique (width maior para facilitar o clique)
         self.click_width = 6  # Largura da área clicável
         
         self.update()
+        self._mark_changed()
+        
+        # Os itens são criados depois da primeira atualização, já com as coordenadas da linha
+        viewport = getattr(self.canvas, 'viewport', None)
+        if viewport is None or viewport.wants(self):
+            self.show()
+    
+    def show(self):
+        """Cria os itens da conexão no canvas, se ainda não existirem."""
+        if self.rendered:
+            return
+        
+        zoom = get_zoom(self.canvas)
+        width, fill = (3, "red") if self.highlighted else (2, "gray")
+        self.line = self.canvas.create_line(
+            *(value * zoom for value in self.coords),
+            width=width, fill=fill, arrow=self._arrow_option(),
+            tags=(self.tag,)
+        )
+        self._register_items(self.line)
+        self.rendered = True
+        
+        if self.label_text:
+            self.create_label()
+        
+        viewport = getattr(self.canvas, 'viewport', None)
+        if viewport is not None:
+            viewport.add(self)
+    
+    def hide(self):
+        """Remove os itens da conexão do canvas, mantendo o modelo."""
+        if not self.rendered:
+            return
+        
+        # Remover a linha e o rótulo (todos os itens têm a tag da conexão)
+        self.canvas.delete(self.tag)
+        self._unregister_items(self.line, self.text_id)
+        self.line = None
+        self.text_id = None
+        self.rendered = False
+        
+        viewport = getattr(self.canvas, 'viewport', None)
+        if viewport is not None:
+            viewport.discard(self)
     
     def update(self):
         """Atualiza a posição da linha de conexão."""
@@ -54,34 +108,88 @@ class Connection:
             end_x, end_y = self.calculate_intersection(self.obj2, self.obj1)
             
             # Atualizar a linha
-            self.canvas.coords(self.line, start_x, start_y, end_x, end_y)
+            self.coords = (start_x, start_y, end_x, end_y)
+            self._update_index()
             
-            # Garantir que as propriedades da linha (incluindo a seta) sejam mantidas
-            self.canvas.itemconfig(self.line, arrow=tk.LAST if self.arrow else None)
+            if not self.rendered:
+                return
+            zoom = get_zoom(self.canvas)
+            self.canvas.coords(self.line, start_x * zoom, start_y * zoom, end_x * zoom, end_y * zoom)
             
-            # Atualizar posição do rótulo, se houver
+            # Reposicionar o rótulo, se houver (o item é criado uma única vez)
             if self.text_id:
-                self.create_label()  # Recria o rótulo na nova posição
+                self.canvas.coords(self.text_id, *self._label_position(zoom))
         except (AttributeError, tk.TclError, ValueError) as e:
             print(f"Erro ao atualizar conexão: {e}")
             return
     
+    def get_bounds(self):
+        """Retorna a caixa delimitadora da linha, ampliada pela área clicável."""
+        x1, y1, x2, y2 = self.coords
+        margin = self.click_width
+        return (min(x1, x2) - margin, min(y1, y2) - margin,
+                max(x1, x2) + margin, max(y1, y2) + margin)
+    
+    def _update_index(self):
+        """Atualiza a posição da conexão no índice de segmentos do canvas."""
+        index = getattr(self.canvas, 'connection_index', None)
+        if index is not None:
+            index.update(self, self.get_bounds())
+        
+        viewport = getattr(self.canvas, 'viewport', None)
+        if viewport is not None:
+            viewport.schedule_refresh()
+    
+    def _register_items(self, *item_ids):
+        """Associa itens do canvas a esta conexão no registro de itens do canvas."""
+        registry = getattr(self.canvas, 'item_registry', None)
+        if registry is not None:
+            registry.register(self, *item_ids)
+    
+    def _unregister_items(self, *item_ids):
+        """Remove a associação dos itens do canvas a esta conexão."""
+        registry = getattr(self.canvas, 'item_registry', None)
+        if registry is not None:
+            registry.unregister(*item_ids)
+    
+    def schedule_update(self):
+        """Agenda a atualização da linha para a próxima passagem do agendador do canvas."""
+        scheduler = getattr(self.canvas, 'connection_scheduler', None)
+        if scheduler is None:
+            self.update()
+        else:
+            scheduler.mark(self)
+    
+    def _mark_changed(self):
+        """Registra que a conexão mudou desde o último salvamento (ver models.changes)."""
+        changes = getattr(self.canvas, 'changes', None)
+        if changes is not None:
+            changes.mark(self)
+    
     def set_arrow(self, has_arrow):
         """Define se a conexão tem seta ou não."""
         self.arrow = has_arrow
-        self.canvas.itemconfig(self.line, arrow=tk.LAST if has_arrow else None)
+        self._mark_changed()
+        if self.rendered:
+            self.canvas.itemconfig(self.line, arrow=self._arrow_option())
+    
+    def _arrow_option(self):
+        """Retorna a opção arrow da linha (sem ponta de seta quando o zoom é pequeno)."""
+        if self.arrow and show_details(self.canvas):
+            return tk.LAST
+        return None
+    
+    def set_highlight(self, highlighted):
+        """Destaca (ou não) a linha da conexão selecionada."""
+        self.highlighted = highlighted
+        if self.rendered:
+            width, fill = (3, "red") if highlighted else (2, "gray")
+            self.canvas.itemconfig(self.line, width=width, fill=fill)
         
     def is_clicked(self, event_x, event_y):
         """Verifica se o ponto (event_x, event_y) está sobre a linha de conexão."""
-        # Obter as coordenadas atuais da linha
-        try:
-            coords = self.canvas.coords(self.line)
-            if not coords or len(coords) < 4:
-                return False
-                
-            x1, y1, x2, y2 = coords
-        except (IndexError, ValueError, tk.TclError):
-            return False
+        # Usar as coordenadas mantidas no modelo (sem consultar o canvas)
+        x1, y1, x2, y2 = self.coords
         
         # Caso especial: linha vertical
         if x2 - x1 == 0:
@@ -111,86 +219,50 @@ class Connection:
     
     def calculate_intersection(self, obj_from, obj_to):
         """Calcula o ponto de intersecção da linha com a borda do objeto."""
-        # Vetor da linha
-        dx = obj_to.x - obj_from.x
-        dy = obj_to.y - obj_from.y
-        
-        # Verificar se é um Container e ajustar a intersecção para considerar a barra de título
-        from .container import Container
-        title_height = getattr(obj_from, 'title_height', 0) if isinstance(obj_from, Container) else 0
-        
-        # Determinar qual borda a linha atravessa
-        if abs(dx) * obj_from.height > abs(dy) * obj_from.width:
-            # Borda esquerda ou direita
-            s = 1 if dx > 0 else -1
-            x = obj_from.x + s * obj_from.width / 2
-            slope = dy / dx if dx != 0 else float('inf')
-            y = obj_from.y + slope * (x - obj_from.x)
-            
-            # Se for um container, verificar se estamos intersectando na barra de título
-            if isinstance(obj_from, Container) and y < obj_from.y - obj_from.height/2 + title_height:
-                # Ajustar para a borda da barra de título
-                y = obj_from.y - obj_from.height/2 + title_height
-                if dx != 0:
-                    x = obj_from.x + (y - obj_from.y) / slope
-        else:
-            # Borda superior ou inferior
-            s = 1 if dy > 0 else -1
-            
-            # Se for um container e estamos saindo pela borda superior, considerar a barra de título
-            if isinstance(obj_from, Container) and s < 0:
-                y = obj_from.y - obj_from.height/2 + title_height
-            else:
-                y = obj_from.y + s * obj_from.height / 2
-            
-            slope_inv = dx / dy if dy != 0 else float('inf')
-            x = obj_from.x + slope_inv * (y - obj_from.y)
-        
-        return x, y
+        return border_intersection(obj_from, obj_to)
+    
+    def _label_position(self, zoom=1.0):
+        """Calcula a posição do rótulo no canvas: ponto médio da linha, deslocado perpendicularmente."""
+        return label_position(*(value * zoom for value in self.coords))
     
     def create_label(self):
-        """Cria ou atualiza o texto do rótulo da conexão."""
+        """Cria, atualiza ou remove o texto do rótulo da conexão."""
+        if not self.rendered:
+            return  # O rótulo será criado junto com a linha
+        
+        # Com zoom pequeno os rótulos não são desenhados
+        if not show_details(self.canvas):
+            return
+        zoom = get_zoom(self.canvas)
+        
         try:
-            # Se já existe um rótulo, removê-lo primeiro
-            if self.text_id:
-                # Remover também o fundo do texto se existir
-                try:
-                    self.canvas.delete(f"conn_label_bg_{id(self)}")
-                    self.canvas.delete(self.text_id)
-                except tk.TclError:
-                    pass
-                
             if not self.label_text:
-                self.text_id = None
+                # Sem texto: remover o rótulo, se existir
+                if self.text_id:
+                    self.canvas.delete(self.text_id)
+                    self._unregister_items(self.text_id)
+                    self.text_id = None
                 return
-                
-            # Calcular ponto médio da linha
-            coords = self.canvas.coords(self.line)
-            if not coords or len(coords) < 4:
+            
+            if self.text_id:
+                # O rótulo já existe: apenas trocar o texto e reposicionar
+                self.canvas.itemconfig(self.text_id, text=self.label_text)
+                self.canvas.coords(self.text_id, *self._label_position(zoom))
                 return
-                
-            x1, y1, x2, y2 = coords
-        except (IndexError, ValueError, tk.TclError):
+            
+            # Criar texto no canvas sem fundo para transparência
+            label_x, label_y = self._label_position(zoom)
+            self.text_id = self.canvas.create_text(
+                label_x, label_y,
+                text=self.label_text, font=scaled_font(8, zoom),
+                fill="black", tags=(self.tag, self.label_tag)
+            )
+            self._register_items(self.text_id)
+            
+            # Garantir que o texto fique acima da linha
+            self.canvas.tag_raise(self.text_id)
+        except tk.TclError:
             self.text_id = None
-            return
-        mid_x = (x1 + x2) / 2
-        mid_y = (y1 + y2) / 2
-        
-        # Pequeno deslocamento para evitar que o texto fique exatamente sobre a linha
-        angle = math.atan2(y2 - y1, x2 - x1)
-        offset = 10  # Deslocamento perpendicular à linha
-        offset_x = -offset * math.sin(angle)
-        offset_y = offset * math.cos(angle)
-        
-        # Criar texto no canvas sem fundo para transparência
-        self.text_id = self.canvas.create_text(
-            mid_x + offset_x, mid_y + offset_y,
-            text=self.label_text, font=("Arial", 8),
-            fill="black", tags=f"conn_label_{id(self)}"
-        )
-        
-        # Garantir que o texto fique acima da linha
-        self.canvas.tag_raise(self.text_id)
     
     def edit_label(self):
         """Edita o texto do rótulo da conexão."""
@@ -198,6 +270,7 @@ class Connection:
                                          initialvalue=self.label_text)
         if new_text is not None:  # Se não cancelou o diálogo
             self.label_text = new_text
+            self._mark_changed()
             self.create_label()
     
     def delete(self):
@@ -209,30 +282,87 @@ class Connection:
         if hasattr(self.obj2, 'connections') and self in self.obj2.connections:
             self.obj2.connections.remove(self)
         
-        # Remover o texto da conexão, se houver
-        if self.text_id:
-            self.canvas.delete(self.text_id)
-            
-        # Remover qualquer item de fundo do texto que possa existir
-        try:
-            self.canvas.delete(f"conn_label_bg_{id(self)}")
-        except:
-            pass
+        # Remover a linha e o rótulo do canvas
+        self.hide()
+        
+        index = getattr(self.canvas, 'connection_index', None)
+        if index is not None:
+            index.remove(self)
         
-        # Remover a linha do canvas
-        self.canvas.delete(self.line)
+        scheduler = getattr(self.canvas, 'connection_scheduler', None)
+        if scheduler is not None:
+            scheduler.discard(self)
+        
+        changes = getattr(self.canvas, 'changes', None)
+        if changes is not None:
+            changes.mark_deleted(self)
     
     def get_state(self):
         """Retorna o estado da conexão para salvamento."""
-        # Determinar os tipos dos objetos conectados
-        from .container import Container
-        obj1_type = 'container' if isinstance(self.obj1, Container) else 'box'
-        obj2_type = 'container' if isinstance(self.obj2, Container) else 'box'
-        
         return {
-            'obj1_id': id(self.obj1),
-            'obj2_id': id(self.obj2),
-            'obj1_type': obj1_type,
-            'obj2_type': obj2_type,
-            'label_text': self.label_text
-        }
\ No newline at end of file
+            'id': self.uid,
+            'obj1_id': self.obj1.uid,
+            'obj2_id': self.obj2.uid,
+            'label_text': self.label_text,
+            'arrow': self.arrow
+        }
+
+
+def border_intersection(obj_from, obj_to):
+    """Calcula o ponto em que a linha entre os centros dos objetos atravessa a borda de obj_from.
+    
+    Funciona com os elementos do Tk e com os do documento (ver models.document).
+    """
+    # Vetor da linha
+    dx = obj_to.x - obj_from.x
+    dy = obj_to.y - obj_from.y
+    
+    # Em containers, a intersecção considera a barra de título
+    is_container = obj_from.kind == 'container'
+    title_height = getattr(obj_from, 'title_height', 0) if is_container else 0
+    
+    # Determinar qual borda a linha atravessa
+    if abs(dx) * obj_from.height > abs(dy) * obj_from.width:
+        # Borda esquerda ou direita
+        s = 1 if dx > 0 else -1
+        x = obj_from.x + s * obj_from.width / 2
+        slope = dy / dx if dx != 0 else float('inf')
+        y = obj_from.y + slope * (x - obj_from.x)
+        
+        # Se for um container, verificar se estamos intersectando na barra de título
+        if is_container and y < obj_from.y - obj_from.height/2 + title_height:
+            # Ajustar para a borda da barra de título
+            y = obj_from.y - obj_from.height/2 + title_height
+            if dx != 0:
+                x = obj_from.x + (y - obj_from.y) / slope
+    else:
+        # Borda superior ou inferior
+        s = 1 if dy > 0 else -1
+        
+        # Se for um container e estamos saindo pela borda superior, considerar a barra de título
+        if is_container and s < 0:
+            y = obj_from.y - obj_from.height/2 + title_height
+        else:
+            y = obj_from.y + s * obj_from.height / 2
+        
+        slope_inv = dx / dy if dy != 0 else float('inf')
+        x = obj_from.x + slope_inv * (y - obj_from.y)
+    
+    return x, y
+
+
+def label_position(x1, y1, x2, y2):
+    """Retorna a posição do rótulo de uma linha: ponto médio, deslocado perpendicularmente."""
+    dx = x2 - x1
+    dy = y2 - y1
+    length = math.hypot(dx, dy)
+    
+    # Pequeno deslocamento para evitar que o texto fique exatamente sobre a linha
+    offset = 10  # Deslocamento perpendicular à linha
+    if length:
+        offset_x = -offset * dy / length
+        offset_y = offset * dx / length
+    else:
+        offset_x, offset_y = 0, offset
+    
+    return (x1 + x2) / 2 + offset_x, (y1 + y2) / 2 + offset_y
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Agendador que agrupa as atualizações de conexões em uma única passagem por quadro
+"""
+
+
+class ConnectionScheduler:
+    """Acumula as conexões que precisam ser redesenhadas e as atualiza uma única vez.
+    
+    Durante um arrasto, a mesma conexão pode ser marcada várias vezes por evento
+    (pela caixa, pelo container, pelos containers filhos...). As marcações são
+    guardadas em um conjunto e aplicadas no próximo ciclo ocioso do Tk (after_idle),
+    de modo que cada conexão é recalculada no máximo uma vez por passagem.
+    """
+    
+    def __init__(self, schedule=None):
+        # Função usada para agendar a próxima passagem (ex.: canvas.after_idle)
+        self.schedule = schedule
+        
+        # Conexões pendentes (dict usado como conjunto ordenado)
+        self.pending = {}
+        self._scheduled = False
+    
+    def mark(self, connection):
+        """Marca uma conexão para ser atualizada na próxima passagem."""
+        self.pending[connection] = None
+        
+        if self.schedule is None:
+            self.flush()
+        elif not self._scheduled:
+            self._scheduled = True
+            self.schedule(self.flush)
+    
+    def discard(self, connection):
+        """Remove uma conexão das pendências (ex.: após ser excluída)."""
+        self.pending.pop(connection, None)
+    
+    def clear(self):
+        """Descarta todas as pendências."""
+        self.pending.clear()
+    
+    def flush(self):
+        """Atualiza cada conexão pendente uma única vez."""
+        self._scheduled = False
+        
+        pending = self.pending
+        self.pending = {}
+        for connection in pending:
+            connection.update()
\ No newline at end of file
@@ -4,41 +4,35 @@ Modelo para containers no VisionMap
 
 import tkinter as tk
 from tkinter import simpledialog, colorchooser
-from .base import VisualElement
+from .base import VisualElement, get_zoom, show_details, scaled_font
+from .interaction import get_interaction
+from .lazy_text import lazy_text_property
 
 
 class Container(VisualElement):
     """Classe que representa um container que pode agrupar várias caixas."""
     
+    kind = 'container'
+    
+    __slots__ = ('_title', 'fill_color', 'outline_color', 'title_height', 'subtree_tag', 'boxes',
+                 'child_containers', 'parent_container', '_subtree_cache',
+                 'rect', 'title_bar', 'text_id', 'resize_handle')
+    
+    # Título exibido (pode chegar de um arquivo binário ainda não decodificado)
+    title = lazy_text_property('title')
+    
     def __init__(self, canvas, x, y, width=300, height=200, title="Novo Container", 
-                 fill_color="#F0F0F0", outline_color="#888888"):
-        super().__init__(canvas, x, y, width, height)
+                 fill_color="#F0F0F0", outline_color="#888888", uid=None):
+        super().__init__(canvas, x, y, width, height, uid)
         
         self.title = title
         self.fill_color = fill_color
         self.outline_color = outline_color
-        
-        # Criar o retângulo do container
-        self.rect = canvas.create_rectangle(
-            x - width/2, y - height/2, 
-            x + width/2, y + height/2,
-            fill=self.fill_color, outline=self.outline_color, width=2
-        )
-        
-        # Adicionar uma barra de título
         self.title_height = 25
-        self.title_bar = canvas.create_rectangle(
-            x - width/2, y - height/2,
-            x + width/2, y - height/2 + self.title_height,
-            fill="#DDDDDD", outline=self.outline_color
-        )
         
-        # Adicionar título
-        self.text_id = canvas.create_text(
-            x, y - height/2 + self.title_height/2,
-            text=title, font=("Arial", 10, "bold"),
-            fill="black"
-        )
+        # Tag compartilhada por todos os itens da subárvore deste container
+        # (os itens das caixas e containers descendentes também a recebem)
+        self.subtree_tag = f"tree_{self.uid}"
         
         # Lista de caixas dentro deste container
         self.boxes = []
@@ -49,13 +43,83 @@ class Container(VisualElement):
         # Referência ao container pai, se estiver dentro de outro container
         self.parent_container = None
         
-        # Redimensionamento
-        self.resize_handle = canvas.create_rectangle(
-            x + width/2 - 10, y + height/2 - 10,
-            x + width/2, y + height/2,
-            fill="#AAAAAA", outline=self.outline_color
+        # Subárvore calculada por get_subtree, descartada quando a hierarquia muda
+        self._subtree_cache = None
+        
+        # Itens no canvas (criados por show quando o container está visível)
+        self.rect = None
+        self.title_bar = None
+        self.text_id = None
+        self.resize_handle = None
+        self._init_items()
+    
+    def _canvas_tags(self):
+        """Retorna as tags dos itens do container: a do elemento e as das subárvores que o contêm."""
+        return (self.tag,) + tuple(container.subtree_tag for container in self._ancestor_chain())
+    
+    def _create_items(self):
+        """Cria o retângulo, a barra de título, o título e o manipulador de redimensionamento."""
+        zoom = get_zoom(self.canvas)
+        tags = self._canvas_tags()
+        
+        # Criar o retângulo do container
+        outline, line_width = ("red", 3) if self.selected else (self.outline_color, 2)
+        self.rect = self.canvas.create_rectangle(
+            *self._rect_coords(zoom),
+            fill=self.fill_color, outline=outline, width=line_width,
+            tags=tags
         )
-        self.resizing = False
+        
+        # Com zoom pequeno o container é desenhado apenas como um retângulo
+        if show_details(self.canvas):
+            # Adicionar uma barra de título
+            self.title_bar = self.canvas.create_rectangle(
+                *self._title_bar_coords(zoom),
+                fill="#DDDDDD", outline=self.outline_color, tags=tags
+            )
+            
+            # Adicionar título
+            self.text_id = self.canvas.create_text(
+                *self._title_coords(zoom),
+                text=self.title, font=scaled_font(10, zoom, "bold"),
+                fill="black", tags=tags
+            )
+            
+            # Manipulador de redimensionamento
+            self.resize_handle = self.canvas.create_rectangle(
+                *self._resize_handle_coords(zoom),
+                fill="#AAAAAA", outline=self.outline_color, tags=tags
+            )
+        
+        self._register_items(self.rect, self.title_bar, self.text_id, self.resize_handle)
+    
+    def _rect_coords(self, zoom):
+        """Coordenadas do retângulo no canvas para o zoom informado."""
+        return ((self.x - self.width/2) * zoom, (self.y - self.height/2) * zoom,
+                (self.x + self.width/2) * zoom, (self.y + self.height/2) * zoom)
+    
+    def _title_bar_coords(self, zoom):
+        """Coordenadas da barra de título no canvas para o zoom informado."""
+        return ((self.x - self.width/2) * zoom, (self.y - self.height/2) * zoom,
+                (self.x + self.width/2) * zoom, (self.y - self.height/2 + self.title_height) * zoom)
+    
+    def _title_coords(self, zoom):
+        """Posição do título no canvas para o zoom informado."""
+        return self.x * zoom, (self.y - self.height/2 + self.title_height/2) * zoom
+    
+    def _resize_handle_coords(self, zoom):
+        """Coordenadas do manipulador de redimensionamento no canvas para o zoom informado."""
+        return ((self.x + self.width/2 - 10) * zoom, (self.y + self.height/2 - 10) * zoom,
+                (self.x + self.width/2) * zoom, (self.y + self.height/2) * zoom)
+    
+    def _delete_items(self):
+        """Remove os itens do container do canvas (os das caixas e containers filhos permanecem)."""
+        self.canvas.delete(self.tag)
+        self._unregister_items(self.rect, self.title_bar, self.text_id, self.resize_handle)
+        self.rect = None
+        self.title_bar = None
+        self.text_id = None
+        self.resize_handle = None
     
     def update(self):
         """Atualiza o container para ajustar seu tamanho aos elementos contidos."""
@@ -85,118 +149,38 @@ class Container(VisualElement):
         dx = x - self.x
         dy = y - self.y
         
-        # Mover os elementos visuais do container
-        self.canvas.move(self.rect, dx, dy)
-        self.canvas.move(self.title_bar, dx, dy)
-        self.canvas.move(self.text_id, dx, dy)
-        self.canvas.move(self.resize_handle, dx, dy)
+        # Todos os itens da subárvore (container, caixas, anotações e containers
+        # descendentes) têm a tag da subárvore: uma única chamada move tudo no canvas
+        zoom = get_zoom(self.canvas)
+        self.canvas.move(self.subtree_tag, dx * zoom, dy * zoom)
         
-        # Atualizar as coordenadas
-        self.x = x
-        self.y = y
+        # Deslocar a geometria da subárvore de uma vez no armazenamento colunar
+        subtree = self.get_subtree()
+        self._geometry.translate([element._slot for element in subtree], dx, dy)
         
-        # Mover todas as caixas dentro do container
-        for box in self.boxes:
-            # Atualizar as coordenadas da caixa
-            box.x += dx
-            box.y += dy
-            
-            # Mover os elementos visuais da caixa
-            self.canvas.move(box.rect, dx, dy)
-            self.canvas.move(box.text_id, dx, dy)
-            
-            # Se for uma caixa de anotação, mover os elementos adicionais
-            from .note_box import NoteBox
-            if isinstance(box, NoteBox):
-                self.canvas.move(box.toggle_button, dx, dy)
-                self.canvas.move(box.toggle_symbol, dx, dy)
-            
-            # Atualizar todas as conexões da caixa
-            for connection in box.connections:
-                connection.update()
-        
-        # Mover todos os containers filhos
-        if hasattr(self, 'child_containers') and self.child_containers:
-            # Criar um conjunto para rastrear os containers já processados
-            processed = set()
-            processed.add(self)
+        for element in subtree:
+            element._update_index()
+            element._mark_changed()
             
-            for child_container in list(self.child_containers):
-                # Verificações de segurança para evitar recursão infinita
-                if child_container is None or child_container == self or id(child_container) in processed:
-                    continue
-                    
-                # Marcar este container como processado
-                processed.add(id(child_container))
-                
-                # Usar move_to para mover recursivamente containers filhos
-                new_x = child_container.x + dx
-                new_y = child_container.y + dy
-                
-                # Mover elementos visuais do container filho diretamente
-                child_container.canvas.move(child_container.rect, dx, dy)
-                child_container.canvas.move(child_container.title_bar, dx, dy)
-                child_container.canvas.move(child_container.text_id, dx, dy)
-                child_container.canvas.move(child_container.resize_handle, dx, dy)
-                
-                # Atualizar coordenadas
-                child_container.x = new_x
-                child_container.y = new_y
-                
-                # Mover as caixas dentro do container filho
-                for box in child_container.boxes:
-                    box.x += dx
-                    box.y += dy
-                    child_container.canvas.move(box.rect, dx, dy)
-                    child_container.canvas.move(box.text_id, dx, dy)
-                    
-                    # Se for uma caixa de anotação, mover os elementos adicionais
-                    from .note_box import NoteBox
-                    if isinstance(box, NoteBox):
-                        child_container.canvas.move(box.toggle_button, dx, dy)
-                        child_container.canvas.move(box.toggle_symbol, dx, dy)
-                        
-                    # Atualizar conexões da caixa
-                    for connection in box.connections:
-                        connection.update()
-                
-                # Atualizar as conexões do container filho
-                if hasattr(child_container, 'connections'):
-                    for connection in child_container.connections:
-                        connection.update()
-        
-        # Atualizar todas as conexões do próprio container
-        for connection in self.connections:
-            connection.update()
+            # As repetições são descartadas pelo agendador de conexões
+            for connection in element.connections:
+                connection.schedule_update()
         
-        # Verificar se há conexões entre containers filhos que também precisam ser atualizadas
-        self.update_all_connections()
+        # Apenas o próprio container é reavaliado: o conteúdo se move junto com ele
+        self._mark_membership_dirty()
     
     def resize_to(self, width, height):
         """Redimensiona o container para as dimensões especificadas."""
         # Atualizar as dimensões
         self.width = width
         self.height = height
+        self._update_index()
+        self._mark_membership_dirty(resized=True)
         
         # Atualizar os elementos visuais do container
-        self.canvas.coords(
-            self.rect,
-            self.x - self.width/2, self.y - self.height/2,
-            self.x + self.width/2, self.y + self.height/2
-        )
-        
-        self.canvas.coords(
-            self.title_bar,
-            self.x - self.width/2, self.y - self.height/2,
-            self.x + self.width/2, self.y - self.height/2 + self.title_height
-        )
-        
-        self.canvas.coords(
-            self.resize_handle,
-            self.x + self.width/2 - 10, self.y + self.height/2 - 10,
-            self.x + self.width/2, self.y + self.height/2
-        )
-
+        if self.rendered:
+            self._update_item_coords()
+    
     def contains_point(self, x, y):
         """Verifica se um ponto está dentro do container."""
         return (self.x - self.width/2 <= x <= self.x + self.width/2 and
@@ -215,31 +199,31 @@ class Container(VisualElement):
     def select(self, event_x, event_y):
         """Seleciona o container para movimento."""
         self.selected = True
-        self.offset_x = event_x - self.x
-        self.offset_y = event_y - self.y
-        self.canvas.itemconfig(self.rect, outline="red", width=3)
+        get_interaction(self.canvas).start_drag(self, event_x, event_y)
+        if self.rendered:
+            self.canvas.itemconfig(self.rect, outline="red", width=3)
     
     def deselect(self):
         """Desseleciona o container."""
         self.selected = False
-        self.canvas.itemconfig(self.rect, outline=self.outline_color, width=2)
+        get_interaction(self.canvas).end_drag(self)
+        if self.rendered:
+            self.canvas.itemconfig(self.rect, outline=self.outline_color, width=2)
     
     def start_resize(self, event_x, event_y):
         """Inicia o redimensionamento do container."""
-        self.resizing = True
-        self.resize_start_x = event_x
-        self.resize_start_y = event_y
-        self.resize_start_width = self.width
-        self.resize_start_height = self.height
+        get_interaction(self.canvas).start_resize(self, event_x, event_y)
     
     def resize(self, event_x, event_y):
         """Redimensiona o container."""
-        if not self.resizing:
+        start = get_interaction(self.canvas).resize_start(self)
+        if start is None:
             return
         
         # Calcular novas dimensões
-        new_width = max(100, self.resize_start_width + (event_x - self.resize_start_x) * 2)
-        new_height = max(100, self.resize_start_height + (event_y - self.resize_start_y) * 2)
+        start_x, start_y, start_width, start_height = start
+        new_width = max(100, start_width + (event_x - start_x) * 2)
+        new_height = max(100, start_height + (event_y - start_y) * 2)
         
         # Atualizar as dimensões
         dx = (new_width - self.width) / 2
@@ -247,39 +231,32 @@ class Container(VisualElement):
         
         self.width = new_width
         self.height = new_height
+        self._update_index()
+        self._mark_membership_dirty(resized=True)
         
         # Atualizar os elementos visuais do container
-        self.canvas.coords(
-            self.rect,
-            self.x - self.width/2, self.y - self.height/2,
-            self.x + self.width/2, self.y + self.height/2
-        )
-        
-        self.canvas.coords(
-            self.title_bar,
-            self.x - self.width/2, self.y - self.height/2,
-            self.x + self.width/2, self.y - self.height/2 + self.title_height
-        )
-        
-        self.canvas.coords(
-            self.text_id,
-            self.x, self.y - self.height/2 + self.title_height/2
-        )
-        
-        self.canvas.coords(
-            self.resize_handle,
-            self.x + self.width/2 - 10, self.y + self.height/2 - 10,
-            self.x + self.width/2, self.y + self.height/2
-        )
+        if self.rendered:
+            self._update_item_coords()
+    
+    def _update_item_coords(self):
+        """Reposiciona os itens do container de acordo com a posição e o tamanho atuais."""
+        zoom = get_zoom(self.canvas)
+        self.canvas.coords(self.rect, *self._rect_coords(zoom))
+        
+        if self.title_bar:
+            self.canvas.coords(self.title_bar, *self._title_bar_coords(zoom))
+            self.canvas.coords(self.text_id, *self._title_coords(zoom))
+            self.canvas.coords(self.resize_handle, *self._resize_handle_coords(zoom))
     
     def end_resize(self):
         """Termina o redimensionamento."""
-        self.resizing = False
+        get_interaction(self.canvas).end_resize(self)
     
     def move(self, x, y):
         """Move o container e todas as caixas dentro dele."""
-        dx = x - self.offset_x - self.x
-        dy = y - self.offset_y - self.y
+        offset_x, offset_y = get_interaction(self.canvas).drag_offset(self)
+        dx = x - offset_x - self.x
+        dy = y - offset_y - self.y
         
         # Calcular a nova posição
         new_x = self.x + dx
@@ -290,38 +267,67 @@ class Container(VisualElement):
     
     def update_all_connections(self):
         """Atualiza todas as conexões relacionadas a este container e seus filhos."""
-        # Atualizar as conexões diretas deste container
-        for connection in self.connections:
-            connection.update()
-        
-        # Atualizar recursivamente para todos os containers filhos
-        if hasattr(self, 'child_containers') and self.child_containers:
-            processed = set([id(self)])  # Evitar loops infinitos
-            
-            for child in self.child_containers:
-                if child is not None and id(child) not in processed:
-                    processed.add(id(child))
-                    
-                    # Atualizar conexões deste container filho
-                    if hasattr(child, 'connections'):
-                        for connection in child.connections:
-                            connection.update()
-                            
-                    # Procurar recursivamente em níveis mais profundos
-                    if hasattr(child, 'update_all_connections'):
-                        child.update_all_connections()
+        for element in self.get_subtree():
+            if isinstance(element, Container):
+                for connection in element.connections:
+                    connection.schedule_update()
+    
+    def get_subtree(self):
+        """Retorna o container, seus containers descendentes e as caixas de todos eles, uma vez cada."""
+        if self._subtree_cache is not None:
+            return self._subtree_cache
+        
+        subtree = [self]
+        visited = {self}
+        stack = [self]
+        while stack:
+            current = stack.pop()
+            subtree.extend(current.boxes)
+            for child in current.child_containers:
+                if child not in visited:  # Proteção contra ciclos
+                    visited.add(child)
+                    subtree.append(child)
+                    stack.append(child)
+        
+        self._subtree_cache = subtree
+        return subtree
+    
+    def _invalidate_subtree(self):
+        """Descarta a subárvore em cache deste container e de todos os seus ancestrais."""
+        for container in self._ancestor_chain():
+            container._subtree_cache = None
+    
+    def _ancestor_chain(self):
+        """Retorna o container e seus ancestrais, do mais interno para o mais externo."""
+        chain = []
+        current = self
+        while current is not None and current not in chain:
+            chain.append(current)
+            current = current.parent_container
+        return chain
     
     def add_box(self, box):
         """Adiciona uma caixa ao container."""
         if box not in self.boxes:
             self.boxes.append(box)
             box.container = self  # Definir a referência do container na caixa
+            box._mark_changed()
+            self._invalidate_subtree()
+            
+            # Os itens da caixa passam a fazer parte das subárvores deste container e dos ancestrais
+            for container in self._ancestor_chain():
+                self.canvas.addtag_withtag(container.subtree_tag, box.tag)
     
     def remove_box(self, box):
         """Remove uma caixa do container."""
         if box in self.boxes:
             self.boxes.remove(box)
             box.container = None  # Remover a referência do container na caixa
+            box._mark_changed()
+            self._invalidate_subtree()
+            
+            for container in self._ancestor_chain():
+                self.canvas.dtag(box.tag, container.subtree_tag)
     
     def contains_box(self, box):
         """Verifica se uma caixa está totalmente dentro do container."""
@@ -393,6 +399,12 @@ class Container(VisualElement):
         
         # Define a referência ao container pai
         container.parent_container = self
+        container._mark_changed()
+        self._invalidate_subtree()
+        
+        # Toda a subárvore do filho passa a fazer parte das subárvores deste container e dos ancestrais
+        for ancestor in self._ancestor_chain():
+            self.canvas.addtag_withtag(ancestor.subtree_tag, container.subtree_tag)
         
         # Debug na console
         print(f"Container '{container.title}' adicionado como filho de '{self.title}'")
@@ -406,8 +418,13 @@ class Container(VisualElement):
             return
             
         if container in self.child_containers:
+            for ancestor in self._ancestor_chain():
+                self.canvas.dtag(container.subtree_tag, ancestor.subtree_tag)
+            
             self.child_containers.remove(container)
             container.parent_container = None  # Remover a referência ao container pai
+            container._mark_changed()
+            self._invalidate_subtree()
             
             # Debug na console
             print(f"Container '{container.title}' removido como filho de '{self.title}'")
@@ -417,22 +434,24 @@ class Container(VisualElement):
         new_title = simpledialog.askstring("Editar Título", "Digite o novo título:", initialvalue=self.title)
         if new_title:
             self.title = new_title
-            self.canvas.itemconfig(self.text_id, text=new_title)
+            self._mark_changed()
+            if self.text_id:
+                self.canvas.itemconfig(self.text_id, text=new_title)
     
     def change_color(self):
         """Muda a cor do container usando um seletor de cores."""
         color = colorchooser.askcolor(initialcolor=self.fill_color, title="Escolha a cor do container")
         if color[1]:  # Se uma cor foi selecionada (não foi cancelado)
             self.fill_color = color[1]
-            self.canvas.itemconfig(self.rect, fill=self.fill_color)
+            self._mark_changed()
+            if self.rendered:
+                self.canvas.itemconfig(self.rect, fill=self.fill_color)
     
     def bring_to_front(self):
         """Traz o container para a frente (topo das camadas)."""
         # Trazer todos os elementos visuais do container para a frente
-        self.canvas.tag_raise(self.rect)
-        self.canvas.tag_raise(self.title_bar)
-        self.canvas.tag_raise(self.text_id)
-        self.canvas.tag_raise(self.resize_handle)
+        self.canvas.tag_raise(self.tag)
+        super().bring_to_front()
         
         # Opcionalmente, trazer também as caixas contidas nele para a frente
         for box in self.boxes:
@@ -446,12 +465,12 @@ class Container(VisualElement):
             box.bring_to_front()
             
         # Depois os elementos do container
-        self.canvas.tag_lower(self.rect)
-        self.canvas.tag_lower(self.title_bar)
-        
-        # Manter o texto e o manipulador de redimensionamento acima para serem visíveis
-        self.canvas.tag_raise(self.text_id)
-        self.canvas.tag_raise(self.resize_handle)
+        self.canvas.tag_lower(self.tag)
+        if self.text_id:
+            # Manter o texto e o manipulador de redimensionamento acima para serem visíveis
+            self.canvas.tag_raise(self.text_id)
+            self.canvas.tag_raise(self.resize_handle)
+        super().send_to_back()
     
     def delete(self):
         """Remove o container do canvas."""
@@ -459,31 +478,37 @@ class Container(VisualElement):
         for conn in list(self.connections):  # Criar uma cópia da lista para iterar
             conn.delete()
         
+        # Se este container tem um pai, removê-lo da lista de filhos do pai
+        # (isso também retira as tags dos ancestrais dos itens da subárvore)
+        if self.parent_container:
+            self.parent_container.remove_child_container(self)
+        
+        # Retirar a tag desta subárvore dos itens dos descendentes
+        self.canvas.dtag(self.subtree_tag, self.subtree_tag)
+        
         # Remover a referência de container de todas as caixas dentro dele
         for box in list(self.boxes):  # Usar uma cópia para evitar problemas durante a iteração
             box.container = None
+            box._mark_membership_dirty()  # Pode pertencer ao container de fora
         
         # Remover a referência de container pai de todos os containers filhos
         for child_container in list(self.child_containers):
             child_container.parent_container = None
-        
-        # Se este container tem um pai, removê-lo da lista de filhos do pai
-        if self.parent_container:
-            self.parent_container.remove_child_container(self)
+            child_container._mark_membership_dirty()
         
         # Limpar a lista de caixas e containers filhos
         self.boxes.clear()
         self.child_containers.clear()
+        self._subtree_cache = None
         
         # Remover os elementos visuais do container
-        self.canvas.delete(self.rect)
-        self.canvas.delete(self.title_bar)
-        self.canvas.delete(self.text_id)
-        self.canvas.delete(self.resize_handle)
+        self.hide()
+        self._remove_from_index()
     
     def get_state(self):
         """Retorna o estado do container para salvamento."""
         return {
+            'id': self.uid,
             'x': self.x,
             'y': self.y,
             'width': self.width,
@@ -492,7 +517,7 @@ class Container(VisualElement):
             'fill_color': self.fill_color,
             'outline_color': self.outline_color,
             'type': 'container',
-            'parent_container_id': id(self.parent_container) if self.parent_container else None
+            'parent_container_id': self.parent_container.uid if self.parent_container else None
         }
     
     @classmethod
@@ -505,7 +530,8 @@ class Container(VisualElement):
             state.get('height', 200),
             state.get('title', 'Novo Container'),
             state.get('fill_color', "#F0F0F0"),
-            state.get('outline_color', "#888888")
+            state.get('outline_color', "#888888"),
+            state.get('id')
         )
         
         # A vinculação ao container pai será feita posteriormente pelo método open_from_file
@@ -0,0 +1,363 @@
+"""
+Documento do VisionMap independente do Tk (caixas, anotações, containers e conexões como dados)
+"""
+
+from ..utils.geometry_store import GeometryStore, GeometryView
+from .base import element_id
+from .lazy_text import lazy_text_property
+
+
+class NodeData(GeometryView):
+    """Caixa ou anotação do documento, sem itens no canvas."""
+    
+    __slots__ = ('uid', '_geometry', '_slot', '_text', 'fill_color', 'outline_color', 'kind',
+                 '_full_text', 'container', 'connections')
+    
+    # Textos que podem chegar de um arquivo binário ainda não decodificados
+    text = lazy_text_property('text')
+    full_text = lazy_text_property('full_text')
+    
+    def __init__(self, x, y, text="Novo Item", width=100, height=50,
+                 fill_color="lightblue", outline_color="#CCCCCC", kind='box', full_text=None,
+                 store=None, uid=None):
+        self.uid = element_id(uid)
+        (GeometryStore() if store is None else store).attach(self, x, y, width, height)
+        self.text = text
+        self.fill_color = fill_color
+        self.outline_color = outline_color
+        
+        # 'box' ou 'note' (mesmo valor do atributo kind das classes do Tk)
+        self.kind = kind
+        
+        # Texto completo das anotações
+        self.full_text = text if full_text is None and kind == 'note' else full_text
+        
+        # Container pai, se houver
+        self.container = None
+        
+        self.connections = []
+    
+    def get_bounds(self):
+        """Retorna a caixa delimitadora (x1, y1, x2, y2) do nó."""
+        return (self.x - self.width/2, self.y - self.height/2,
+                self.x + self.width/2, self.y + self.height/2)
+    
+    def move_to(self, x, y):
+        """Move o nó para coordenadas absolutas."""
+        self.x = x
+        self.y = y
+    
+    def get_state(self):
+        """Retorna o estado do nó no mesmo formato de VisionMapBox.get_state."""
+        state = {
+            'id': self.uid,
+            'x': self.x,
+            'y': self.y,
+            'width': self.width,
+            'height': self.height,
+            'text': self.text,
+            'fill_color': self.fill_color,
+            'outline_color': self.outline_color,
+            'container_id': self.container.uid if self.container else None
+        }
+        if self.kind == 'note':
+            state.update({
+                'full_text': self._full_text,
+                'type': 'note'
+            })
+        return state
+
+
+class ContainerData(GeometryView):
+    """Container do documento, com a hierarquia de caixas e containers filhos."""
+    
+    kind = 'container'
+    
+    __slots__ = ('uid', '_geometry', '_slot', '_title', 'fill_color', 'outline_color', 'title_height',
+                 'boxes', 'child_containers', 'parent_container', 'connections')
+    
+    title = lazy_text_property('title')
+    
+    def __init__(self, x, y, width=300, height=200, title="Novo Container",
+                 fill_color="#F0F0F0", outline_color="#888888", store=None, uid=None):
+        self.uid = element_id(uid)
+        (GeometryStore() if store is None else store).attach(self, x, y, width, height)
+        self.title = title
+        self.fill_color = fill_color
+        self.outline_color = outline_color
+        self.title_height = 25
+        
+        self.boxes = []
+        self.child_containers = []
+        self.parent_container = None
+        
+        self.connections = []
+    
+    def get_bounds(self):
+        """Retorna a caixa delimitadora (x1, y1, x2, y2) do container."""
+        return (self.x - self.width/2, self.y - self.height/2,
+                self.x + self.width/2, self.y + self.height/2)
+    
+    def get_subtree(self):
+        """Retorna o container, seus containers descendentes e as caixas de todos eles."""
+        subtree = []
+        seen = set()
+        stack = [self]
+        while stack:
+            container = stack.pop()
+            if id(container) in seen:
+                continue
+            seen.add(id(container))
+            subtree.append(container)
+            subtree.extend(container.boxes)
+            stack.extend(reversed(container.child_containers))
+        return subtree
+    
+    def move_to(self, x, y):
+        """Move o container e todo o seu conteúdo para coordenadas absolutas."""
+        dx = x - self.x
+        dy = y - self.y
+        subtree = self.get_subtree()
+        if all(element._geometry is self._geometry for element in subtree):
+            self._geometry.translate([element._slot for element in subtree], dx, dy)
+        else:
+            for element in subtree:
+                element.x += dx
+                element.y += dy
+    
+    def fit_to_boxes(self):
+        """Ajusta posição e tamanho do container às caixas contidas (como Container.update)."""
+        if not self.boxes:
+            return
+        
+        min_x = min([box.x - box.width/2 for box in self.boxes]) - 20
+        min_y = min([box.y - box.height/2 for box in self.boxes]) - 20
+        max_x = max([box.x + box.width/2 for box in self.boxes]) + 20
+        max_y = max([box.y + box.height/2 for box in self.boxes]) + 20
+        
+        new_width = max(300, max_x - min_x)
+        new_height = max(200, max_y - min_y + self.title_height)
+        
+        self.move_to(min_x + new_width/2, min_y + new_height/2 - self.title_height/2)
+        self.width = new_width
+        self.height = new_height
+    
+    def add_box(self, box):
+        """Adiciona uma caixa ao container."""
+        # box.container aponta para o container cuja lista contém a caixa
+        if box.container is not self:
+            if box.container is not None:
+                box.container.remove_box(box)
+            self.boxes.append(box)
+            box.container = self
+    
+    def remove_box(self, box):
+        """Remove uma caixa do container."""
+        if box in self.boxes:
+            self.boxes.remove(box)
+            box.container = None
+    
+    def add_child_container(self, container):
+        """Adiciona um container filho (ignorado se criaria um ciclo)."""
+        # Só um container com filhos pode ser ancestral deste: sem filhos, a
+        # verificação de ciclo (que percorre os ancestrais) é dispensada
+        if container is self or (container.child_containers and container in self._ancestors()):
+            return
+        if container.parent_container is not self:
+            if container.parent_container is not None:
+                container.parent_container.remove_child_container(container)
+            self.child_containers.append(container)
+            container.parent_container = self
+    
+    def remove_child_container(self, container):
+        """Remove um container filho."""
+        if container in self.child_containers:
+            self.child_containers.remove(container)
+            container.parent_container = None
+    
+    def _ancestors(self):
+        """Retorna os containers que contêm este, do pai até a raiz."""
+        ancestors = []
+        parent = self.parent_container
+        while parent is not None and parent not in ancestors:
+            ancestors.append(parent)
+            parent = parent.parent_container
+        return ancestors
+    
+    def get_state(self):
+        """Retorna o estado do container no mesmo formato de Container.get_state."""
+        return {
+            'id': self.uid,
+            'x': self.x,
+            'y': self.y,
+            'width': self.width,
+            'height': self.height,
+            'title': self.title,
+            'fill_color': self.fill_color,
+            'outline_color': self.outline_color,
+            'type': 'container',
+            'parent_container_id': self.parent_container.uid if self.parent_container else None
+        }
+
+
+class EdgeData:
+    """Conexão do documento entre dois nós ou containers."""
+    
+    kind = 'connection'
+    
+    __slots__ = ('uid', 'obj1', 'obj2', 'label_text', 'arrow')
+    
+    def __init__(self, obj1, obj2, label_text="", arrow=True, uid=None):
+        self.uid = element_id(uid)
+        self.obj1 = obj1
+        self.obj2 = obj2
+        self.label_text = label_text
+        self.arrow = arrow
+        
+        obj1.connections.append(self)
+        obj2.connections.append(self)
+    
+    def set_arrow(self, has_arrow):
+        """Define se a conexão tem seta ou não."""
+        self.arrow = has_arrow
+    
+    def get_state(self):
+        """Retorna o estado da conexão no mesmo formato de Connection.get_state."""
+        return {
+            'id': self.uid,
+            'obj1_id': self.obj1.uid,
+            'obj2_id': self.obj2.uid,
+            'label_text': self.label_text,
+            'arrow': self.arrow
+        }
+
+
+class Document:
+    """Mapa completo como dados puros, sem depender de um canvas ou de uma janela do Tk.
+    
+    É o resultado da leitura de arquivos e da importação de Mermaid. Os nós,
+    containers e conexões têm os mesmos atributos usados pelas classes do Tk
+    (x, y, text, container, boxes, obj1...), de modo que salvamento e exportação
+    funcionam com qualquer um dos dois. Para edição interativa, build_view cria os
+    elementos do Tk correspondentes em um canvas.
+    """
+    
+    def __init__(self):
+        self.boxes = []
+        self.containers = []
+        self.connections = []
+        
+        # Identificador estável -> nó, container ou conexão
+        self.elements = {}
+        
+        # Geometria de todos os nós e containers do documento
+        self.geometry_store = GeometryStore()
+    
+    def get(self, uid):
+        """Retorna o elemento com o identificador informado, ou None."""
+        return self.elements.get(uid)
+    
+    def add_box(self, x, y, text="Novo Item", width=100, height=50,
+                fill_color="lightblue", outline_color="#CCCCCC", uid=None):
+        """Cria e adiciona uma caixa ao documento."""
+        box = NodeData(x, y, text, width, height, fill_color, outline_color,
+                       store=self.geometry_store, uid=uid)
+        self.boxes.append(box)
+        self.elements[box.uid] = box
+        return box
+    
+    def add_note(self, x, y, text="Nova Anotação", width=150, height=80,
+                 fill_color="#FFFFD0", outline_color="#CCCCCC", full_text=None, uid=None):
+        """Cria e adiciona uma anotação ao documento."""
+        note = NodeData(x, y, text, width, height, fill_color, outline_color,
+                        kind='note', full_text=full_text, store=self.geometry_store, uid=uid)
+        self.boxes.append(note)
+        self.elements[note.uid] = note
+        return note
+    
+    def add_container(self, x, y, width=300, height=200, title="Novo Container",
+                      fill_color="#F0F0F0", outline_color="#888888", uid=None):
+        """Cria e adiciona um container ao documento."""
+        container = ContainerData(x, y, width, height, title, fill_color, outline_color,
+                                  store=self.geometry_store, uid=uid)
+        self.containers.append(container)
+        self.elements[container.uid] = container
+        return container
+    
+    def add_connection(self, obj1, obj2, label_text="", arrow=True, uid=None):
+        """Cria e adiciona uma conexão ao documento."""
+        connection = EdgeData(obj1, obj2, label_text, arrow, uid)
+        self.connections.append(connection)
+        self.elements[connection.uid] = connection
+        return connection
+    
+    def as_lists(self):
+        """Retorna as listas (caixas, containers, conexões) do documento."""
+        return self.boxes, self.containers, self.connections
+    
+    def build_view(self, canvas):
+        """Cria no canvas os elementos do Tk do documento e retorna as listas (caixas, containers, conexões)."""
+        # Identificador estável -> elemento do Tk (o mesmo identificador do documento)
+        views = {}
+        
+        # Os containers pais são criados antes dos filhos, mas a lista mantém a ordem do documento
+        for data in containers_parents_first(self.containers):
+            create_view(canvas, data, views)
+        containers = [views[data.uid] for data in self.containers]
+        
+        boxes = [create_view(canvas, data, views) for data in self.boxes]
+        connections = [create_view(canvas, data, views) for data in self.connections]
+        return boxes, containers, connections
+
+
+def containers_parents_first(containers):
+    """Retorna os containers ordenados de modo que cada pai venha antes dos seus filhos."""
+    ordered = []
+    seen = set()
+    for container in containers:
+        # Subir pela cadeia de pais ainda não visitados e incluí-los de cima para baixo
+        chain = []
+        current = container
+        while current is not None and current.uid not in seen:
+            seen.add(current.uid)
+            chain.append(current)
+            current = current.parent_container
+        ordered.extend(reversed(chain))
+    return ordered
+
+
+def create_view(canvas, data, views):
+    """Cria no canvas o elemento do Tk correspondente a um elemento do documento.
+    
+    O container pai e as extremidades das conexões já devem estar em views
+    (identificador -> elemento do Tk), que recebe o novo elemento. Textos ainda não
+    decodificados (LazyText) são repassados como estão.
+    """
+    from .box import VisionMapBox
+    from .note_box import NoteBox
+    from .container import Container
+    from .connection import Connection
+    
+    if data.kind == 'container':
+        view = Container(canvas, data.x, data.y, data.width, data.height,
+                         data._title, data.fill_color, data.outline_color, data.uid)
+        if data.parent_container is not None:
+            views[data.parent_container.uid].add_child_container(view)
+    elif data.kind == 'connection':
+        view = Connection(canvas, views[data.obj1.uid], views[data.obj2.uid], data.label_text, data.uid)
+        if not data.arrow:
+            view.set_arrow(False)
+    else:
+        if data.kind == 'note':
+            view = NoteBox(canvas, data.x, data.y, data._text, data.width, data.height,
+                           data.fill_color, data.outline_color, data.uid)
+            if data._full_text is not None:
+                view.full_text = data._full_text
+        else:
+            view = VisionMapBox(canvas, data.x, data.y, data._text, data.width, data.height,
+                                data.fill_color, data.outline_color, data.uid)
+        if data.container is not None:
+            views[data.container.uid].add_box(view)
+    
+    views[data.uid] = view
+    return view
\ No newline at end of file
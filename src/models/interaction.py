@@ -0,0 +1,80 @@
+"""
+Estado transitório das interações (arrasto, redimensionamento e anotações expandidas)
+"""
+
+
+class InteractionController:
+    """Guarda o estado das interações em andamento, compartilhado por todos os elementos do canvas.
+    
+    Deslocamentos de arrasto, o ponto inicial de um redimensionamento e as janelas de
+    anotações expandidas só existem para os poucos elementos que estão sendo
+    manipulados. Mantê-los aqui, em dicionários indexados pelo elemento, evita que
+    cada um dos elementos do mapa carregue esses atributos.
+    """
+    
+    def __init__(self):
+        # elemento -> (dx, dy) entre o ponto do clique e o centro do elemento
+        self.drag_offsets = {}
+        
+        # container -> (x, y, largura, altura) no início do redimensionamento
+        self.resizes = {}
+        
+        # anotação -> (janela, widget de texto) da edição expandida
+        self.expanded_notes = {}
+    
+    def start_drag(self, element, x, y):
+        """Registra o ponto em que o elemento foi agarrado."""
+        self.drag_offsets[element] = (x - element.x, y - element.y)
+    
+    def drag_offset(self, element):
+        """Retorna o deslocamento (dx, dy) do arrasto do elemento."""
+        return self.drag_offsets.get(element, (0, 0))
+    
+    def end_drag(self, element):
+        """Esquece o deslocamento do arrasto do elemento."""
+        self.drag_offsets.pop(element, None)
+    
+    def start_resize(self, container, x, y):
+        """Registra o início do redimensionamento de um container."""
+        self.resizes[container] = (x, y, container.width, container.height)
+    
+    def resize_start(self, container):
+        """Retorna (x, y, largura, altura) do início do redimensionamento, ou None."""
+        return self.resizes.get(container)
+    
+    def end_resize(self, container):
+        """Termina o redimensionamento de um container."""
+        self.resizes.pop(container, None)
+    
+    def open_note(self, note, window, text_widget):
+        """Registra a janela de texto expandido de uma anotação."""
+        self.expanded_notes[note] = (window, text_widget)
+    
+    def note_window(self, note):
+        """Retorna (janela, widget de texto) da anotação expandida, ou (None, None)."""
+        return self.expanded_notes.get(note, (None, None))
+    
+    def close_note(self, note):
+        """Esquece a janela de texto expandido de uma anotação."""
+        self.expanded_notes.pop(note, None)
+    
+    def forget(self, element):
+        """Descarta todo o estado de interação de um elemento (ex.: após ser excluído)."""
+        self.drag_offsets.pop(element, None)
+        self.resizes.pop(element, None)
+        self.expanded_notes.pop(element, None)
+    
+    def clear(self):
+        """Descarta o estado de todas as interações (usado quando o canvas é limpo)."""
+        self.drag_offsets.clear()
+        self.resizes.clear()
+        self.expanded_notes.clear()
+
+
+def get_interaction(canvas):
+    """Retorna o controlador de interações do canvas, criando-o no primeiro uso."""
+    controller = getattr(canvas, 'interaction', None)
+    if controller is None:
+        controller = InteractionController()
+        canvas.interaction = controller
+    return controller
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Textos decodificados sob demanda (ex.: lidos da tabela de strings de um arquivo binário)
+"""
+
+
+class LazyText:
+    """Referência a um texto que ainda não foi decodificado.
+    
+    Guarda apenas a fonte (qualquer objeto com o método string(index)) e o índice
+    do texto nela. Os atributos criados por lazy_text_property decodificam o texto
+    no primeiro acesso e passam a guardar a string.
+    """
+    
+    __slots__ = ('source', 'index')
+    
+    def __init__(self, source, index):
+        self.source = source
+        self.index = index
+    
+    def resolve(self):
+        """Decodifica e retorna o texto."""
+        return self.source.string(self.index)
+
+
+def lazy_text_property(name, doc=None):
+    """Cria uma propriedade de texto guardada em '_' + name que aceita valores LazyText."""
+    attr = '_' + name
+    
+    def fget(self):
+        value = getattr(self, attr)
+        if type(value) is LazyText:
+            value = value.resolve()
+            setattr(self, attr, value)
+        return value
+    
+    def fset(self, value):
+        setattr(self, attr, value)
+    
+    return property(fget, fset, doc=doc)
+
+def text_value(value):
+    """Retorna o texto de um valor que pode ser LazyText, sem guardá-lo no elemento."""
+    return value.resolve() if type(value) is LazyText else value
+
+
+def encode_lazy_text(value):
+    """Função default dos codificadores JSON: grava o texto de um LazyText sem guardá-lo no elemento."""
+    if type(value) is LazyText:
+        return value.resolve()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
\ No newline at end of file
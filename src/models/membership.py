@@ -0,0 +1,155 @@
+"""
+Motor incremental de pertinência (caixa -> container, container -> container pai)
+"""
+
+from .container import Container
+
+
+class MembershipEngine:
+    """Mantém as relações de pertinência entre elementos e containers de forma incremental.
+    
+    Os modelos marcam como "sujos" os elementos cuja geometria mudou (move_to, move,
+    resize, resize_to). A cada passagem, apenas esses elementos são reavaliados, usando o
+    índice espacial para encontrar os containers candidatos, em vez de reconstruir
+    todas as relações do mapa.
+    """
+    
+    def __init__(self, spatial_index, schedule=None, on_change=None):
+        self.index = spatial_index
+        
+        # Função usada para agendar a próxima passagem (ex.: canvas.after_idle)
+        self.schedule = schedule
+        
+        # Chamada como on_change(elemento, pai_antigo, pai_novo) quando uma relação muda
+        self.on_change = on_change
+        
+        # elemento -> True se foi redimensionado (dict usado como conjunto ordenado)
+        self.dirty = {}
+        self._scheduled = False
+    
+    def mark_dirty(self, element, resized=False):
+        """Marca um elemento para reavaliação na próxima passagem."""
+        self.dirty[element] = self.dirty.get(element, False) or resized
+        
+        if self.schedule is not None and not self._scheduled:
+            self._scheduled = True
+            self.schedule(self.flush)
+    
+    def discard(self, element):
+        """Esquece um elemento (ex.: após ser excluído)."""
+        self.dirty.pop(element, None)
+    
+    def clear(self):
+        """Descarta todas as pendências."""
+        self.dirty.clear()
+    
+    def mark_all(self, elements):
+        """Marca vários elementos, forçando a reavaliação completa deles."""
+        for element in elements:
+            self.mark_dirty(element, resized=True)
+    
+    def flush(self):
+        """Reavalia os elementos pendentes."""
+        self._scheduled = False
+        
+        while self.dirty:
+            pending = self.dirty
+            self.dirty = {}
+            
+            # Containers primeiro, dos maiores para os menores, para que as
+            # caixas sejam avaliadas já com a hierarquia atualizada
+            containers = [element for element in pending
+                          if isinstance(element, Container) and element in self.index]
+            containers.sort(key=lambda c: c.width * c.height, reverse=True)
+            
+            for container in containers:
+                self._update_container(container, pending[container])
+            
+            for element in pending:
+                if not isinstance(element, Container) and element in self.index:
+                    self._update_box(element)
+    
+    def _find_parent(self, element, excluded=()):
+        """Retorna o container mais interno (de menor área) que contém o elemento."""
+        is_container = isinstance(element, Container)
+        best = None
+        best_area = None
+        
+        # Os dois testes de pertinência exigem que o centro esteja dentro do candidato
+        for candidate in self.index.query_point(element.x, element.y):
+            if (candidate is element or not isinstance(candidate, Container) or
+                    candidate in excluded):
+                continue
+            
+            if is_container:
+                # Um container nunca é filho de outro menor que ele (o teste de
+                # pertinência tolerante aceitaria apenas o centro dentro do candidato)
+                if candidate.width * candidate.height <= element.width * element.height:
+                    continue
+                inside = candidate.contains_container(element)
+            else:
+                inside = candidate.contains_box(element)
+            
+            if inside:
+                area = candidate.width * candidate.height
+                if best is None or area < best_area:
+                    best = candidate
+                    best_area = area
+        
+        return best
+    
+    def _subtree(self, container):
+        """Retorna o conjunto com o container, seus containers descendentes e as caixas deles."""
+        return set(container.get_subtree())
+    
+    def _set_parent(self, element, new_parent):
+        """Aplica a nova relação de pertinência, se ela mudou."""
+        if isinstance(element, Container):
+            old_parent = element.parent_container
+            if old_parent is new_parent:
+                return
+            if old_parent:
+                old_parent.remove_child_container(element)
+            if new_parent:
+                new_parent.add_child_container(element)
+        else:
+            old_parent = element.container
+            if old_parent is new_parent:
+                return
+            if old_parent:
+                old_parent.remove_box(element)
+            if new_parent:
+                new_parent.add_box(element)
+        
+        if self.on_change is not None:
+            self.on_change(element, old_parent, new_parent)
+    
+    def _update_box(self, box):
+        self._set_parent(box, self._find_parent(box))
+    
+    def _update_container(self, container, resized):
+        subtree = self._subtree(container)
+        
+        # 1. O próprio container pode ter entrado ou saído de outro container.
+        # Descendentes são excluídos para não criar ciclos
+        self._set_parent(container, self._find_parent(container, excluded=subtree))
+        
+        # 2. Se foi redimensionado, os filhos diretos podem ter ficado de fora
+        if resized:
+            for box in list(container.boxes):
+                if not container.contains_box(box):
+                    self._update_box(box)
+            for child in list(container.child_containers):
+                if not container.contains_container(child):
+                    self._set_parent(child, self._find_parent(child, excluded=self._subtree(child)))
+        
+        # 3. Elementos de fora que agora estão dentro da área do container
+        for element in self.index.query_rect(*container.get_bounds()):
+            if element in subtree:
+                continue
+            
+            if isinstance(element, Container):
+                if element.parent_container is not container and container.contains_container(element):
+                    self._set_parent(element, self._find_parent(element, excluded=self._subtree(element)))
+            elif element.container is not container and container.contains_box(element):
+                self._update_box(element)
\ No newline at end of file
@@ -3,47 +3,91 @@ Modelo para caixas de anotação no VisionMap
 """
 
 import tkinter as tk
-from tkinter import scrolledtext
+from tkinter import scrolledtext, messagebox
 from .box import VisionMapBox
+from .base import get_zoom, show_details, scaled_font
+from .interaction import get_interaction
+from .lazy_text import lazy_text_property
 
 
 class NoteBox(VisionMapBox):
     """Classe que representa uma caixa de anotação com texto expansível no visionmap."""
     
+    kind = 'note'
+    
+    __slots__ = ('_full_text', 'toggle_button', 'toggle_symbol')
+    
+    full_text = lazy_text_property('full_text')
+    
     def __init__(self, canvas, x, y, text="Nova Anotação", width=150, height=80, 
-                 fill_color="#FFFFD0", outline_color="#CCCCCC"):
-        super().__init__(canvas, x, y, text, width, height, fill_color, outline_color)
+                 fill_color="#FFFFD0", outline_color="#CCCCCC", uid=None):
+        # Estado definido antes do construtor da classe pai, que já cria os itens no canvas
+        
+        # Texto completo da anotação (a janela de texto expandido, quando aberta,
+        # fica no controlador de interações do canvas)
+        self.full_text = text
         
-        # Flag para controle da exibição do texto
-        self.text_expanded = False
+        # Botão de expansão (criado junto com os demais itens)
+        self.toggle_button = None
+        self.toggle_symbol = None
+        
+        super().__init__(canvas, x, y, text, width, height, fill_color, outline_color, uid)
+    
+    @property
+    def expanded_text_window(self):
+        """Janela de texto expandido aberta, ou None."""
+        return get_interaction(self.canvas).note_window(self)[0]
+    
+    @property
+    def text_widget(self):
+        """Widget de texto da janela expandida, ou None."""
+        return get_interaction(self.canvas).note_window(self)[1]
+    
+    @property
+    def text_expanded(self):
+        """Indica se a janela de texto expandido está aberta."""
+        return self.expanded_text_window is not None
+    
+    def _create_items(self):
+        """Cria os itens da caixa e o botão de expansão no canvas."""
+        super()._create_items()
+        
+        # Com zoom pequeno a anotação é desenhada como uma caixa simples, sem o botão
+        if not show_details(self.canvas):
+            return
+        
+        zoom = get_zoom(self.canvas)
+        tags = self._canvas_tags()
         
         # Posicionar o botão de expansão no canto superior direito
-        button_x = x + width/2 - 10  # Um pouco para dentro da borda
-        button_y = y - height/2 + 10  # Um pouco abaixo da borda superior
-        button_size = 15
+        button_x = (self.x + self.width/2 - 10) * zoom  # Um pouco para dentro da borda
+        button_y = (self.y - self.height/2 + 10) * zoom  # Um pouco abaixo da borda superior
+        button_size = 15 * zoom
         
         # Criar botão de expansão
-        self.toggle_button = canvas.create_rectangle(
+        self.toggle_button = self.canvas.create_rectangle(
             button_x - button_size/2, button_y - button_size/2,
             button_x + button_size/2, button_y + button_size/2,
-            fill="#F0F0F0", outline="#CCCCCC"
+            fill="#F0F0F0", outline="#CCCCCC", tags=tags
         )
         
-        # Símbolo "+" no botão
-        self.toggle_symbol = canvas.create_text(
+        # Símbolo "+" no botão ("−" com o texto expandido)
+        self.toggle_symbol = self.canvas.create_text(
             button_x, button_y,
-            text="+", font=("Arial", 10, "bold")
+            text="−" if self.text_expanded else "+", font=scaled_font(10, zoom, "bold"), tags=tags
         )
-        
-        # Texto completo da anotação
-        self.full_text = text
-        
-        # Caixa de texto expandida (inicialmente oculta)
-        self.expanded_text_window = None
+        self._register_items(self.toggle_button, self.toggle_symbol)
         
         # Registrar eventos do botão
-        canvas.tag_bind(self.toggle_button, "<Button-1>", self.toggle_text)
-        canvas.tag_bind(self.toggle_symbol, "<Button-1>", self.toggle_text)
+        self.canvas.tag_bind(self.toggle_button, "<Button-1>", self.toggle_text)
+        self.canvas.tag_bind(self.toggle_symbol, "<Button-1>", self.toggle_text)
+    
+    def _delete_items(self):
+        """Remove os itens da caixa e o botão de expansão do canvas."""
+        self._unregister_items(self.toggle_button, self.toggle_symbol)
+        super()._delete_items()
+        self.toggle_button = None
+        self.toggle_symbol = None
     
     def bring_to_front(self):
         """Traz a caixa de anotação para a frente (topo das camadas)."""
@@ -51,8 +95,9 @@ class NoteBox(VisionMapBox):
         super().bring_to_front()
         
         # Trazer também os elementos específicos da caixa de anotação
-        self.canvas.tag_raise(self.toggle_button)
-        self.canvas.tag_raise(self.toggle_symbol)
+        if self.toggle_button:
+            self.canvas.tag_raise(self.toggle_button)
+            self.canvas.tag_raise(self.toggle_symbol)
     
     def send_to_back(self):
         """Envia a caixa de anotação para trás (fundo das camadas)."""
@@ -61,22 +106,16 @@ class NoteBox(VisionMapBox):
         
         # Enviar também os elementos específicos da caixa de anotação para o fundo
         # Mas deixar os controles visíveis
-        self.canvas.tag_raise(self.toggle_button)
-        self.canvas.tag_raise(self.toggle_symbol)
+        if self.toggle_button:
+            self.canvas.tag_raise(self.toggle_button)
+            self.canvas.tag_raise(self.toggle_symbol)
     
     def move(self, x, y):
         """Move a caixa de anotação para uma nova posição."""
-        # Calcular o deslocamento antes de mover a caixa principal
-        dx = x - self.offset_x - self.x
-        dy = y - self.offset_y - self.y
-        
         # Mover a caixa principal usando o método da classe pai
+        # (o botão de expansão tem a tag do elemento e se move junto)
         super().move(x, y)
         
-        # Mover o botão de expansão com o mesmo deslocamento
-        self.canvas.move(self.toggle_button, dx, dy)
-        self.canvas.move(self.toggle_symbol, dx, dy)
-        
         # Se a janela expandida estiver aberta, reposicioná-la também
         if self.expanded_text_window and self.text_expanded:
             self.close_expanded_text()
@@ -94,24 +133,33 @@ class NoteBox(VisionMapBox):
         if self.expanded_text_window:
             return
         
+        # O texto pode estar no arquivo (ver utils.file_manager.NoteTextSection):
+        # lê-lo antes de criar a janela, para não deixá-la vazia se a leitura falhar
+        try:
+            full_text = self.full_text
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Anotação", f"Não foi possível ler o texto da anotação: {str(e)}")
+            return
+        
         # Calcular posição da janela de texto
         x, y = self.x + self.width/2 + 10, self.y - self.height/2
         
         # Criar uma nova janela
-        self.expanded_text_window = tk.Toplevel()
-        self.expanded_text_window.title("Anotação")
-        self.expanded_text_window.geometry(f"300x200+{int(self.canvas.winfo_rootx() + x)}+{int(self.canvas.winfo_rooty() + y)}")
+        window = tk.Toplevel()
+        window.title("Anotação")
+        window.geometry(f"300x200+{int(self.canvas.winfo_rootx() + x)}+{int(self.canvas.winfo_rooty() + y)}")
         
         # Adicionar widget de texto com scroll
-        self.text_widget = scrolledtext.ScrolledText(self.expanded_text_window, wrap=tk.WORD)
-        self.text_widget.insert(tk.INSERT, self.full_text)
-        self.text_widget.pack(expand=True, fill=tk.BOTH)
+        text_widget = scrolledtext.ScrolledText(window, wrap=tk.WORD)
+        text_widget.insert(tk.INSERT, full_text)
+        text_widget.pack(expand=True, fill=tk.BOTH)
+        get_interaction(self.canvas).open_note(self, window, text_widget)
         
         # Adicionar binding para Ctrl+S para salvar
-        self.text_widget.bind("<Control-s>", lambda event: self.save_text())
+        text_widget.bind("<Control-s>", lambda event: self.save_text())
         
         # Botão para salvar alterações
-        save_frame = tk.Frame(self.expanded_text_window)
+        save_frame = tk.Frame(window)
         save_frame.pack(fill=tk.X)
         
         save_button = tk.Button(save_frame, text="Salvar", command=self.save_text)
@@ -123,30 +171,29 @@ class NoteBox(VisionMapBox):
         apply_close_button.pack(side=tk.RIGHT, padx=5, pady=5)
         
         # Configurar evento de fechamento
-        self.expanded_text_window.protocol("WM_DELETE_WINDOW", self.close_expanded_text)
+        window.protocol("WM_DELETE_WINDOW", self.close_expanded_text)
         
         # Focar no widget de texto
-        self.text_widget.focus_set()
+        text_widget.focus_set()
         
         # Atualizar símbolo do botão
-        self.canvas.itemconfig(self.toggle_symbol, text="−")
-        
-        self.text_expanded = True
+        if self.toggle_symbol:
+            self.canvas.itemconfig(self.toggle_symbol, text="−")
     
     def close_expanded_text(self):
         """Fechar a janela de texto expandido."""
-        if self.expanded_text_window:
+        window = self.expanded_text_window
+        if window:
             # Salvar o texto antes de fechar a janela
-            if hasattr(self, 'text_widget') and self.text_widget:
+            if self.text_widget:
                 self.save_text()
             
-            self.expanded_text_window.destroy()
-            self.expanded_text_window = None
+            get_interaction(self.canvas).close_note(self)
+            window.destroy()
         
         # Restaurar o símbolo do botão
-        self.canvas.itemconfig(self.toggle_symbol, text="+")
-        
-        self.text_expanded = False
+        if self.toggle_symbol:
+            self.canvas.itemconfig(self.toggle_symbol, text="+")
     
     def save_text(self):
         """Salvar o texto editado."""
@@ -157,9 +204,11 @@ class NoteBox(VisionMapBox):
             # Atualizar o resumo na caixa
             summary = self.get_text_summary(new_text)
             self.text = summary
+            self._mark_changed()
             
             # Atualizar o texto visível no canvas
-            self.canvas.itemconfig(self.text_id, text=summary)
+            if self.text_id:
+                self.canvas.itemconfig(self.text_id, text=summary)
             
             # Forçar a atualização do canvas para mostrar o novo texto
             self.canvas.update_idletasks()
@@ -197,23 +246,18 @@ class NoteBox(VisionMapBox):
         # Fechar qualquer janela de texto expandido primeiro
         self.close_expanded_text()
         
-        # Remover elementos específicos da caixa de anotação
-        if self.toggle_button:
-            self.canvas.delete(self.toggle_button)
-            self.toggle_button = None
-        
-        if self.toggle_symbol:
-            self.canvas.delete(self.toggle_symbol)
-            self.toggle_symbol = None
-        
-        # Chamar o método delete da classe pai para remover a caixa base
+        # Chamar o método delete da classe pai (remove também o botão de expansão)
         super().delete()
     
     def get_state(self):
-        """Retorna o estado da caixa de anotação para salvamento."""
+        """Retorna o estado da caixa de anotação para salvamento.
+        
+        O texto completo ainda não lido do arquivo é repassado como LazyText (ver
+        lazy_text.encode_lazy_text), sem ser carregado na anotação.
+        """
         state = super().get_state()
         state.update({
-            'full_text': self.full_text,
+            'full_text': self._full_text,
             'type': 'note'
         })
         return state
@@ -228,7 +272,8 @@ class NoteBox(VisionMapBox):
             state.get('width', 150), 
             state.get('height', 80),
             state.get('fill_color', "#FFFFD0"),
-            state.get('outline_color', "#CCCCCC")
+            state.get('outline_color', "#CCCCCC"),
+            state.get('id')
         )
         
         if 'full_text' in state:
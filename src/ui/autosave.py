@@ -0,0 +1,166 @@
+"""
+Salvamento automático em segundo plano (captura na thread do Tk, gravação em outra thread)
+"""
+
+import os
+import queue
+import tempfile
+import threading
+import time
+
+from ..models.changes import ChangeTracker
+from ..utils.file_manager import element_record, save_visionmap_snapshot
+
+
+class AutosaveService:
+    """Salva periodicamente uma cópia do mapa sem bloquear a interface.
+    
+    Os registros dos elementos (os mesmos gravados no .vmap) ficam em cache, na
+    ordem do documento, e a cada ciclo apenas os elementos alterados desde o ciclo
+    anterior são capturados de novo, em lotes pequenos intercalados com os eventos
+    do Tk. Alterações feitas durante a captura entram no mesmo ciclo, de modo que a
+    cópia reflete um único estado do mapa. A cópia do cache entregue à thread de
+    gravação é imutável na prática: um registro alterado é substituído por outro,
+    nunca modificado. A thread serializa, comprime e grava o arquivo (temporário +
+    renomear) e informa o resultado por uma fila, lida periodicamente com root.after.
+    """
+    
+    # Intervalo entre salvamentos automáticos (ms)
+    INTERVAL = 60000
+    
+    # Elementos capturados por fatia antes de devolver o controle ao Tk
+    CAPTURE_BATCH = 2000
+    
+    # Intervalo de leitura das mensagens da thread de gravação (ms)
+    POLL_INTERVAL = 200
+    
+    def __init__(self, app, changes, interval=None):
+        self.app = app
+        self.root = app.root
+        self.interval = interval or self.INTERVAL
+        self.enabled = True
+        
+        # Uid -> registro do elemento, como na última captura
+        self.records = {}
+        
+        # Elementos a capturar no ciclo em andamento, a posição do próximo lote e os
+        # identificadores excluídos durante o ciclo
+        self._queue = []
+        self._position = 0
+        self._deleted = set()
+        
+        # Alterações desde a última captura (recebe as marcas do registro do canvas)
+        self.pending = ChangeTracker()
+        changes.listeners.append(self.pending)
+        
+        # Após abrir ou criar um mapa, todos os elementos precisam ser capturados
+        self._needs_full_capture = True
+        self._modified = False
+        self._capturing = False
+        
+        self.worker = None
+        
+        # Mensagens da thread de gravação para a barra de status
+        self.messages = queue.Queue()
+        
+        self.root.after(self.interval, self._tick)
+        self.root.after(self.POLL_INTERVAL, self._poll_messages)
+    
+    def reset(self):
+        """Descarta o cache (usado quando o canvas é limpo para abrir ou criar um mapa)."""
+        self.records = {}
+        self.pending.clear()
+        self._needs_full_capture = True
+        self._modified = False
+        
+        # Uma captura em andamento se referia ao mapa anterior
+        self._capturing = False
+    
+    def autosave_path(self):
+        """Retorna o arquivo do salvamento automático do mapa atual.
+        
+        Mapas sem título usam um arquivo por processo, para que instâncias abertas
+        ao mesmo tempo não sobrescrevam a cópia uma da outra.
+        """
+        if self.app.current_file:
+            return os.path.splitext(self.app.current_file)[0] + ".autosave.vmap"
+        return os.path.join(tempfile.gettempdir(), f"visionmap_sem_titulo_{os.getpid()}.autosave.vmap")
+    
+    def _tick(self):
+        """Inicia um ciclo de salvamento automático, se houver alterações."""
+        self.root.after(self.interval, self._tick)
+        if self.enabled:
+            self.save_now()
+    
+    def save_now(self):
+        """Captura as alterações e, se houver alguma, grava a cópia em segundo plano."""
+        # Um ciclo anterior ainda em andamento: as alterações ficam para o próximo.
+        # Durante a abertura de um arquivo, o mapa ainda está incompleto
+        if self.app.loader is not None or self._capturing or (self.worker is not None and self.worker.is_alive()):
+            return
+        
+        if self.pending:
+            self._modified = True
+        if not self._modified:
+            return
+        
+        self._queue = []
+        if self._needs_full_capture:
+            self._needs_full_capture = False
+            self.records = {}
+            self._queue = self.app.containers + self.app.boxes + self.app.connections
+        self._position = 0
+        self._deleted = set()
+        
+        self._capturing = True
+        self._capture_step()
+    
+    def _capture_step(self):
+        """Captura um lote de elementos e agenda o próximo, ou inicia a gravação ao terminar."""
+        if not self._capturing:
+            return
+        
+        # Incorporar as alterações feitas desde o lote anterior
+        records = self.records
+        for uid in self.pending.deleted:
+            records.pop(uid, None)
+        self._deleted.update(self.pending.deleted)
+        self._queue.extend(self.pending.changed)
+        self.pending.clear()
+        
+        # Um registro substituído mantém sua posição; elementos novos entram no final
+        end = min(self._position + self.CAPTURE_BATCH, len(self._queue))
+        for element in self._queue[self._position:end]:
+            if element.uid not in self._deleted:
+                records[element.uid] = element_record(element)
+        self._position = end
+        
+        if self._position < len(self._queue) or self.pending:
+            # Devolver o controle ao Tk entre os lotes (eventos de teclado e mouse)
+            self.root.after(1, self._capture_step)
+            return
+        
+        self._capturing = False
+        self._modified = False
+        self._queue = []
+        snapshot = dict(records)
+        self.worker = threading.Thread(target=self._write, args=(snapshot, self.autosave_path()), daemon=True)
+        self.worker.start()
+    
+    def _write(self, snapshot, file_path):
+        """Grava a cópia capturada (executado fora da thread do Tk)."""
+        try:
+            save_visionmap_snapshot(file_path, snapshot.values())
+        except Exception as e:
+            self.messages.put(f"Erro no salvamento automático: {e}")
+            return
+        self.messages.put(f"Salvo automaticamente em {file_path} às {time.strftime('%H:%M:%S')}")
+    
+    def _poll_messages(self):
+        """Repassa à barra de status as mensagens da thread de gravação."""
+        try:
+            while True:
+                self.app.statusbar.config(text=self.messages.get_nowait())
+        except queue.Empty:
+            pass
+        self.root.after(self.POLL_INTERVAL, self._poll_messages)
\ No newline at end of file
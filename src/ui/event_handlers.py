@@ -15,11 +15,62 @@ class EventHandlers:
     def __init__(self, app):
         self.app = app
     
+    def _model_coords(self, event):
+        """Converte a posição do evento (na janela) para coordenadas do modelo, descontando o zoom."""
+        zoom = self.app.zoom
+        return self.app.canvas.canvasx(event.x) / zoom, self.app.canvas.canvasy(event.y) / zoom
+    
+    # Métodos de localização de elementos (hit testing)
+    def _elements_at(self, canvas_x, canvas_y):
+        """Retorna as caixas e containers sob o ponto, do topo para o fundo."""
+        if self.app.hit_test_backend == "canvas":
+            return [owner for owner in self._canvas_owners_at(canvas_x, canvas_y)
+                    if not isinstance(owner, Connection)]
+        return self.app.spatial_index.query_point(canvas_x, canvas_y)
+    
+    def _canvas_owners_at(self, canvas_x, canvas_y, halo=0):
+        """Usa a árvore de itens do Tk para obter os elementos sob o ponto, do topo para o fundo."""
+        # Os itens do canvas estão em escala: converter o ponto do modelo
+        x = canvas_x * self.app.zoom
+        y = canvas_y * self.app.zoom
+        
+        # find_overlapping retorna os itens na ordem de empilhamento (do fundo para o topo)
+        item_ids = self.app.canvas.find_overlapping(x - halo, y - halo, x + halo, y + halo)
+        return self.app.item_registry.owners_of(reversed(item_ids))
+    
+    def _find_box_at(self, canvas_x, canvas_y, exclude=None):
+        """Retorna a caixa mais acima que contém o ponto, se houver."""
+        for element in self._elements_at(canvas_x, canvas_y):
+            if (not isinstance(element, Container) and element is not exclude and
+                    element.contains_point(canvas_x, canvas_y)):
+                return element
+        return None
+    
+    def _find_container_at(self, canvas_x, canvas_y, exclude=None, hit_test="contains_point"):
+        """Retorna o container mais acima cuja área (ou parte indicada) contém o ponto."""
+        for element in self._elements_at(canvas_x, canvas_y):
+            if (isinstance(element, Container) and element is not exclude and
+                    getattr(element, hit_test)(canvas_x, canvas_y)):
+                return element
+        return None
+    
+    def _find_connection_at(self, canvas_x, canvas_y):
+        """Retorna a conexão sob o ponto, testando apenas as linhas próximas."""
+        if self.app.hit_test_backend == "canvas":
+            candidates = [owner for owner in self._canvas_owners_at(canvas_x, canvas_y, halo=6)
+                          if isinstance(owner, Connection)]
+        else:
+            candidates = self.app.connection_index.query_point(canvas_x, canvas_y)
+        
+        for connection in candidates:
+            if connection.is_clicked(canvas_x, canvas_y):
+                return connection
+        return None
+    
     def on_canvas_click(self, event):
         """Manipula o evento de clique no canvas."""
         # Converter coordenadas da janela para coordenadas do canvas
-        canvas_x = self.app.canvas.canvasx(event.x)
-        canvas_y = self.app.canvas.canvasy(event.y)
+        canvas_x, canvas_y = self._model_coords(event)
         
         if self.app.mode == "add_box":
             self._add_box_click(canvas_x, canvas_y)
@@ -38,10 +89,7 @@ class EventHandlers:
         self.app.boxes.append(box)
         
         # Verificar se a caixa está dentro de algum container
-        for container in self.app.containers:
-            if container.contains_box(box):
-                container.add_box(box)
-                break
+        self.app.membership.flush()
     
     def _add_note_click(self, canvas_x, canvas_y):
         """Manipula clique no modo de adicionar anotação."""
@@ -49,10 +97,7 @@ class EventHandlers:
         self.app.boxes.append(note)
         
         # Verificar se a anotação está dentro de algum container
-        for container in self.app.containers:
-            if container.contains_box(note):
-                container.add_box(note)
-                break
+        self.app.membership.flush()
     
     def _add_container_click(self, canvas_x, canvas_y):
         """Manipula clique no modo de adicionar container."""
@@ -60,9 +105,7 @@ class EventHandlers:
         self.app.containers.append(container)
         
         # Verificar se existem caixas que devem ser adicionadas ao container
-        for box in self.app.boxes:
-            if container.contains_box(box):
-                container.add_box(box)
+        self.app.membership.flush()
     
     def _select_mode_click(self, event, canvas_x, canvas_y):
         """Manipula clique no modo de seleção."""
@@ -72,34 +115,34 @@ class EventHandlers:
             self.app.clear_selection()
         
         # Verificar se clicou no manipulador de redimensionamento
-        for container in self.app.containers:
-            if container.is_on_resize_handle(canvas_x, canvas_y):
-                self.app.resizing_container = container
-                container.start_resize(canvas_x, canvas_y)
-                return
+        container = self._find_container_at(canvas_x, canvas_y, hit_test="is_on_resize_handle")
+        if container:
+            self.app.resizing_container = container
+            container.start_resize(canvas_x, canvas_y)
+            return
         
         clicked_on_item = False
         
         # Verificar clique na barra de título de container
-        for container in self.app.containers:
-            if container.is_on_title_bar(canvas_x, canvas_y):
-                self._handle_container_selection(container, ctrl_pressed, canvas_x, canvas_y)
-                clicked_on_item = True
-                return
+        container = self._find_container_at(canvas_x, canvas_y, hit_test="is_on_title_bar")
+        if container:
+            self._handle_container_selection(container, ctrl_pressed, canvas_x, canvas_y)
+            clicked_on_item = True
+            return
         
         # Verificar clique em caixa
-        for box in self.app.boxes:
-            if box.contains_point(canvas_x, canvas_y):
-                self._handle_box_selection(box, ctrl_pressed, canvas_x, canvas_y)
-                clicked_on_item = True
-                return
+        box = self._find_box_at(canvas_x, canvas_y)
+        if box:
+            self._handle_box_selection(box, ctrl_pressed, canvas_x, canvas_y)
+            clicked_on_item = True
+            return
         
         # Verificar clique em container
-        for container in self.app.containers:
-            if container.contains_point(canvas_x, canvas_y):
-                self._handle_container_selection(container, ctrl_pressed, canvas_x, canvas_y)
-                clicked_on_item = True
-                return
+        container = self._find_container_at(canvas_x, canvas_y)
+        if container:
+            self._handle_container_selection(container, ctrl_pressed, canvas_x, canvas_y)
+            clicked_on_item = True
+            return
         
         # Se não clicou em item, iniciar seleção por área
         if not clicked_on_item and not ctrl_pressed:
@@ -135,32 +178,21 @@ class EventHandlers:
     
     def _connect_mode_click(self, event, canvas_x, canvas_y):
         """Manipula clique no modo de conectar."""
-        # Primeiro tentar com caixas
-        for box in self.app.boxes:
-            if box.contains_point(canvas_x, canvas_y):
-                if not self.app.temp_connection_start:
-                    self.app.temp_connection_start = box
-                    self.app.temp_line = self.app.canvas.create_line(
-                        box.x, box.y, box.x, box.y,
-                        width=2, fill="gray", dash=(4, 4)
-                    )
-                return
-        
-        # Se não encontrou caixa, tentar com containers
-        for container in self.app.containers:
-            if container.contains_point(canvas_x, canvas_y):
-                if not self.app.temp_connection_start:
-                    self.app.temp_connection_start = container
-                    self.app.temp_line = self.app.canvas.create_line(
-                        container.x, container.y, container.x, container.y,
-                        width=2, fill="gray", dash=(4, 4)
-                    )
-                break
+        # Primeiro tentar com caixas; se não encontrar, tentar com containers
+        element = self._find_box_at(canvas_x, canvas_y) or self._find_container_at(canvas_x, canvas_y)
+        
+        if element and not self.app.temp_connection_start:
+            self.app.temp_connection_start = element
+            x = element.x * self.app.zoom
+            y = element.y * self.app.zoom
+            self.app.temp_line = self.app.canvas.create_line(
+                x, y, x, y,
+                width=2, fill="gray", dash=(4, 4)
+            )
     
     def on_canvas_drag(self, event):
         """Manipula o evento de arrastar no canvas."""
-        canvas_x = self.app.canvas.canvasx(event.x)
-        canvas_y = self.app.canvas.canvasy(event.y)
+        canvas_x, canvas_y = self._model_coords(event)
         
         if self.app.resizing_container:
             self.app.resizing_container.resize(canvas_x, canvas_y)
@@ -185,9 +217,10 @@ class EventHandlers:
         if self.app.selection_rectangle:
             self.app.canvas.delete(self.app.selection_rectangle)
         
+        zoom = self.app.zoom
         self.app.selection_rectangle = self.app.canvas.create_rectangle(
-            self.app.selection_start_x, self.app.selection_start_y,
-            canvas_x, canvas_y,
+            self.app.selection_start_x * zoom, self.app.selection_start_y * zoom,
+            canvas_x * zoom, canvas_y * zoom,
             outline="blue", width=1, dash=(5, 5)
         )
     
@@ -227,82 +260,46 @@ class EventHandlers:
         
         box.x = new_x
         box.y = new_y
+        box._update_index()
+        box._mark_membership_dirty()
         
-        self.app.canvas.move(box.rect, current_dx, current_dy)
-        self.app.canvas.move(box.text_id, current_dx, current_dy)
-        
-        if isinstance(box, NoteBox):
-            self.app.canvas.move(box.toggle_button, current_dx, current_dy)
-            self.app.canvas.move(box.toggle_symbol, current_dx, current_dy)
+        # Todos os itens da caixa (inclusive o botão das anotações) têm a tag do elemento
+        self.app.canvas.move(box.tag, current_dx * self.app.zoom, current_dy * self.app.zoom)
         
         for connection in box.connections:
-            connection.update()
+            connection.schedule_update()
     
     def _handle_single_box_move(self, canvas_x, canvas_y):
         """Manipula movimento de caixa única."""
         self.app.selected_box.move(canvas_x, canvas_y)
         
-        # Verificar se saiu de um container
-        if self.app.selected_box.container:
-            if not self.app.selected_box.container.contains_box(self.app.selected_box):
-                self.app.selected_box.container.remove_box(self.app.selected_box)
-        
-        # Verificar se entrou em um container
-        for container in self.app.containers:
-            if container.contains_box(self.app.selected_box) and self.app.selected_box.container != container:
-                if self.app.selected_box.container:
-                    self.app.selected_box.container.remove_box(self.app.selected_box)
-                container.add_box(self.app.selected_box)
-                break
+        # Verificar se saiu de um container ou entrou em outro
+        self.app.membership.flush()
     
     def _handle_single_container_move(self, canvas_x, canvas_y):
         """Manipula movimento de container único."""
-        if not hasattr(self.app.selected_container, 'child_containers'):
-            self.app.selected_container.child_containers = []
-        if not hasattr(self.app.selected_container, 'parent_container'):
-            self.app.selected_container.parent_container = None
-        
         self.app.selected_container.move(canvas_x, canvas_y)
         
-        # Verificar mudança de container pai
-        if hasattr(self.app.selected_container, 'parent_container') and self.app.selected_container.parent_container:
-            old_parent = self.app.selected_container.parent_container
-            if not old_parent.contains_container(self.app.selected_container):
-                old_parent.remove_child_container(self.app.selected_container)
-                self.app.statusbar.config(text=f"Container '{self.app.selected_container.title}' removido de '{old_parent.title}'")
-        
-        # Verificar se entrou em novo container
-        for container in self.app.containers:
-            if not hasattr(container, 'child_containers'):
-                container.child_containers = []
-                
-            if (container != self.app.selected_container and 
-                container.contains_container(self.app.selected_container) and 
-                self.app.selected_container.parent_container != container):
-                
-                if self.app.selected_container.parent_container:
-                    self.app.selected_container.parent_container.remove_child_container(self.app.selected_container)
-                
-                container.add_child_container(self.app.selected_container)
-                self.app.statusbar.config(text=f"Container '{self.app.selected_container.title}' adicionado a '{container.title}'")
-                break
+        # Verificar mudança de container pai (a barra de status é atualizada pelo motor)
+        self.app.membership.flush()
     
     def _handle_connect_drag(self, event):
         """Manipula arrastar no modo conectar."""
+        zoom = self.app.zoom
         self.app.canvas.coords(
             self.app.temp_line,
-            self.app.temp_connection_start.x, self.app.temp_connection_start.y,
-            event.x, event.y
+            self.app.temp_connection_start.x * zoom, self.app.temp_connection_start.y * zoom,
+            self.app.canvas.canvasx(event.x), self.app.canvas.canvasy(event.y)
         )
     
     def on_canvas_release(self, event):
         """Manipula o evento de soltar o botão do mouse."""
-        canvas_x = self.app.canvas.canvasx(event.x)
-        canvas_y = self.app.canvas.canvasy(event.y)
+        canvas_x, canvas_y = self._model_coords(event)
         
         if self.app.resizing_container:
             self.app.resizing_container.end_resize()
             self.app.resizing_container = None
+            self.app.membership.flush()
         elif self.app.mode == "select" and self.app.is_selecting:
             self._finish_area_selection(canvas_x, canvas_y)
         elif self.app.mode == "select" and self.app.is_moving_multiple:
@@ -318,8 +315,7 @@ class EventHandlers:
                 canvas_x, canvas_y
             )
             
-            for item in selected_items:
-                self._add_to_selection(item)
+            self.app.add_to_selection(selected_items)
             
             self.app.canvas.delete(self.app.selection_rectangle)
             self.app.selection_rectangle = None
@@ -330,6 +326,7 @@ class EventHandlers:
     
     def _finish_multiple_move(self):
         """Finaliza movimento múltiplo."""
+        self.app.membership.flush()
         self.app.is_moving_multiple = False
         self.app.initial_positions = []
         self.app.move_start_x = 0
@@ -339,22 +336,17 @@ class EventHandlers:
         """Finaliza criação de conexão."""
         connection_created = False
         
-        # Verificar conexão com caixa
-        for box in self.app.boxes:
-            if box.contains_point(event.x, event.y) and box != self.app.temp_connection_start:
-                connection = Connection(self.app.canvas, self.app.temp_connection_start, box)
-                self.app.connections.append(connection)
-                connection_created = True
-                break
-        
-        # Se não conectou com caixa, verificar container
-        if not connection_created:
-            for container in self.app.containers:
-                if container.contains_point(event.x, event.y) and container != self.app.temp_connection_start:
-                    connection = Connection(self.app.canvas, self.app.temp_connection_start, container)
-                    self.app.connections.append(connection)
-                    connection_created = True
-                    break
+        canvas_x, canvas_y = self._model_coords(event)
+        start = self.app.temp_connection_start
+        
+        # Verificar conexão com caixa e, se não houver, com container
+        target = (self._find_box_at(canvas_x, canvas_y, exclude=start) or
+                  self._find_container_at(canvas_x, canvas_y, exclude=start))
+        
+        if target:
+            connection = Connection(self.app.canvas, start, target)
+            self.app.connections.append(connection)
+            connection_created = True
         
         # Remover linha temporária
         self.app.canvas.delete(self.app.temp_line)
@@ -365,56 +357,51 @@ class EventHandlers:
     
     def on_double_click(self, event):
         """Manipula o evento de duplo clique."""
-        canvas_x = self.app.canvas.canvasx(event.x)
-        canvas_y = self.app.canvas.canvasy(event.y)
+        canvas_x, canvas_y = self._model_coords(event)
         
         if self.app.mode == "select":
             # Verificar clique em caixa
-            for box in self.app.boxes:
-                if box.contains_point(canvas_x, canvas_y):
-                    box.edit_text()
-                    return
+            box = self._find_box_at(canvas_x, canvas_y)
+            if box:
+                box.edit_text()
+                return
             
             # Verificar clique na barra de título de container
-            for container in self.app.containers:
-                if container.is_on_title_bar(canvas_x, canvas_y):
-                    container.edit_title()
-                    return
+            container = self._find_container_at(canvas_x, canvas_y, hit_test="is_on_title_bar")
+            if container:
+                container.edit_title()
+                return
     
     def on_right_click(self, event):
         """Manipula o evento de clique com o botão direito do mouse."""
-        canvas_x = self.app.canvas.canvasx(event.x)
-        canvas_y = self.app.canvas.canvasy(event.y)
+        canvas_x, canvas_y = self._model_coords(event)
         
         # Limpar seleção anterior da conexão
         if self.app.selected_connection:
-            self.app.canvas.itemconfig(self.app.selected_connection.line, width=2, fill="gray")
+            self.app.selected_connection.set_highlight(False)
             self.app.selected_connection = None
         
         clicked_on_item = False
         
         # Verificar clique em caixa
-        for box in self.app.boxes:
-            if box.contains_point(canvas_x, canvas_y):
-                self._select_box_for_context(box, canvas_x, canvas_y, event)
-                clicked_on_item = True
-                break
+        box = self._find_box_at(canvas_x, canvas_y)
+        if box:
+            self._select_box_for_context(box, canvas_x, canvas_y, event)
+            clicked_on_item = True
         
         # Verificar clique em container
         if not clicked_on_item:
-            for container in self.app.containers:
-                if container.contains_point(canvas_x, canvas_y):
-                    self._select_container_for_context(container, canvas_x, canvas_y, event)
-                    clicked_on_item = True
-                    break
+            container = self._find_container_at(canvas_x, canvas_y)
+            if container:
+                self._select_container_for_context(container, canvas_x, canvas_y, event)
+                clicked_on_item = True
         
         # Verificar clique em conexão
         if not clicked_on_item:
-            for connection in self.app.connections:
-                if connection.is_clicked(canvas_x, canvas_y):
-                    self._select_connection_for_context(connection, event)
-                    clicked_on_item = True
-                    break
+            connection = self._find_connection_at(canvas_x, canvas_y)
+            if connection:
+                self._select_connection_for_context(connection, event)
+                clicked_on_item = True
     
     def _select_box_for_context(self, box, canvas_x, canvas_y, event):
         """Seleciona caixa para menu de contexto."""
@@ -450,20 +437,13 @@ class EventHandlers:
             self.app.selected_container = None
         
         self.app.selected_connection = connection
-        self.app.canvas.itemconfig(connection.line, width=3, fill="red")
+        connection.set_highlight(True)
         self.app.connection_menu.post(event.x_root, event.y_root)
     
     # Métodos auxiliares para seleção múltipla
     def _add_to_selection(self, item):
         """Adiciona um item à seleção múltipla."""
-        if isinstance(item, Container):
-            if item not in self.app.selected_containers:
-                item.select(item.x, item.y)
-                self.app.selected_containers.append(item)
-        else:
-            if item not in self.app.selected_boxes:
-                item.select(item.x, item.y)
-                self.app.selected_boxes.append(item)
+        self.app.add_to_selection([item])
     
     def _remove_from_selection(self, item):
         """Remove um item da seleção múltipla."""
@@ -484,39 +464,14 @@ class EventHandlers:
             return item in self.app.selected_boxes
     
     def _get_selection_bounds(self, x1, y1, x2, y2):
-        """Retorna os elementos dentro do retângulo de seleção."""
-        selected_items = []
-        
-        min_x, max_x = min(x1, x2), max(x1, x2)
-        min_y, max_y = min(y1, y2), max(y1, y2)
-        
-        # Verificar caixas
-        for box in self.app.boxes:
-            box_left = box.x - box.width/2
-            box_right = box.x + box.width/2
-            box_top = box.y - box.height/2
-            box_bottom = box.y + box.height/2
-            
-            if (box_left >= min_x and box_right <= max_x and 
-                box_top >= min_y and box_bottom <= max_y):
-                selected_items.append(box)
-        
-        # Verificar containers
-        for container in self.app.containers:
-            cont_left = container.x - container.width/2
-            cont_right = container.x + container.width/2
-            cont_top = container.y - container.height/2
-            cont_bottom = container.y + container.height/2
-            
-            if (cont_left >= min_x and cont_right <= max_x and 
-                cont_top >= min_y and cont_bottom <= max_y):
-                selected_items.append(container)
-        
-        return selected_items
+        """Retorna os elementos totalmente dentro do retângulo de seleção."""
+        # Consulta por intervalo no índice espacial: só as células cobertas
+        # pelo retângulo são examinadas
+        return self.app.spatial_index.query_rect(x1, y1, x2, y2, inside=True)
     
     # Métodos para eventos de mouse wheel e pan
     def on_mouse_wheel(self, event):
-        """Permite usar a roda do mouse para mover o canvas."""
+        """Permite usar a roda do mouse para mover o canvas (Shift: horizontal) ou ajustar o zoom (Ctrl)."""
         if event.num == 4:
             direction = -1
         elif event.num == 5:
@@ -525,8 +480,13 @@ class EventHandlers:
             direction = -1 if event.delta > 0 else 1
         
         ctrl_pressed = (event.state & 4) > 0
+        shift_pressed = (event.state & 1) > 0
         
         if ctrl_pressed:
+            # Zoom centrado no ponteiro do mouse
+            factor = self.app.ZOOM_STEP if direction < 0 else 1 / self.app.ZOOM_STEP
+            self.app.set_zoom(self.app.zoom * factor, event.x, event.y)
+        elif shift_pressed:
             self.app.canvas.xview_scroll(direction, "units")
         else:
             self.app.canvas.yview_scroll(direction, "units")
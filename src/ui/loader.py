@@ -0,0 +1,111 @@
+"""
+Abertura progressiva de arquivos (elementos criados em lotes agendados com root.after)
+"""
+
+from itertools import islice
+from tkinter import messagebox
+
+from ..utils.file_manager import iter_visionmap_elements, count_visionmap_elements
+
+
+class ProgressiveLoader:
+    """Abre um .vmap em lotes, sem congelar a janela.
+    
+    Cada lote cria alguns elementos e devolve o controle ao Tk, de modo que o mapa
+    pode ser visto e navegado enquanto o restante é lido. O arquivo já vem na
+    ordem containers (pais antes dos filhos), caixas e anotações, conexões: cada
+    caixa encontra seus containers já criados e a área visível fica utilizável
+    antes do fim da leitura. O progresso aparece na barra de status e a abertura
+    pode ser cancelada, mantendo os elementos já criados. Ao terminar (ou ao ser
+    cancelado, ou em caso de erro), chama on_finish(loader, status), com status
+    "done", "cancelled" ou "error".
+    """
+    
+    # Elementos criados por lote antes de devolver o controle ao Tk
+    BATCH = 500
+    
+    # Largura da barra de progresso na barra de status (caracteres)
+    BAR_WIDTH = 20
+    
+    def __init__(self, app, file_path, on_finish):
+        self.app = app
+        self.root = app.root
+        self.file_path = file_path
+        self.on_finish = on_finish
+        
+        # Os elementos vão direto para as listas da aplicação, já utilizáveis
+        self.boxes = app.boxes
+        self.lists = {'container': app.containers, 'connection': app.connections}
+        
+        self.elements = iter_visionmap_elements(file_path, app.canvas)
+        self.loaded = 0
+        self.total = None
+        self.finished = False
+    
+    def start(self):
+        """Agenda o primeiro lote."""
+        try:
+            self.total = count_visionmap_elements(self.file_path)
+        except (OSError, ValueError):
+            # Sem estimativa, apenas a contagem é exibida; o erro (se houver) aparece na leitura
+            self.total = None
+        self._show_progress()
+        self.root.after(1, self.step)
+    
+    def step(self):
+        """Cria o próximo lote de elementos e agenda o seguinte, ou conclui a abertura."""
+        if self.finished:
+            return
+        
+        changes = self.app.changes
+        changes.recording = False
+        count = 0
+        try:
+            for element in islice(self.elements, self.BATCH):
+                self.lists.get(element.kind, self.boxes).append(element)
+                count += 1
+            
+            # Completar agora as relações que não estavam no arquivo, enquanto as
+            # marcas de alteração estão desligadas
+            self.app.membership.flush()
+        except Exception as e:
+            # Os elementos lidos antes do erro permanecem no canvas
+            self._finish("error")
+            messagebox.showerror("Erro ao Abrir", f"Não foi possível abrir o arquivo: {str(e)}")
+            return
+        finally:
+            changes.recording = True
+        
+        self.loaded += count
+        if count < self.BATCH:
+            self._finish("done")
+            return
+        
+        self._show_progress()
+        self.root.after(1, self.step)
+    
+    def cancel(self):
+        """Interrompe a abertura, mantendo os elementos já criados."""
+        if not self.finished:
+            self._finish("cancelled")
+    
+    def _finish(self, status):
+        """Fecha o arquivo e avisa a aplicação."""
+        self.finished = True
+        self.elements.close()
+        self.on_finish(self, status)
+    
+    def progress_text(self):
+        """Retorna o texto de progresso exibido na barra de status."""
+        if not self.total:
+            return f"Abrindo {self.file_path}: {self.loaded} elementos (Esc cancela)"
+        
+        fraction = min(self.loaded / self.total, 1.0)
+        filled = int(fraction * self.BAR_WIDTH)
+        bar = "█" * filled + "░" * (self.BAR_WIDTH - filled)
+        return (f"Abrindo {self.file_path}: {bar} {fraction:.0%} "
+                f"({self.loaded} de {self.total} elementos, Esc cancela)")
+    
+    def _show_progress(self):
+        """Atualiza a barra de status."""
+        self.app.statusbar.config(text=self.progress_text())
\ No newline at end of file
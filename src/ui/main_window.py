@@ -3,26 +3,50 @@ Janela principal da aplicação VisionMap Creator
 """
 
 import tkinter as tk
-from tkinter import messagebox, filedialog
+from tkinter import messagebox, filedialog, simpledialog
 import os
+import threading
 
 from ..models.box import VisionMapBox
 from ..models.note_box import NoteBox
 from ..models.container import Container
 from ..models.connection import Connection
-from ..utils.file_manager import save_visionmap_to_file, load_visionmap_from_file
-from ..utils.export_utils import export_to_mermaid, create_html_preview, show_mermaid_preview_window, export_to_image, capture_screen_to_image
+from ..models.membership import MembershipEngine
+from ..models.connection_scheduler import ConnectionScheduler
+from ..models.interaction import InteractionController
+from ..models.changes import ChangeTracker
+from ..utils.file_manager import (save_visionmap_to_file, is_legacy_visionmap_file,
+                                  is_binary_visionmap_file, append_visionmap_journal,
+                                  can_append_visionmap_journal, compact_visionmap_journal,
+                                  migrate_visionmap_file)
+from ..utils.journal import needs_compaction
+from ..utils.export_utils import create_html_preview, show_mermaid_preview_window
+from ..utils.mermaid_export import export_to_mermaid
+from ..utils.svg_export import export_to_svg
+from ..utils.png_export import export_to_png, DEFAULT_DPI
 from ..utils.import_utils import parse_mermaid_code
 from ..utils.assets import get_asset_path, asset_exists
 from ..utils.icon_utils import setup_window_icon
+from ..utils.spatial_index import SpatialIndex
+from ..utils.item_registry import CanvasItemRegistry
+from ..utils.geometry_store import GeometryStore
 from .event_handlers import EventHandlers
 from .menu_manager import MenuManager
 from .toolbar_manager import ToolbarManager
+from .selection import Selection
+from .viewport import ViewportManager
+from .autosave import AutosaveService
+from .loader import ProgressiveLoader
 
 
 class VisionMapApp:
     """Aplicativo principal de visionmap."""
     
+    # Limites e passo do zoom
+    MIN_ZOOM = 0.1
+    MAX_ZOOM = 4.0
+    ZOOM_STEP = 1.2
+    
     def __init__(self, root):
         self.root = root
         self.root.title("VisionMap Creator")
@@ -47,14 +71,21 @@ class VisionMapApp:
         self.temp_connection_start = None
         self.resizing_container = None
         
+        # Mecanismo de localização de elementos: "index" (índice espacial)
+        # ou "canvas" (find_overlapping do Tk + registro de itens)
+        self.hit_test_backend = "index"
+        
+        # Zoom da visualização (coordenadas do canvas = coordenadas do modelo * zoom)
+        self.zoom = 1.0
+        
         # Variáveis para controle de navegação do canvas
         self.panning = False
         self.pan_start_x = 0
         self.pan_start_y = 0
         
         # Seleção múltipla
-        self.selected_boxes = []  # Lista de caixas selecionadas
-        self.selected_containers = []  # Lista de containers selecionados
+        self.selected_boxes = Selection()  # Caixas selecionadas (ordem de seleção)
+        self.selected_containers = Selection()  # Containers selecionados (ordem de seleção)
         self.selection_rectangle = None  # Retângulo de seleção
         self.selection_start_x = 0
         self.selection_start_y = 0
@@ -69,14 +100,20 @@ class VisionMapApp:
         # Nome do arquivo atual
         self.current_file = None
         
+        # Salvar na variante binária colunar (mapas grandes) em vez de JSON Lines
+        self.binary_format = False
+        
+        # Ctrl+S grava apenas as alterações no diário do arquivo (salvamento incremental)
+        self.incremental_save = False
+        
+        # Abertura de arquivo em andamento (ProgressiveLoader), se houver
+        self.loader = None
+        
         # Criar a interface
         self._create_interface()
         
         # Configurar eventos
         self._setup_events()
-        
-        # Agendar verificação periódica de relacionamentos entre containers
-        self.root.after(1000, self.check_container_relationships)
     
     def _setup_icon(self):
         """Define o ícone da aplicação com múltiplas tentativas para Windows."""
@@ -176,18 +213,62 @@ class VisionMapApp:
         # Criar o canvas com barras de rolagem
         self.canvas = tk.Canvas(self.canvas_container, bg="white",
                                scrollregion=(0, 0, self.canvas_width, self.canvas_height),
-                               xscrollcommand=self.h_scrollbar.set,
-                               yscrollcommand=self.v_scrollbar.set)
+                               xscrollcommand=lambda *args: self._on_canvas_scroll(self.h_scrollbar, *args),
+                               yscrollcommand=lambda *args: self._on_canvas_scroll(self.v_scrollbar, *args))
         self.canvas.pack(fill=tk.BOTH, expand=True)
         
         # Configurar barras de rolagem para controlar o canvas
         self.h_scrollbar.config(command=self.canvas.xview)
         self.v_scrollbar.config(command=self.canvas.yview)
         
+        # Índice espacial para localizar elementos sem percorrer todas as listas.
+        # Fica associado ao canvas para que os modelos se registrem ao serem criados
+        self.spatial_index = SpatialIndex()
+        self.canvas.spatial_index = self.spatial_index
+        
+        # Geometria dos elementos em colunas contíguas (os modelos são visões sobre ela)
+        self.geometry_store = GeometryStore()
+        self.canvas.geometry_store = self.geometry_store
+        
+        # Índice de segmentos para localizar conexões pelo clique
+        self.connection_index = SpatialIndex()
+        self.canvas.connection_index = self.connection_index
+        
+        # Mapa reverso item do canvas -> elemento, usado pelo hit testing via Tk
+        self.item_registry = CanvasItemRegistry()
+        self.canvas.item_registry = self.item_registry
+        
+        # Motor incremental de pertinência: reavalia, no próximo ciclo ocioso,
+        # apenas os elementos que foram criados, movidos ou redimensionados
+        self.membership = MembershipEngine(self.spatial_index, self.canvas.after_idle,
+                                           self._on_membership_change)
+        self.canvas.membership = self.membership
+        
+        # Estado das interações em andamento (arrasto, redimensionamento, anotações abertas)
+        self.interaction = InteractionController()
+        self.canvas.interaction = self.interaction
+        
+        # Elementos alterados desde o último salvamento (para o salvamento incremental)
+        self.changes = ChangeTracker()
+        self.canvas.changes = self.changes
+        
+        # Agendador que redesenha cada conexão no máximo uma vez por quadro
+        self.connection_scheduler = ConnectionScheduler(self.canvas.after_idle)
+        self.canvas.connection_scheduler = self.connection_scheduler
+        
+        # Renderização virtualizada: com ela ativa, apenas os elementos próximos
+        # da área visível têm itens no canvas (desativada por padrão)
+        self.viewport = ViewportManager(self.canvas, self.spatial_index, self.connection_index)
+        self.canvas.viewport = self.viewport
+        self.canvas.zoom = self.zoom
+        
         # Barra de status
         self.statusbar = tk.Label(self.main_frame, text="Pronto", bd=1, relief=tk.SUNKEN, anchor=tk.W)
         self.statusbar.pack(side=tk.BOTTOM, fill=tk.X)
         
+        # Salvamento automático: captura as alterações aqui e grava em outra thread
+        self.autosave = AutosaveService(self, self.changes)
+        
         # Menu de contexto para elementos (caixas e containers)
         self.context_menu = tk.Menu(self.root, tearoff=0)
         self.context_menu.add_command(label="Trazer para frente", command=self.bring_selected_to_front)
@@ -227,11 +308,14 @@ class VisionMapApp:
         
         # Suporte para rolagem com o mouse
         self.canvas.bind("<Control-MouseWheel>", self.event_handlers.on_mouse_wheel)
+        self.canvas.bind("<Shift-MouseWheel>", self.event_handlers.on_mouse_wheel)
         self.canvas.bind("<MouseWheel>", self.event_handlers.on_mouse_wheel)
         self.canvas.bind("<Button-4>", self.event_handlers.on_mouse_wheel)
         self.canvas.bind("<Button-5>", self.event_handlers.on_mouse_wheel)
         self.canvas.bind("<Control-Button-4>", self.event_handlers.on_mouse_wheel)
         self.canvas.bind("<Control-Button-5>", self.event_handlers.on_mouse_wheel)
+        self.canvas.bind("<Shift-Button-4>", self.event_handlers.on_mouse_wheel)
+        self.canvas.bind("<Shift-Button-5>", self.event_handlers.on_mouse_wheel)
         
         # Atalhos de teclado - operações de arquivo e edição
         self.root.bind("<Delete>", self.delete_selected)
@@ -239,6 +323,12 @@ class VisionMapApp:
         self.root.bind("<Control-o>", self.open_visionmap)
         self.root.bind("<Control-n>", self.new_visionmap)
         
+        # Atalhos de zoom
+        self.root.bind("<Control-plus>", self.zoom_in)
+        self.root.bind("<Control-equal>", self.zoom_in)
+        self.root.bind("<Control-minus>", self.zoom_out)
+        self.root.bind("<Control-0>", self.reset_zoom)
+        
         # Atalhos de teclado para os modos
         self.root.bind("<a>", lambda event: self.set_select_mode())
         self.root.bind("<A>", lambda event: self.set_select_mode())
@@ -260,6 +350,9 @@ class VisionMapApp:
         # Atalhos para seleção múltipla
         self.root.bind("<Control-a>", self.select_all)
         self.root.bind("<Escape>", self.clear_selection)
+        
+        # Esc também cancela uma abertura de arquivo em andamento
+        self.root.bind("<Escape>", self.cancel_loading, add="+")
     
     # Métodos de controle de modo
     def set_select_mode(self):
@@ -319,6 +412,7 @@ class VisionMapApp:
         
         # Limpar o canvas
         self.canvas.delete("all")
+        self._clear_indexes()
         self.boxes = []
         self.containers = []
         self.connections = []
@@ -327,12 +421,125 @@ class VisionMapApp:
         self.current_file = None
         self.statusbar.config(text="Novo visionmap criado")
     
+    def set_hit_test_backend(self, backend):
+        """Define o mecanismo de localização de elementos ("index" ou "canvas")."""
+        self.hit_test_backend = backend
+        if backend == "canvas":
+            self.statusbar.config(text="Localização de elementos: itens do canvas (Tk)")
+        else:
+            self.statusbar.config(text="Localização de elementos: índice espacial")
+    
+    def _clear_indexes(self):
+        """Esvazia os índices espaciais (usado quando o canvas é limpo)."""
+        self.spatial_index.clear()
+        self.geometry_store.clear()
+        self.connection_index.clear()
+        self.item_registry.clear()
+        self.membership.clear()
+        self.connection_scheduler.clear()
+        self.interaction.clear()
+        
+        # Uma abertura em andamento se referia ao mapa anterior
+        if self.loader is not None:
+            self.loader.cancel()
+        self.changes.clear()
+        self.autosave.reset()
+        self.viewport.clear()
+    
+    def set_virtualized(self, enabled):
+        """Liga ou desliga a renderização virtualizada do canvas."""
+        self.viewport.set_enabled(enabled)
+        if enabled:
+            self.statusbar.config(text="Renderização virtualizada: apenas a área visível é desenhada")
+        else:
+            self.statusbar.config(text="Renderização completa: todos os elementos são desenhados")
+    
+    def set_binary_format(self, enabled, announce=True):
+        """Define se os próximos salvamentos usam a variante binária colunar."""
+        self.binary_format = enabled
+        self.menu_manager.binary_format_var.set(enabled)
+        if announce:
+            if enabled:
+                self.statusbar.config(text="Salvamento em formato binário (mapas grandes)")
+            else:
+                self.statusbar.config(text="Salvamento em formato texto (JSON Lines)")
+    
+    def set_autosave(self, enabled):
+        """Liga ou desliga o salvamento automático em segundo plano."""
+        self.autosave.enabled = enabled
+        if enabled:
+            self.statusbar.config(text=f"Salvamento automático ativado: {self.autosave.autosave_path()}")
+        else:
+            self.statusbar.config(text="Salvamento automático desativado")
+    
+    def set_incremental_save(self, enabled):
+        """Define se Ctrl+S grava apenas as alterações no diário do arquivo."""
+        self.incremental_save = enabled
+        self.menu_manager.incremental_save_var.set(enabled)
+        if enabled:
+            self.statusbar.config(text="Salvamento incremental: Ctrl+S grava apenas as alterações")
+        else:
+            self.statusbar.config(text="Salvamento completo: Ctrl+S grava o mapa inteiro")
+    
+    def update_scrollregion(self):
+        """Ajusta a região de rolagem ao tamanho do canvas e ao zoom atual."""
+        self.canvas.config(scrollregion=(0, 0, self.canvas_width * self.zoom, self.canvas_height * self.zoom))
+    
+    def set_zoom(self, zoom, x=None, y=None):
+        """Aplica um novo zoom, mantendo fixo o ponto (x, y) da janela (por padrão, o centro)."""
+        zoom = min(max(zoom, self.MIN_ZOOM), self.MAX_ZOOM)
+        if zoom == self.zoom:
+            return
+        
+        if x is None:
+            x = self.canvas.winfo_width() / 2
+            y = self.canvas.winfo_height() / 2
+        
+        # Ponto do modelo que está sob (x, y) antes da mudança
+        model_x = self.canvas.canvasx(x) / self.zoom
+        model_y = self.canvas.canvasy(y) / self.zoom
+        
+        self.zoom = zoom
+        self.canvas.zoom = zoom
+        self.update_scrollregion()
+        
+        # Recriar os itens na nova escala e no nível de detalhe correspondente
+        self.viewport.redraw()
+        
+        # Rolar para que o mesmo ponto do modelo continue sob (x, y)
+        self.canvas.xview_moveto((model_x * zoom - x) / (self.canvas_width * zoom))
+        self.canvas.yview_moveto((model_y * zoom - y) / (self.canvas_height * zoom))
+        
+        self.statusbar.config(text=f"Zoom: {zoom:.0%}")
+    
+    def zoom_in(self, event=None):
+        """Aumenta o zoom."""
+        self.set_zoom(self.zoom * self.ZOOM_STEP)
+    
+    def zoom_out(self, event=None):
+        """Diminui o zoom."""
+        self.set_zoom(self.zoom / self.ZOOM_STEP)
+    
+    def reset_zoom(self, event=None):
+        """Volta o zoom para 100%."""
+        self.set_zoom(1.0)
+    
+    def _on_canvas_scroll(self, scrollbar, *args):
+        """Repassa a nova posição da visualização à barra de rolagem e atualiza os itens visíveis."""
+        scrollbar.set(*args)
+        self.viewport.schedule_refresh()
+    
     def save_visionmap(self, event=None):
         """Salva o visionmap atual."""
         if not self.current_file:
             self.save_as_visionmap()
             return True
         
+        if self.incremental_save and can_append_visionmap_journal(self.current_file, self.binary_format):
+            count = self.save_incremental(self.current_file)
+            self.statusbar.config(text=f"VisionMap salvo em: {self.current_file} ({count} alterações no diário)")
+            return True
+        
         self.save_to_file(self.current_file)
         self.statusbar.config(text=f"VisionMap salvo em: {self.current_file}")
         return True
@@ -353,9 +560,33 @@ class VisionMapApp:
     
     def save_to_file(self, file_path):
         """Salva o visionmap no arquivo especificado."""
-        # Atualizar as relações entre containers antes de salvar
-        self.check_container_relationships()
-        save_visionmap_to_file(file_path, self.boxes, self.containers, self.connections)
+        # Aplicar as verificações de pertinência pendentes antes de salvar
+        self.membership.flush()
+        save_visionmap_to_file(file_path, self.boxes, self.containers, self.connections,
+                               binary=self.binary_format)
+        self.changes.clear()
+    
+    def save_incremental(self, file_path):
+        """Grava no diário do arquivo apenas os elementos alterados desde o último salvamento.
+        
+        Retorna o número de entradas gravadas. Quando o diário fica grande, ele é
+        incorporado ao arquivo principal em uma thread separada.
+        """
+        self.membership.flush()
+        changed, deleted = self.changes.take()
+        count = append_visionmap_journal(file_path, changed, deleted)
+        
+        if needs_compaction(file_path):
+            threading.Thread(target=self._compact_journal, args=(file_path,), daemon=True).start()
+        return count
+    
+    def _compact_journal(self, file_path):
+        """Incorpora o diário ao arquivo principal (executado fora da thread do Tk)."""
+        try:
+            compact_visionmap_journal(file_path)
+        except Exception as e:
+            # O arquivo principal só é substituído no final: o diário continua valendo
+            print(f"Erro ao compactar o diário de {file_path}: {e}")
     
     def open_visionmap(self, event=None):
         """Abre um arquivo de visionmap existente."""
@@ -372,25 +603,73 @@ class VisionMapApp:
         self.open_from_file(file_path)
     
     def open_from_file(self, file_path):
-        """Abre um visionmap a partir do arquivo especificado."""
+        """Abre um visionmap a partir do arquivo especificado.
+        
+        Os elementos são criados em lotes (ver ProgressiveLoader): a janela continua
+        respondendo e o progresso aparece na barra de status. Arquivos no formato
+        antigo só são abertos depois de convertidos, com a confirmação do usuário.
+        """
+        if is_legacy_visionmap_file(file_path) and not self._migrate_legacy_file(file_path):
+            return
+        
         # Limpar o canvas atual
         self.canvas.delete("all")
+        self._clear_indexes()
         self.boxes = []
         self.containers = []
         self.connections = []
         
-        # Carregar dados
-        self.boxes, self.containers, self.connections = load_visionmap_from_file(file_path, self.canvas)
+        # O arquivo só é associado ao mapa quando a leitura termina
+        self.current_file = None
+        
+        self.loader = ProgressiveLoader(self, file_path, self._finish_loading)
+        self.loader.start()
+    
+    def _migrate_legacy_file(self, file_path):
+        """Converte um arquivo no formato antigo antes de abri-lo. Retorna False se não foi convertido."""
+        if not messagebox.askyesno("Abrir VisionMap",
+                                   "Este arquivo está no formato antigo e precisa ser convertido para ser aberto.\n"
+                                   "O arquivo original será mantido com a extensão .bak.\n\n"
+                                   "Deseja converter o arquivo agora?"):
+            self.statusbar.config(text="Abertura cancelada: o arquivo no formato antigo não foi convertido")
+            return False
+        
+        try:
+            migrate_visionmap_file(file_path)
+        except Exception as e:
+            messagebox.showerror("Erro ao Abrir", f"Não foi possível converter o arquivo "
+                                                  f"(o original não foi alterado): {str(e)}")
+            return False
+        return True
+    
+    def cancel_loading(self, event=None):
+        """Cancela a abertura em andamento, mantendo os elementos já criados."""
+        if self.loader is not None:
+            self.loader.cancel()
+    
+    def _finish_loading(self, loader, status):
+        """Conclui a abertura de um arquivo (chamado pelo ProgressiveLoader)."""
+        self.loader = None
+        file_path = loader.file_path
         
-        if self.boxes or self.containers:
+        if status == "cancelled":
+            # Um mapa parcial não pode ser salvo por cima do arquivo original
+            self.statusbar.config(text=f"Abertura cancelada: {loader.loaded} elementos carregados "
+                                       f"(o mapa parcial não está associado ao arquivo)")
+            return
+        
+        if status == "done" and (self.boxes or self.containers):
             self.current_file = file_path
+            
+            # Manter o formato do arquivo ao salvar novamente
+            self.set_binary_format(is_binary_visionmap_file(file_path), announce=False)
             self.statusbar.config(text=f"VisionMap aberto de: {file_path}")
         else:
             self.statusbar.config(text="Erro ao abrir o arquivo")
     
     # Métodos de exportação
     def export_image(self):
-        """Exporta o visionmap como uma imagem."""
+        """Exporta o visionmap como PNG, desenhado a partir dos elementos (mapa inteiro, sem o canvas)."""
         file_path = filedialog.asksaveasfilename(
             defaultextension=".png",
             filetypes=[("PNG files", "*.png"), ("All files", "*.*")]
@@ -398,21 +677,42 @@ class VisionMapApp:
         if not file_path:
             return
         
-        if export_to_image(self.canvas, self.boxes, self.containers, file_path):
-            self.statusbar.config(text=f"Imagem exportada para: {file_path}")
-        else:
-            # Tentar captura de tela como alternativa
-            messagebox.showinfo(
-                "Exportar Imagem", 
-                "Para exportar a imagem, a tela será capturada em 3 segundos.\n"
-                "Por favor, não mova a janela."
-            )
-            self.root.after(3000, lambda: self._capture_screen(file_path))
-    
-    def _capture_screen(self, file_path):
-        """Captura a tela para exportar como imagem."""
-        if capture_screen_to_image(self.root, self.canvas, file_path):
-            self.statusbar.config(text=f"Imagem capturada e salva em: {file_path}")
+        # Com a resolução da tela (96 DPI), um pixel por unidade do mapa
+        dpi = simpledialog.askinteger("Exportar Imagem", "Resolução da imagem (DPI):",
+                                      initialvalue=DEFAULT_DPI, minvalue=24, maxvalue=1200)
+        if not dpi:
+            return
+        
+        self.statusbar.config(text="Exportando imagem...")
+        self.root.update_idletasks()
+        try:
+            # Aplicar as verificações de pertinência pendentes (títulos e hierarquia atualizados)
+            self.membership.flush()
+            width, height = export_to_png(self.boxes, self.containers, self.connections, file_path, dpi=dpi)
+            self.statusbar.config(text=f"Imagem exportada para: {file_path} ({width}x{height} pixels)")
+        except ImportError:
+            self.statusbar.config(text="Erro ao exportar a imagem")
+            messagebox.showerror("Erro ao Exportar", "A exportação de imagem requer o Pillow (pip install pillow).")
+        except Exception as e:
+            self.statusbar.config(text="Erro ao exportar a imagem")
+            messagebox.showerror("Erro ao Exportar", f"Não foi possível exportar a imagem: {str(e)}")
+    
+    def export_svg(self):
+        """Exporta o visionmap como SVG, gerado a partir dos elementos (mapa inteiro, sem o canvas)."""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".svg",
+            filetypes=[("SVG files", "*.svg"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        try:
+            # Aplicar as verificações de pertinência pendentes (títulos e hierarquia atualizados)
+            self.membership.flush()
+            export_to_svg(self.boxes, self.containers, self.connections, file_path)
+            self.statusbar.config(text=f"Diagrama exportado como SVG para: {file_path}")
+        except Exception as e:
+            messagebox.showerror("Erro ao Exportar", f"Não foi possível exportar como SVG: {str(e)}")
     
     def export_mermaid(self):
         """Exporta o visionmap como código Mermaid."""
@@ -490,6 +790,7 @@ class VisionMapApp:
             
             # Limpar o canvas
             self.canvas.delete("all")
+            self._clear_indexes()
             self.boxes = []
             self.containers = []
             self.connections = []
@@ -526,8 +827,8 @@ class VisionMapApp:
                 if container in self.containers:
                     self.containers.remove(container)
             
-            self.selected_boxes = []
-            self.selected_containers = []
+            self.selected_boxes.clear()
+            self.selected_containers.clear()
             self.statusbar.config(text="Elementos selecionados excluídos")
             
         elif self.selected_box:
@@ -555,7 +856,7 @@ class VisionMapApp:
         """Edita o rótulo da conexão selecionada."""
         if self.selected_connection:
             self.selected_connection.edit_label()
-            self.canvas.itemconfig(self.selected_connection.line, width=2, fill="gray")
+            self.selected_connection.set_highlight(False)
     
     def change_box_color(self):
         """Altera a cor da caixa ou container selecionado."""
@@ -567,7 +868,9 @@ class VisionMapApp:
                 if color[1]:
                     for box in self.selected_boxes:
                         box.fill_color = color[1]
-                        box.canvas.itemconfig(box.rect, fill=box.fill_color)
+                        box._mark_changed()
+                        if box.rendered:
+                            box.canvas.itemconfig(box.rect, fill=box.fill_color)
             
             if self.selected_containers:
                 if not self.selected_boxes:
@@ -575,12 +878,16 @@ class VisionMapApp:
                     if color[1]:
                         for container in self.selected_containers:
                             container.fill_color = color[1]
-                            container.canvas.itemconfig(container.rect, fill=container.fill_color)
+                            container._mark_changed()
+                            if container.rendered:
+                                container.canvas.itemconfig(container.rect, fill=container.fill_color)
                 else:
                     if 'color' in locals() and color[1]:
                         for container in self.selected_containers:
                             container.fill_color = color[1]
-                            container.canvas.itemconfig(container.rect, fill=container.fill_color)
+                            container._mark_changed()
+                            if container.rendered:
+                                container.canvas.itemconfig(container.rect, fill=container.fill_color)
         elif self.selected_box:
             self.selected_box.change_color()
         elif self.selected_container:
@@ -627,7 +934,7 @@ class VisionMapApp:
             self.selected_container = None
         if self.selected_connection:
             try:
-                self.canvas.itemconfig(self.selected_connection.line, width=2, fill="gray")
+                self.selected_connection.set_highlight(False)
             except tk.TclError:
                 pass
             self.selected_connection = None
@@ -637,8 +944,8 @@ class VisionMapApp:
         for container in self.selected_containers:
             container.deselect()
         
-        self.selected_boxes = []
-        self.selected_containers = []
+        self.selected_boxes.clear()
+        self.selected_containers.clear()
         
         if self.selection_rectangle:
             self.canvas.delete(self.selection_rectangle)
@@ -654,106 +961,47 @@ class VisionMapApp:
         """Seleciona todos os elementos."""
         self.clear_selection()
         
-        for box in self.boxes:
-            if box not in self.selected_boxes:
-                box.select(box.x, box.y)
-                self.selected_boxes.append(box)
-        
-        for container in self.containers:
-            if container not in self.selected_containers:
-                container.select(container.x, container.y)
-                self.selected_containers.append(container)
+        self.add_to_selection(self.boxes)
+        self.add_to_selection(self.containers)
         
         self.statusbar.config(text=f"Selecionados: {len(self.selected_boxes)} caixas, {len(self.selected_containers)} containers")
     
+    def add_to_selection(self, items):
+        """Adiciona vários elementos à seleção múltipla de uma só vez."""
+        boxes = []
+        containers = []
+        for item in items:
+            if isinstance(item, Container):
+                containers.append(item)
+            else:
+                boxes.append(item)
+        
+        # Apenas os elementos que ainda não estavam selecionados são destacados
+        for item in self.selected_boxes.update(boxes) + self.selected_containers.update(containers):
+            item.select(item.x, item.y)
+    
     # Métodos utilitários
     def on_window_resize(self, event):
         """Atualiza a região de rolagem do canvas quando a janela é redimensionada."""
         if event.widget == self.root:
             if hasattr(self, 'canvas_width') and hasattr(self, 'canvas_height'):
-                self.canvas.config(scrollregion=(0, 0, self.canvas_width, self.canvas_height))
+                self.update_scrollregion()
     
     def check_container_relationships(self):
-        """Verifica e atualiza as relações entre containers."""
-        # Limpar todas as relações de containers filhos
-        for container in self.containers:
-            if hasattr(container, 'child_containers'):
-                container.child_containers.clear()
-            else:
-                container.child_containers = []
-            container.parent_container = None
-        
-        # Criar um conjunto para manter o controle de quais containers já têm pais
-        has_parent = set()
-        
-        # Recalcular as relações com base na posição atual
-        sorted_containers = sorted(self.containers, key=lambda c: c.width * c.height, reverse=True)
-        
-        for container in self.containers:
-            if container in has_parent:
-                continue
-                
-            for potential_parent in sorted_containers:
-                if (container != potential_parent and 
-                    potential_parent.contains_container(container) and
-                    not self._would_create_cycle(container, potential_parent)):
-                    
-                    potential_parent.add_child_container(container)
-                    has_parent.add(container)
-                    break
-        
-        # Verificar todas as caixas também
-        self.check_boxes_in_containers()
-        
-        # Agendar a próxima verificação
-        self.root.after(5000, self.check_container_relationships)
-        
-        # Atualizar barra de status se houver containers aninhados
-        if self.containers:
-            child_count = sum(len(c.child_containers) if hasattr(c, 'child_containers') else 0 for c in self.containers)
-            if child_count > 0:
-                self.statusbar.config(text=f"Detectados {child_count} containers aninhados")
-    
-    def _would_create_cycle(self, child, potential_parent):
-        """Verifica se adicionar o container filho ao container pai criaria um ciclo."""
-        if child == potential_parent:
-            return True
-            
-        if not hasattr(potential_parent, 'parent_container') or potential_parent.parent_container is None:
-            return False
-            
-        current = potential_parent.parent_container
-        visited = set([potential_parent])
-        
-        while current:
-            if current == child:
-                return True
-                
-            if current in visited:
-                return False
-                
-            visited.add(current)
-            
-            if not hasattr(current, 'parent_container'):
-                break
-                
-            current = current.parent_container
-            
-        return False
-    
-    def check_boxes_in_containers(self):
-        """Verifica todas as caixas para determinar se estão dentro de algum container."""
-        for container in self.containers:
-            container.boxes.clear()
-        
-        for box in self.boxes:
-            box.container = None
+        """Força a reavaliação das relações de todos os elementos com os containers."""
+        self.membership.mark_all(self.containers)
+        self.membership.mark_all(self.boxes)
+        self.membership.flush()
+    
+    def _on_membership_change(self, element, old_parent, new_parent):
+        """Informa na barra de status quando um container entra ou sai de outro."""
+        if not isinstance(element, Container):
+            return
         
-        for box in self.boxes:
-            for container in self.containers:
-                if container.contains_box(box):
-                    container.add_box(box)
-                    break
+        if new_parent:
+            self.statusbar.config(text=f"Container '{element.title}' adicionado a '{new_parent.title}'")
+        elif old_parent:
+            self.statusbar.config(text=f"Container '{element.title}' removido de '{old_parent.title}'")
     
     def show_about(self):
         """Mostra a caixa de diálogo 'Sobre'."""
@@ -766,6 +1014,7 @@ class VisionMapApp:
             "• Seleção por área (arrastar)\n"
             "• Movimentação múltipla\n"
             "• Operações em lote\n"
-            "• Containers aninhados\n\n"
+            "• Containers aninhados\n"
+            "• Zoom (Ctrl+roda do mouse)\n\n"
             "Desenvolvido com Python e Tkinter."
         )
\ No newline at end of file
@@ -4,6 +4,8 @@ Gerenciador de menus para a interface do VisionMap
 
 import tkinter as tk
 
+from ..utils.geometry_store import elements_bounds
+
 
 class MenuManager:
     """Classe que gerencia os menus da aplicação."""
@@ -38,11 +40,25 @@ class MenuManager:
         file_menu = tk.Menu(menubar, tearoff=0)
         file_menu.add_command(label="Novo", command=self.app.new_visionmap, accelerator="Ctrl+N")
         file_menu.add_command(label="Abrir", command=self.app.open_visionmap, accelerator="Ctrl+O")
+        file_menu.add_command(label="Cancelar Abertura", command=self.app.cancel_loading, accelerator="Esc")
         file_menu.add_command(label="Salvar", command=self.app.save_visionmap, accelerator="Ctrl+S")
         file_menu.add_command(label="Salvar Como", command=self.app.save_as_visionmap)
+        self.binary_format_var = tk.BooleanVar(value=False)
+        file_menu.add_checkbutton(label="Salvar em Formato Binário (mapas grandes)",
+                                  variable=self.binary_format_var,
+                                  command=self._toggle_binary_format)
+        self.incremental_save_var = tk.BooleanVar(value=False)
+        file_menu.add_checkbutton(label="Salvamento Incremental (apenas alterações)",
+                                  variable=self.incremental_save_var,
+                                  command=self._toggle_incremental_save)
+        self.autosave_var = tk.BooleanVar(value=True)
+        file_menu.add_checkbutton(label="Salvamento Automático",
+                                  variable=self.autosave_var,
+                                  command=self._toggle_autosave)
         file_menu.add_separator()
         file_menu.add_command(label="Importar do Mermaid", command=self.app.import_from_mermaid)
         file_menu.add_command(label="Exportar como Imagem", command=self.app.export_image)
+        file_menu.add_command(label="Exportar como SVG", command=self.app.export_svg)
         file_menu.add_command(label="Exportar como Mermaid", command=self.app.export_mermaid)
         file_menu.add_separator()
         file_menu.add_command(label="Sair", command=self.app.root.quit)
@@ -82,6 +98,19 @@ class MenuManager:
         canvas_menu.add_separator()
         canvas_menu.add_command(label="Centralizar Visão", command=self._center_canvas_view)
         canvas_menu.add_command(label="Ajustar Canvas ao Conteúdo", command=self._fit_canvas_to_content)
+        canvas_menu.add_separator()
+        canvas_menu.add_command(label="Aumentar Zoom", command=self.app.zoom_in, accelerator="Ctrl++")
+        canvas_menu.add_command(label="Diminuir Zoom", command=self.app.zoom_out, accelerator="Ctrl+-")
+        canvas_menu.add_command(label="Zoom 100%", command=self.app.reset_zoom, accelerator="Ctrl+0")
+        canvas_menu.add_separator()
+        self.canvas_hit_test_var = tk.BooleanVar(value=False)
+        canvas_menu.add_checkbutton(label="Localizar Elementos pelo Canvas (Tk)",
+                                    variable=self.canvas_hit_test_var,
+                                    command=self._toggle_hit_test_backend)
+        self.virtualized_var = tk.BooleanVar(value=False)
+        canvas_menu.add_checkbutton(label="Desenhar Apenas a Área Visível",
+                                    variable=self.virtualized_var,
+                                    command=self._toggle_virtualized)
         menubar.add_cascade(label="Canvas", menu=canvas_menu)
     
     def _create_help_menu(self, menubar):
@@ -90,6 +119,26 @@ class MenuManager:
         help_menu.add_command(label="Sobre", command=self.app.show_about)
         menubar.add_cascade(label="Ajuda", menu=help_menu)
     
+    def _toggle_hit_test_backend(self):
+        """Alterna entre o índice espacial e os itens do canvas para localizar elementos."""
+        self.app.set_hit_test_backend("canvas" if self.canvas_hit_test_var.get() else "index")
+    
+    def _toggle_binary_format(self):
+        """Liga ou desliga o salvamento na variante binária colunar."""
+        self.app.set_binary_format(self.binary_format_var.get())
+    
+    def _toggle_incremental_save(self):
+        """Liga ou desliga o salvamento incremental (diário de alterações)."""
+        self.app.set_incremental_save(self.incremental_save_var.get())
+    
+    def _toggle_autosave(self):
+        """Liga ou desliga o salvamento automático."""
+        self.app.set_autosave(self.autosave_var.get())
+    
+    def _toggle_virtualized(self):
+        """Liga ou desliga a renderização virtualizada do canvas."""
+        self.app.set_virtualized(self.virtualized_var.get())
+    
     def _resize_canvas(self, scale_factor, reset=False):
         """Redimensiona o canvas pelo fator de escala fornecido."""
         if reset:
@@ -99,7 +148,7 @@ class MenuManager:
             self.app.canvas_width = int(self.app.canvas_width * scale_factor)
             self.app.canvas_height = int(self.app.canvas_height * scale_factor)
         
-        self.app.canvas.config(scrollregion=(0, 0, self.app.canvas_width, self.app.canvas_height))
+        self.app.update_scrollregion()
         self.app.statusbar.config(text=f"Tamanho do canvas ajustado para {self.app.canvas_width}x{self.app.canvas_height}")
     
     def _center_canvas_view(self):
@@ -124,11 +173,7 @@ class MenuManager:
             messagebox.showinfo("Ajustar Canvas", "Não há conteúdo para ajustar o canvas.")
             return
             
-        all_items = self.app.boxes + self.app.containers
-        x_min = min([item.x - item.width/2 for item in all_items])
-        y_min = min([item.y - item.height/2 for item in all_items])
-        x_max = max([item.x + item.width/2 for item in all_items])
-        y_max = max([item.y + item.height/2 for item in all_items])
+        x_min, y_min, x_max, y_max = elements_bounds(self.app.boxes + self.app.containers)
         
         margin = 500
         x_min = max(0, x_min - margin)
@@ -139,6 +184,6 @@ class MenuManager:
         self.app.canvas_width = max(3000, int(x_max))
         self.app.canvas_height = max(2000, int(y_max))
         
-        self.app.canvas.config(scrollregion=(0, 0, self.app.canvas_width, self.app.canvas_height))
+        self.app.update_scrollregion()
         
         self.app.statusbar.config(text=f"Canvas ajustado para acomodar todo o conteúdo: {self.app.canvas_width}x{self.app.canvas_height}")
\ No newline at end of file
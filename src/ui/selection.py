@@ -0,0 +1,50 @@
+"""
+Armazenamento da seleção múltipla de elementos
+"""
+
+
+class Selection:
+    """Conjunto ordenado de elementos selecionados.
+    
+    Mantém a ordem de inserção (como uma lista) mas com verificação de
+    pertinência, inserção e remoção em tempo constante (como um conjunto).
+    """
+    
+    def __init__(self, items=()):
+        self._items = dict.fromkeys(items)
+    
+    def __contains__(self, item):
+        return item in self._items
+    
+    def __iter__(self):
+        return iter(list(self._items))
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def __getitem__(self, index):
+        if index == 0 and self._items:
+            return next(iter(self._items))
+        return list(self._items)[index]
+    
+    def append(self, item):
+        """Adiciona um elemento ao final da seleção, se ainda não estiver nela."""
+        self._items[item] = None
+    
+    def update(self, items):
+        """Adiciona vários elementos e retorna a lista dos que eram novos."""
+        added = [item for item in dict.fromkeys(items) if item not in self._items]
+        self._items.update(dict.fromkeys(added))
+        return added
+    
+    def remove(self, item):
+        """Remove um elemento da seleção."""
+        del self._items[item]
+    
+    def discard(self, item):
+        """Remove um elemento da seleção, se estiver nela."""
+        self._items.pop(item, None)
+    
+    def clear(self):
+        """Esvazia a seleção."""
+        self._items.clear()
\ No newline at end of file
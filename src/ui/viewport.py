@@ -0,0 +1,119 @@
+"""
+Renderização virtualizada: apenas os elementos próximos da área visível têm itens no canvas
+"""
+
+
+class ViewportManager:
+    """Cria e remove os itens do canvas conforme a área visível muda.
+    
+    O modelo (caixas, containers e conexões) continua completo, mas com a
+    virtualização ativa apenas os elementos que cruzam a área visível (mais uma
+    margem) têm itens no Tk. A cada rolagem, redimensionamento ou movimento, os
+    elementos que saíram da área liberam seus itens e os que entraram os recriam.
+    """
+    
+    def __init__(self, canvas, spatial_index, connection_index, margin=300):
+        self.canvas = canvas
+        self.spatial_index = spatial_index
+        self.connection_index = connection_index
+        
+        # Margem (em pixels do canvas) ao redor da área visível que também é desenhada
+        self.margin = margin
+        
+        self.enabled = False
+        
+        # Elementos e conexões que têm itens no canvas (dict usado como conjunto)
+        self.live = {}
+        self._scheduled = False
+    
+    def __len__(self):
+        return len(self.live)
+    
+    def visible_rect(self):
+        """Retorna a área visível, acrescida da margem, em coordenadas do modelo (x1, y1, x2, y2)."""
+        canvas = self.canvas
+        zoom = getattr(canvas, 'zoom', 1.0)
+        return ((canvas.canvasx(0) - self.margin) / zoom,
+                (canvas.canvasy(0) - self.margin) / zoom,
+                (canvas.canvasx(canvas.winfo_width()) + self.margin) / zoom,
+                (canvas.canvasy(canvas.winfo_height()) + self.margin) / zoom)
+    
+    def wants(self, element):
+        """Verifica se o elemento deve ter itens no canvas."""
+        if not self.enabled:
+            return True
+        
+        x1, y1, x2, y2 = element.get_bounds()
+        vx1, vy1, vx2, vy2 = self.visible_rect()
+        return x1 <= vx2 and x2 >= vx1 and y1 <= vy2 and y2 >= vy1
+    
+    def add(self, element):
+        """Registra que o elemento passou a ter itens no canvas."""
+        self.live[element] = None
+    
+    def discard(self, element):
+        """Registra que o elemento não tem mais itens no canvas."""
+        self.live.pop(element, None)
+    
+    def clear(self):
+        """Esquece todos os elementos (usado quando o canvas é limpo)."""
+        self.live.clear()
+    
+    def set_enabled(self, enabled):
+        """Liga ou desliga a virtualização."""
+        self.enabled = enabled
+        if enabled:
+            self.refresh()
+        else:
+            self.show_all()
+    
+    def show_all(self):
+        """Cria os itens de todos os elementos do modelo."""
+        # Criar na ordem das camadas (de baixo para cima) para preservar o empilhamento
+        for element in sorted(self.spatial_index.entries, key=self.spatial_index.z_order.__getitem__):
+            element.show()
+        for connection in list(self.connection_index.entries):
+            connection.show()
+    
+    def redraw(self):
+        """Recria os itens de todos os elementos desenhados (ex.: após uma mudança de zoom)."""
+        for element in list(self.live):
+            element.hide()
+        
+        if self.enabled:
+            self.refresh()
+        else:
+            self.show_all()
+    
+    def schedule_refresh(self):
+        """Agenda a atualização dos itens visíveis para o próximo ciclo ocioso."""
+        if self.enabled and not self._scheduled:
+            self._scheduled = True
+            self.canvas.after_idle(self.refresh)
+    
+    def refresh(self):
+        """Cria os itens dos elementos que entraram na área visível e remove os dos que saíram."""
+        self._scheduled = False
+        if not self.enabled:
+            return
+        
+        rect = self.visible_rect()
+        
+        # Elementos em ordem de camada (de baixo para cima), seguidos das conexões
+        wanted = dict.fromkeys(self.spatial_index.query_rect(*rect))
+        wanted.update(dict.fromkeys(self.connection_index.query_rect(*rect)))
+        
+        for element in list(self.live):
+            if element not in wanted:
+                element.hide()
+        
+        created = False
+        for element in wanted:
+            if not element.rendered:
+                element.show()
+                created = True
+        
+        # Itens recém-criados ficam no topo: restaurar a ordem das camadas
+        if created:
+            for element in wanted:
+                self.canvas.tag_raise(element.tag)
\ No newline at end of file
@@ -1,220 +1,1074 @@
 """
 Utilitários para operações de arquivo (salvar/abrir)
+
+O formato atual (.vmap versão 2) é JSON Lines: a primeira linha é um cabeçalho com
+o formato e a versão, e cada linha seguinte descreve um elemento (containers, com
+os pais antes dos filhos, depois caixas e anotações e por fim conexões). Assim o
+arquivo é escrito e lido em fluxo, e cada elemento pode ser criado assim que sua
+linha é lida. Arquivos antigos (pickle) não são abertos diretamente: precisam ser
+convertidos antes com migrate_visionmap_file, que os lê com um unpickler restrito
+(ver _LegacyUnpickler).
+
+Para mapas muito grandes há também uma variante binária colunar (ver
+save_visionmap_binary e BinaryVisionMap), aberta com mmap: a geometria é lida
+direto do arquivo, sem cópia por elemento, e os textos só são decodificados
+quando usados.
+
+Os salvamentos incrementais acrescentam apenas os elementos alterados a um diário
+ao lado do arquivo (ver utils.journal), que é reaplicado de forma transparente na
+leitura e incorporado ao arquivo principal por compact_visionmap_journal. Cada
+gravação completa põe no cabeçalho um token aleatório novo (ver snapshot_token),
+que identifica a versão do arquivo a que o diário se refere.
+
+Desde a versão 3, os registros das anotações não trazem o texto completo: os
+textos ficam em uma seção no final do arquivo (uma linha por anotação, seguida de
+um índice), lida apenas quando um texto é usado (ver NoteTextSection).
 """
 
+import gc
+import gzip
+import json
+import mmap
 import pickle
 import os
+import secrets
+import shutil
+import struct
+import sys
+import threading
+import weakref
+from array import array
 from tkinter import messagebox
 
+from ..models.document import Document, NodeData, ContainerData, containers_parents_first, create_view
+from ..models.lazy_text import LazyText, text_value, encode_lazy_text
+from . import journal
 
-def save_visionmap_to_file(file_path, boxes, containers, connections):
-    """Salva o visionmap no arquivo especificado."""
-    data = {
-        'boxes': [],
-        'containers': [],
-        'connections': []
-    }
-    
-    # Mapear id de objetos para índices
-    box_id_to_index = {}
-    container_id_to_index = {}
-    
-    # Salvar todos os containers
-    for i, container in enumerate(containers):
-        container_data = container.get_state()
-        # Adicionar índice do container pai, se houver
-        if container.parent_container:
-            container_data['parent_container_index'] = container_id_to_index.get(id(container.parent_container))
-        data['containers'].append(container_data)
-        container_id_to_index[id(container)] = i
-    
-    # Salvar todas as caixas
-    for i, box in enumerate(boxes):
-        box_data = box.get_state()
-        if box.container:
-            box_data['container_index'] = container_id_to_index[id(box.container)]
-        data['boxes'].append(box_data)
-        box_id_to_index[id(box)] = i
-    
-    # Salvar todas as conexões
-    for connection in connections:
-        conn_data = {}
-        # Determinar o tipo do primeiro objeto
-        from ..models.container import Container
-        if isinstance(connection.obj1, Container):
-            conn_data['obj1_type'] = 'container'
-            conn_data['obj1_index'] = container_id_to_index[id(connection.obj1)]
-        else:  # É uma caixa
-            conn_data['obj1_type'] = 'box'
-            conn_data['obj1_index'] = box_id_to_index[id(connection.obj1)]
-        
-        # Determinar o tipo do segundo objeto
-        if isinstance(connection.obj2, Container):
-            conn_data['obj2_type'] = 'container'
-            conn_data['obj2_index'] = container_id_to_index[id(connection.obj2)]
-        else:  # É uma caixa
-            conn_data['obj2_type'] = 'box'
-            conn_data['obj2_index'] = box_id_to_index[id(connection.obj2)]
-        
-        conn_data['label_text'] = connection.label_text
-        data['connections'].append(conn_data)
+
+FILE_FORMAT = "visionmap"
+FILE_VERSION = 3
+
+# Assinatura dos arquivos comprimidos com gzip (ex.: salvamentos automáticos)
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Assinatura e versão da variante binária (versão 2: token após o cabeçalho)
+BINARY_MAGIC = b"VMAPCOL\0"
+BINARY_VERSION = 2
+
+# Assinatura, versão, número de nós, de conexões e de strings
+_BINARY_HEADER = struct.Struct("<8sIIII")
+
+# Token do arquivo (bytes aleatórios), logo após o cabeçalho binário
+_BINARY_TOKEN = struct.Struct("<16s")
+
+# Valores da coluna 'type' dos nós
+_NODE_KINDS = ('box', 'note', 'container')
+
+# Colunas (nome, código do array) dos nós e das conexões, na ordem do arquivo.
+# Referências a outros elementos são números de linha (-1: nenhum) e textos e
+# cores são índices na tabela de strings.
+_NODE_COLUMNS = (('uid', 'q'), ('x', 'd'), ('y', 'd'), ('width', 'd'), ('height', 'd'),
+                 ('parent', 'i'), ('type', 'B'), ('fill', 'I'), ('outline', 'I'),
+                 ('text', 'I'), ('full_text', 'i'))
+_CONNECTION_COLUMNS = (('uid', 'q'), ('obj1', 'i'), ('obj2', 'i'), ('label', 'I'), ('arrow', 'B'))
+
+# Textos de anotações ainda não lidos (LazyText) são gravados sem ficar nas anotações
+_encode = json.JSONEncoder(ensure_ascii=False, default=encode_lazy_text).encode
+
+# Início das linhas da seção de textos das anotações (marca, textos, índice e fim)
+_NOTES_PREFIX = b'{"type": "notes'
+_NOTE_TEXT_PREFIX = b'{"type": "note_text"'
+
+# Tamanho máximo da última linha do arquivo (posição do índice dos textos)
+_NOTES_END_SIZE = 256
+
+
+def save_visionmap_to_file(file_path, boxes, containers, connections, binary=False):
+    """Salva o visionmap no arquivo especificado, um elemento por linha.
+    
+    Cada elemento é salvo com seu identificador estável ('id'), e a hierarquia e as
+    conexões referenciam esses identificadores, sem remapeamento para índices. Com
+    binary=True, usa a variante binária colunar. O arquivo passa a conter o mapa
+    inteiro, então o diário de salvamentos incrementais, se houver, é descartado.
+    O arquivo é escrito em um temporário e renomeado: textos de anotações ainda
+    não lidos da versão anterior continuam disponíveis durante a gravação.
+    """
+    temp_path = file_path + ".tmp"
+    with journal.journal_lock:
+        offsets = _write_snapshot(temp_path, boxes, containers, connections, binary)
+        _replace_snapshot(temp_path, file_path, offsets)
+        journal.remove_journal(file_path)
+
+
+def _write_snapshot(file_path, boxes, containers, connections, binary):
+    """Escreve o mapa inteiro no arquivo, em JSON Lines ou na variante binária.
+    
+    Retorna as posições dos textos das anotações no arquivo (None na variante binária).
+    """
+    if binary:
+        save_visionmap_binary(file_path, boxes, containers, connections)
+        return None
     
     with open(file_path, 'wb') as f:
-        pickle.dump(data, f)
+        return _write_records(f, element_records(boxes, containers, connections))
+
+
+def _write_records(f, records):
+    """Escreve em f (aberto em modo binário) o cabeçalho, os registros e a seção de textos das anotações.
+    
+    Os registros das anotações são gravados sem o texto completo, que vai para o
+    final do arquivo (uma linha por anotação), seguido do índice dessas linhas e
+    de uma última linha com a posição do índice. Retorna {uid: posição da linha
+    do texto} das anotações.
+    """
+    write = lambda value: f.write((_encode(value) + "\n").encode('utf-8'))
+    write({'format': FILE_FORMAT, 'version': FILE_VERSION, 'token': new_snapshot_token()})
+    
+    notes = []
+    for record in records:
+        if 'full_text' in record:
+            notes.append((record.get('id'), record['full_text']))
+            record = {key: value for key, value in record.items() if key != 'full_text'}
+        write(record)
+    
+    write({'type': 'notes', 'count': len(notes)})
+    offsets = {}
+    for uid, full_text in notes:
+        offsets[uid] = f.tell()
+        write({'type': 'note_text', 'id': uid, 'full_text': full_text})
+    
+    index = f.tell()
+    write({'type': 'notes_index', 'ids': list(offsets), 'offsets': list(offsets.values())})
+    write({'type': 'notes_end', 'index': index})
+    return offsets
+
+
+def element_records(boxes, containers, connections):
+    """Gera os registros dos elementos na ordem em que devem ser lidos."""
+    for container in containers_parents_first(containers):
+        yield element_record(container)
+    for box in boxes:
+        yield element_record(box)
+    for connection in connections:
+        yield element_record(connection)
+
+
+def element_record(element):
+    """Retorna o registro (estado com o tipo) de um elemento, como gravado no arquivo."""
+    record = element.get_state()
+    if element.kind == 'connection':
+        record['type'] = 'connection'
+    else:
+        record.setdefault('type', 'box')
+    return record
+
+
+def is_legacy_visionmap_file(file_path):
+    """Verifica se o arquivo está no formato antigo (pickle) em vez de JSON Lines."""
+    with open(file_path, 'rb') as f:
+        start = f.read(len(BINARY_MAGIC))
+    return bool(start) and start[:1] != b'{' and start != BINARY_MAGIC and start[:2] != GZIP_MAGIC
+
+
+def is_binary_visionmap_file(file_path):
+    """Verifica se o arquivo está na variante binária colunar."""
+    with open(file_path, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def new_snapshot_token():
+    """Retorna um token aleatório novo para o cabeçalho de um arquivo principal."""
+    return secrets.token_hex(_BINARY_TOKEN.size)
+
+
+def snapshot_token(file_path):
+    """Retorna o token gravado no cabeçalho do arquivo (None no formato antigo e em arquivos anteriores aos tokens).
+    
+    O token muda a cada gravação completa e não depende do tamanho nem da data do
+    arquivo, que mudam ao copiar, restaurar ou sincronizar o arquivo.
+    """
+    with open(file_path, 'rb') as f:
+        return _read_token(f)
 
 
-def load_visionmap_from_file(file_path, canvas):
-    """Carrega um visionmap a partir do arquivo especificado."""
+def _read_token(f):
+    """Lê o token do cabeçalho de um arquivo já aberto em modo binário."""
+    f.seek(0)
+    start = f.read(_BINARY_HEADER.size + _BINARY_TOKEN.size)
+    if start[:len(BINARY_MAGIC)] == BINARY_MAGIC:
+        if len(start) < _BINARY_HEADER.size + _BINARY_TOKEN.size or _BINARY_HEADER.unpack_from(start)[1] < 2:
+            return None
+        return _BINARY_TOKEN.unpack_from(start, _BINARY_HEADER.size)[0].hex()
+    if start[:1] != b'{' and start[:2] != GZIP_MAGIC:
+        return None
+    
+    # O GzipFile não fecha o arquivo recebido
+    f.seek(0)
+    source = gzip.GzipFile(fileobj=f) if start[:2] == GZIP_MAGIC else f
     try:
+        header = json.loads(source.readline() or 'null')
+    except ValueError:
+        return None
+    return header.get('token') if isinstance(header, dict) else None
+
+
+def iter_visionmap_records(file_path):
+    """Lê o arquivo e retorna, em fluxo, os registros dos elementos (um dicionário por elemento).
+    
+    Se houver um diário de salvamentos incrementais, ele é reaplicado sobre o
+    arquivo principal (nesse caso o arquivo é lido por inteiro antes do primeiro registro).
+    """
+    entries = journal.read_journal(file_path, snapshot_token(file_path))
+    if entries is not None and entries[0]:
+        yield from journal.replay_journal(_iter_snapshot_records(file_path), entries[0])
+        return
+    yield from _iter_snapshot_records(file_path)
+
+
+def _iter_snapshot_records(file_path):
+    """Lê em fluxo os registros do arquivo principal, sem o diário."""
+    if is_legacy_visionmap_file(file_path):
+        raise ValueError("Arquivo no formato antigo: converta-o para o formato atual antes de abrir")
+    if is_binary_visionmap_file(file_path):
+        yield from element_records(*read_binary_document(file_path).as_lists())
+        return
+    
+    with open(file_path, 'rb') as f:
+        compressed = f.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+    
+    with (gzip.open if compressed else open)(file_path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline() or 'null')
+        if not isinstance(header, dict) or header.get('format') != FILE_FORMAT:
+            raise ValueError("Arquivo com formato inválido")
+        if header.get('version', 0) > FILE_VERSION:
+            raise ValueError(f"Versão do arquivo não suportada: {header.get('version')}")
+        
+        # Seção dos textos completos das anotações (versão 3), criada na primeira anotação
+        notes = None
+        
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record.get('type')
+            if kind == 'notes':
+                # Os textos só são lidos quando usados
+                break
+            if kind == 'note' and 'full_text' not in record:
+                if notes is None:
+                    notes = NoteTextSection(file_path, compressed, header.get('token'))
+                record['full_text'] = LazyText(notes, record.get('id'))
+            yield record
+
+
+def iter_visionmap_elements(file_path, canvas=None, document=None):
+    """Lê o arquivo em fluxo, criando cada elemento assim que seu registro é lido.
+    
+    Retorna os elementos do documento ou, com um canvas, os elementos do Tk já
+    desenhados nele, permitindo que o mapa apareça enquanto o restante é lido.
+    """
+    if document is None:
+        document = Document()
+    
+    # Identificador estável -> elemento do Tk
+    views = {}
+    
+    if is_binary_visionmap_file(file_path) and not journal.has_journal(file_path, snapshot_token(file_path)):
+        # As linhas do arquivo binário já estão na ordem de criação (pais antes dos filhos)
+        read_binary_document(file_path, document)
+        for data in document.containers + document.boxes + document.connections:
+            yield data if canvas is None else create_view(canvas, data, views)
+        return
+    
+    for record in iter_visionmap_records(file_path):
+        data = _add_record(document, record)
+        if data is None:
+            continue
+        yield data if canvas is None else create_view(canvas, data, views)
+
+
+def count_visionmap_elements(file_path):
+    """Estima o número de elementos do arquivo sem criá-los (usado para mostrar o progresso).
+    
+    Retorna None para o formato antigo, que não é lido sem conversão. As
+    alterações do diário não entram na conta.
+    """
+    if is_legacy_visionmap_file(file_path):
+        return None
+    
+    with open(file_path, 'rb') as f:
+        start = f.read(_BINARY_HEADER.size)
+    if start[:len(BINARY_MAGIC)] == BINARY_MAGIC:
+        if len(start) < _BINARY_HEADER.size:
+            return None
+        _, _, node_count, connection_count, _ = _BINARY_HEADER.unpack(start)
+        return node_count + connection_count
+    
+    # Uma linha por elemento, além do cabeçalho e da seção de textos das anotações
+    lines = 0
+    with (gzip.open if start[:2] == GZIP_MAGIC else open)(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            lines += block.count(b"\n") - block.count(_NOTES_PREFIX) - block.count(_NOTE_TEXT_PREFIX)
+    return max(lines - 1, 0)
+
+
+def read_visionmap_document(file_path):
+    """Lê o arquivo especificado e retorna o visionmap como um Document, sem usar o Tk."""
+    document = Document()
+    for _ in iter_visionmap_elements(file_path, document=document):
+        pass
+    return document
+
+
+def save_visionmap_snapshot(file_path, records, compress=True):
+    """Salva registros já capturados (um por elemento, em qualquer ordem) em JSON Lines.
+    
+    Não acessa os elementos, então pode rodar em outra thread a partir de uma
+    cópia dos registros. O arquivo é escrito em um temporário e renomeado, de modo
+    que uma versão anterior nunca fica pela metade.
+    """
+    temp_path = file_path + ".tmp"
+    
+    with (gzip.open if compress else open)(temp_path, 'wb') as f:
+        offsets = _write_records(f, journal.replay_journal(records, []))
+    
+    # Sem acesso direto aos textos em um arquivo comprimido
+    with journal.journal_lock:
+        _replace_snapshot(temp_path, file_path, None if compress else offsets)
+
+
+def append_visionmap_journal(file_path, changed, deleted):
+    """Salva de forma incremental: acrescenta ao diário do arquivo os elementos
+    alterados e os identificadores dos excluídos. Retorna o número de entradas gravadas.
+    """
+    with journal.journal_lock:
+        return journal.append_journal(file_path, snapshot_token(file_path),
+                                      [element_record(element) for element in changed], deleted)
+
+
+def can_append_visionmap_journal(file_path, binary=False):
+    """Verifica se o arquivo aceita salvamentos incrementais no formato informado.
+    
+    O arquivo precisa ter um token (arquivos anteriores aos tokens são salvos por completo uma vez).
+    """
+    return (os.path.exists(file_path) and not is_legacy_visionmap_file(file_path)
+            and is_binary_visionmap_file(file_path) == binary and snapshot_token(file_path) is not None)
+
+
+def compact_visionmap_journal(file_path):
+    """Incorpora o diário ao arquivo principal e o descarta. Retorna True se compactou.
+    
+    Trabalha apenas com os arquivos (sem tocar nos elementos do canvas), de modo
+    que pode rodar em outra thread. Lotes gravados no diário enquanto a
+    compactação roda são preservados; se o arquivo principal for salvo por
+    completo nesse meio tempo, a compactação é abandonada.
+    """
+    with journal.journal_lock:
+        token = snapshot_token(file_path)
+        if not journal.has_journal(file_path, token):
+            return False
+        entries, consumed = journal.read_journal(file_path, token)
+    
+    document = Document()
+    for record in journal.replay_journal(_iter_snapshot_records(file_path), entries):
+        _add_record(document, record)
+    
+    # Nome diferente do temporário de save_visionmap_to_file, que pode rodar ao mesmo tempo
+    temp_path = file_path + ".compact.tmp"
+    offsets = _write_snapshot(temp_path, *document.as_lists(), is_binary_visionmap_file(file_path))
+    
+    with journal.journal_lock:
+        if snapshot_token(file_path) != token:
+            os.remove(temp_path)
+            return False
+        
+        with open(journal.journal_path(file_path), 'rb') as f:
+            f.seek(consumed)
+            tail = f.read()
+        _replace_snapshot(temp_path, file_path, offsets)
+        journal.rebase_journal(file_path, snapshot_token(file_path), tail)
+    return True
+
+
+# Caminho absoluto do arquivo -> seções de textos de anotações abertas sobre ele
+_note_sections = {}
+_note_sections_lock = threading.Lock()
+
+
+class NoteTextSection:
+    """Textos completos das anotações de um .vmap em JSON Lines, lidos sob demanda.
+    
+    Os registros das anotações chegam sem o texto completo, e cada anotação recebe
+    um LazyText(seção, identificador): o texto só é lido quando usado (janela de
+    texto expandido, exportação, salvamento). Em um arquivo sem compressão,
+    string() lê apenas a linha pedida, pelo índice gravado no final do arquivo;
+    em um arquivo comprimido não há acesso direto, e a seção inteira é lida no
+    primeiro uso.
+    
+    O arquivo fica aberto enquanto a seção existir e é conferido pelo token do
+    cabeçalho (ver snapshot_token) antes de cada leitura, e não pelo tamanho ou
+    pela data: as leituras continuam valendo mesmo que o arquivo seja tocado,
+    renomeado ou removido, e só falham se ele for sobrescrito no mesmo lugar.
+    Quando o arquivo é substituído por um salvamento (ver _replace_snapshot), a
+    seção passa a ler do novo arquivo e guarda na memória os textos que ele não contém.
+    """
+    
+    def __init__(self, file_path, compressed=False, token=None):
+        self.file_path = file_path
+        self.compressed = compressed
+        self.fd = None
+        self.token = token
+        self._open_descriptor()
+        
+        # Arquivos anteriores aos tokens não têm como ser conferidos
+        with self._reader() as f:
+            if not self._unchanged(f):
+                self.close()
+                raise ValueError("O arquivo foi substituído durante a leitura")
+        
+        # Identificador -> posição da linha do texto (índice lido no primeiro uso)
+        self.offsets = None
+        
+        # Textos mantidos na memória (arquivo comprimido ou substituído)
+        self.texts = {}
+        
+        # string() também é chamada por outras threads (salvamento automático, compactação)
+        self.lock = threading.Lock()
+        
+        with _note_sections_lock:
+            _note_sections.setdefault(os.path.abspath(file_path), weakref.WeakSet()).add(self)
+    
+    def __del__(self):
+        self.close()
+    
+    def close(self):
+        """Fecha o arquivo (os textos ainda não lidos deixam de estar disponíveis)."""
+        if getattr(self, 'fd', None) is not None:
+            os.close(self.fd)
+            self.fd = None
+    
+    def string(self, uid):
+        """Retorna o texto completo da anotação."""
+        with self.lock:
+            if uid in self.texts:
+                return self.texts[uid]
+            if self.fd is None:
+                raise ValueError("O arquivo foi fechado: o texto da anotação não pode ser lido")
+            with self._reader() as f:
+                if not self._unchanged(f):
+                    raise ValueError("O arquivo foi sobrescrito: o texto da anotação não pode ser lido")
+                if self.compressed:
+                    self.texts = self._read_all(f)
+                    return self.texts[uid]
+                return self._read(f, [uid])[uid]
+    
+    def _open_descriptor(self):
+        """Abre o arquivo, mantendo apenas o descritor."""
+        self.fd = os.open(self.file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    
+    def _reader(self):
+        """Retorna um leitor novo sobre o descritor (sem dados de leituras anteriores), que não o fecha."""
+        return open(self.fd, 'rb', closefd=False)
+    
+    def _unchanged(self, f):
+        """Verifica se o arquivo aberto ainda tem o token de quando a seção foi aberta."""
+        return self.token is None or _read_token(f) == self.token
+    
+    def _read(self, f, uids):
+        """Lê do arquivo os textos das anotações informadas."""
+        if self.offsets is None:
+            self.offsets = self._read_index(f)
+        texts = {}
+        for uid in uids:
+            f.seek(self.offsets[uid])
+            texts[uid] = json.loads(f.readline())['full_text']
+        return texts
+    
+    def _read_index(self, f):
+        """Lê o índice dos textos, cuja posição está na última linha do arquivo."""
+        f.seek(0, os.SEEK_END)
+        f.seek(max(f.tell() - _NOTES_END_SIZE, 0))
+        end = json.loads(f.read().splitlines()[-1])
+        if not isinstance(end, dict) or end.get('type') != 'notes_end':
+            raise ValueError("Arquivo sem o índice dos textos das anotações")
+        f.seek(end['index'])
+        index = json.loads(f.readline())
+        return dict(zip(index['ids'], index['offsets']))
+    
+    def _read_all(self, f):
+        """Lê todos os textos da seção, em uma passada pelo arquivo."""
+        texts = {}
+        f.seek(0)
+        for line in gzip.GzipFile(fileobj=f) if self.compressed else f:
+            if line.startswith(_NOTE_TEXT_PREFIX):
+                entry = json.loads(line)
+                texts[entry['id']] = entry['full_text']
+        return texts
+    
+    def _before_replace(self, offsets):
+        """Guarda na memória os textos que o novo arquivo não terá e fecha o arquivo (chamada com lock adquirido).
+        
+        O arquivo precisa estar fechado para ser substituído no Windows.
+        """
+        if self.fd is None:
+            return
+        with self._reader() as f:
+            # Se foi sobrescrito no mesmo lugar, os textos não lidos já não existem
+            if self._unchanged(f):
+                if self.compressed:
+                    if not self.texts:
+                        self.texts = self._read_all(f)
+                else:
+                    if self.offsets is None:
+                        self.offsets = self._read_index(f)
+                    missing = [uid for uid in self.offsets
+                               if uid not in self.texts and (offsets is None or uid not in offsets)]
+                    self.texts.update(self._read(f, missing))
+        self.close()
+    
+    def _after_replace(self, offsets):
+        """Passa a ler do novo arquivo, ou apenas da memória se não houver offsets."""
+        if offsets is None or self.file_path is None:
+            self.file_path = None
+            self.offsets = {}
+            return
+        self._open_descriptor()
+        with self._reader() as f:
+            self.token = _read_token(f)
+        self.compressed = False
+        self.offsets = offsets
+        self.texts = {uid: text for uid, text in self.texts.items() if uid not in offsets}
+    
+    def _replace_failed(self):
+        """Volta a ler do arquivo original quando a substituição falha."""
+        if self.file_path is not None and self.fd is None:
+            self._open_descriptor()
+
+
+def _replace_snapshot(temp_path, file_path, offsets=None):
+    """Substitui o arquivo pelo temporário já escrito, ajustando as seções de textos abertas sobre ele.
+    
+    offsets são as posições dos textos das anotações no novo arquivo (JSON Lines
+    sem compressão); sem elas, as seções guardam na memória os textos ainda não
+    lidos e deixam de usar o arquivo.
+    """
+    key = os.path.abspath(file_path)
+    with _note_sections_lock:
+        sections = list(_note_sections.get(key, ()))
+        if offsets is None:
+            _note_sections.pop(key, None)
+    
+    for section in sections:
+        section.lock.acquire()
+    try:
+        for section in sections:
+            section._before_replace(offsets)
+        try:
+            os.replace(temp_path, file_path)
+        except OSError:
+            for section in sections:
+                section._replace_failed()
+            raise
+        for section in sections:
+            section._after_replace(offsets)
+    finally:
+        for section in sections:
+            section.lock.release()
+
+
+def save_visionmap_binary(file_path, boxes, containers, connections):
+    """Salva o visionmap na variante binária colunar.
+    
+    Os nós (containers, com os pais antes dos filhos, seguidos das caixas e
+    anotações) ocupam uma linha em cada coluna de largura fixa; textos e cores vão
+    para uma tabela de strings sem repetições.
+    """
+    nodes = containers_parents_first(containers) + list(boxes)
+    rows = {node.uid: row for row, node in enumerate(nodes)}
+    edges = [connection for connection in connections
+             if connection.obj1.uid in rows and connection.obj2.uid in rows]
+    
+    # Texto -> índice na tabela de strings
+    strings = {}
+    intern = lambda text: strings.setdefault(text, len(strings))
+    
+    node_columns = {name: array(code) for name, code in _NODE_COLUMNS}
+    for node in nodes:
+        if node.kind == 'container':
+            parent = node.parent_container
+            text, full_text = node.title, None
+        else:
+            parent = node.container
+            text, full_text = node.text, text_value(node._full_text) if node.kind == 'note' else None
+        
+        node_columns['uid'].append(node.uid)
+        node_columns['x'].append(node.x)
+        node_columns['y'].append(node.y)
+        node_columns['width'].append(node.width)
+        node_columns['height'].append(node.height)
+        node_columns['parent'].append(rows.get(parent.uid, -1) if parent is not None else -1)
+        node_columns['type'].append(_NODE_KINDS.index(node.kind))
+        node_columns['fill'].append(intern(node.fill_color))
+        node_columns['outline'].append(intern(node.outline_color))
+        node_columns['text'].append(intern(text))
+        node_columns['full_text'].append(-1 if full_text is None else intern(full_text))
+    
+    connection_columns = {name: array(code) for name, code in _CONNECTION_COLUMNS}
+    for connection in edges:
+        connection_columns['uid'].append(connection.uid)
+        connection_columns['obj1'].append(rows[connection.obj1.uid])
+        connection_columns['obj2'].append(rows[connection.obj2.uid])
+        connection_columns['label'].append(intern(connection.label_text))
+        connection_columns['arrow'].append(1 if connection.arrow else 0)
+    
+    encoded = [text.encode('utf-8') for text in strings]
+    offsets = array('I', [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    
+    with open(file_path, 'wb') as f:
+        f.write(_BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(nodes), len(edges), len(strings)))
+        f.write(_BINARY_TOKEN.pack(bytes.fromhex(new_snapshot_token())))
+        for column in list(node_columns.values()) + list(connection_columns.values()) + [offsets]:
+            _write_column(f, column)
+        f.writelines(encoded)
+
+
+def _write_column(f, column):
+    """Escreve uma coluna em little-endian, completada até um múltiplo de 8 bytes."""
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    data = column.tobytes()
+    f.write(data)
+    f.write(bytes(-len(data) % 8))
+
+
+class BinaryVisionMap:
+    """Arquivo .vmap binário aberto com mmap.
+    
+    As colunas de nodes e connections são memoryviews sobre o arquivo mapeado, sem
+    cópia: a geometria pode ser consultada (ex.: rows_in_rect para o primeiro
+    desenho) antes de criar qualquer elemento. Os textos ficam na tabela de
+    strings e só são decodificados por string(). Depois de release, o mapeamento é
+    fechado e string() continua funcionando a partir de uma cópia da tabela.
+    """
+    
+    def __init__(self, file_path):
         with open(file_path, 'rb') as f:
-            data = pickle.load(f)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
         
-        # Verificar se os dados têm a estrutura esperada
-        if not isinstance(data, dict):
-            raise ValueError("Arquivo com formato inválido")
+        try:
+            magic, version, node_count, connection_count, string_count = \
+                _BINARY_HEADER.unpack_from(self._mmap)
+            if magic != BINARY_MAGIC:
+                raise ValueError("Arquivo com formato inválido")
+            if version > BINARY_VERSION:
+                raise ValueError(f"Versão do arquivo não suportada: {version}")
             
-        # Garantir que as chaves esperadas existam
-        if 'boxes' not in data:
-            data['boxes'] = []
-        if 'containers' not in data:
-            data['containers'] = []
-        if 'connections' not in data:
-            data['connections'] = []
-        
-        # Importar classes necessárias
-        from ..models.container import Container
-        from ..models.box import VisionMapBox
-        from ..models.note_box import NoteBox
-        from ..models.connection import Connection
-        
-        # Listas para retorno
-        boxes = []
-        containers = []
-        connections = []
-        
-        # Recriar todos os containers primeiro
-        containers_map = {}  # Mapear índices para objetos de container
-        
-        if 'containers' in data:
-            for i, container_data in enumerate(data['containers']):
-                container = Container(
-                    canvas,
-                    container_data['x'], container_data['y'],
-                    container_data.get('width', 300), 
-                    container_data.get('height', 200),
-                    container_data.get('title', 'Novo Container'),
-                    container_data.get('fill_color', "#F0F0F0"),
-                    container_data.get('outline_color', "#888888")
-                )
-                containers.append(container)
-                containers_map[i] = container
-                
-                # Armazenar o índice do container pai se houver
-                if 'parent_container_index' in container_data and container_data['parent_container_index'] is not None:
-                    parent_index = container_data['parent_container_index']
-                    # Relacionar posteriormente quando todos os containers forem criados
-                    if parent_index in containers_map:
-                        parent = containers_map[parent_index]
-                        parent.add_child_container(container)
-        
-        # Recriar todas as caixas
-        for box_data in data['boxes']:
-            # Verificar o tipo da caixa (normal ou anotação)
-            if box_data.get('type') == 'note':
-                box = NoteBox.from_state(canvas, box_data)
-            else:
-                fill_color = box_data.get('fill_color', "lightblue")
-                outline_color = box_data.get('outline_color', "#CCCCCC")
-                box = VisionMapBox(
-                    canvas, 
-                    box_data['x'], box_data['y'],
-                    box_data['text'], 
-                    box_data['width'], box_data['height'],
-                    fill_color, outline_color
-                )
-            boxes.append(box)
+            self.node_count = node_count
+            self.connection_count = connection_count
             
-            # Associar a caixa ao container, se necessário
-            if 'container_index' in box_data and box_data['container_index'] in containers_map:
-                container = containers_map[box_data['container_index']]
-                container.add_box(box)
-        
-        # Recriar todas as conexões
-        if 'connections' in data:
-            for conn_data in data['connections']:
-                try:
-                    # Obter o primeiro objeto (caixa ou container)
-                    if 'obj1_type' in conn_data:  # Novo formato
-                        obj1_type = conn_data['obj1_type']
-                        obj1_index = conn_data['obj1_index']
-                        
-                        # Verificar se o índice é válido
-                        if obj1_type == 'container':
-                            if obj1_index >= len(containers):
-                                print(f"Aviso: Índice de container inválido: {obj1_index}")
-                                continue
-                            obj1 = containers[obj1_index]
-                        else:
-                            if obj1_index >= len(boxes):
-                                print(f"Aviso: Índice de caixa inválido: {obj1_index}")
-                                continue
-                            obj1 = boxes[obj1_index]
-                        
-                        # Obter o segundo objeto (caixa ou container)
-                        obj2_type = conn_data['obj2_type']
-                        obj2_index = conn_data['obj2_index']
-                        
-                        # Verificar se o índice é válido
-                        if obj2_type == 'container':
-                            if obj2_index >= len(containers):
-                                print(f"Aviso: Índice de container inválido: {obj2_index}")
-                                continue
-                            obj2 = containers[obj2_index]
-                        else:
-                            if obj2_index >= len(boxes):
-                                print(f"Aviso: Índice de caixa inválido: {obj2_index}")
-                                continue
-                            obj2 = boxes[obj2_index]
-                    else:  # Formato antigo (compatibilidade)
-                        if 'box1_index' not in conn_data or 'box2_index' not in conn_data:
-                            print("Aviso: Dados de conexão incompletos")
-                            continue
-                        
-                        box1_index = conn_data['box1_index']
-                        box2_index = conn_data['box2_index']
-                        
-                        if box1_index >= len(boxes) or box2_index >= len(boxes):
-                            print(f"Aviso: Índices de caixa inválidos: {box1_index}, {box2_index}")
-                            continue
-                        
-                        obj1 = boxes[box1_index]
-                        obj2 = boxes[box2_index]
-                    
-                    # Verificar se há texto de rótulo
-                    label_text = conn_data.get('label_text', "")
-                    
-                    connection = Connection(canvas, obj1, obj2, label_text)
-                    connections.append(connection)
-                    
-                except (IndexError, KeyError, ValueError) as e:
-                    print(f"Erro ao recriar conexão: {e}")
-                    continue
+            offset = _BINARY_HEADER.size + (_BINARY_TOKEN.size if version >= 2 else 0)
+            self.nodes = {}
+            for name, code in _NODE_COLUMNS:
+                self.nodes[name], offset = self._column(offset, code, node_count)
+            self.connections = {}
+            for name, code in _CONNECTION_COLUMNS:
+                self.connections[name], offset = self._column(offset, code, connection_count)
+            
+            self._offsets, offset = self._column(offset, 'I', string_count + 1)
+            self._strings = self._view(offset, self._offsets[-1] if string_count else 0)
+        except (struct.error, TypeError, IndexError):
+            self.release()
+            raise ValueError("Arquivo binário truncado ou corrompido")
+        except ValueError:
+            self.release()
+            raise
         
-        # Estabelecer relações entre containers depois que todos foram criados
-        sorted_containers = sorted(containers, key=lambda c: c.width * c.height, reverse=True)
+        # Índice -> texto já decodificado (cores e textos repetidos são decodificados uma vez)
+        self._decoded = {}
+    
+    def _view(self, offset, size):
+        """Retorna um memoryview de size bytes do arquivo a partir de offset."""
+        if offset + size > len(self._mmap):
+            raise IndexError(offset + size)
+        view = memoryview(self._mmap)[offset:offset + size]
+        self._views.append(view)
+        return view
+    
+    def _column(self, offset, code, count):
+        """Retorna a coluna que começa em offset e o offset da coluna seguinte."""
+        size = array(code).itemsize * count
+        column = self._view(offset, size).cast(code)
+        self._views.append(column)
+        if sys.byteorder == 'big':
+            column = array(code, column)
+            column.byteswap()
+        return column, offset + size + (-size % 8)
+    
+    def string(self, index):
+        """Decodifica o texto de índice informado da tabela de strings."""
+        text = self._decoded.get(index)
+        if text is None:
+            text = str(self._strings[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+            self._decoded[index] = text
+        return text
+    
+    def rows_in_rect(self, x1, y1, x2, y2):
+        """Retorna as linhas dos nós cuja caixa cruza a área, lendo apenas as colunas de geometria."""
+        nodes = self.nodes
+        return [row for row, (x, y, w, h) in enumerate(zip(nodes['x'], nodes['y'], nodes['width'], nodes['height']))
+                if x - w/2 <= x2 and x + w/2 >= x1 and y - h/2 <= y2 and y + h/2 >= y1]
+    
+    def release(self):
+        """Fecha o mapeamento do arquivo, mantendo em memória apenas a tabela de strings."""
+        if self._mmap is None:
+            return
         
-        for container in sorted_containers:
-            # Se já tem um pai, não buscar outro
-            if container.parent_container:
-                continue
-                
-            for potential_parent in sorted_containers:
-                if container != potential_parent and potential_parent.contains_container(container):
-                    potential_parent.add_child_container(container)
-                    break
+        if self._views and hasattr(self, '_strings'):
+            self._offsets = array('I', self._offsets)
+            self._strings = bytes(self._strings)
+        self.nodes = {}
+        self.connections = {}
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+        self._mmap = None
+
+
+def read_binary_document(file_path, document=None):
+    """Lê um arquivo binário e retorna o Document, com os textos ainda não decodificados.
+    
+    A geometria é copiada em bloco das colunas mapeadas; textos e títulos ficam
+    como LazyText e são decodificados apenas quando usados (desenho, exportação,
+    busca...).
+    """
+    if document is None:
+        document = Document()
+    
+    # Centenas de milhares de objetos novos disparariam coletas completas
+    # repetidas; o coletor de ciclos é pausado durante a criação em bloco
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    source = BinaryVisionMap(file_path)
+    try:
+        _add_binary_elements(document, source)
+    finally:
+        source.release()
+        if gc_enabled:
+            gc.enable()
+    return document
+
+
+def _add_binary_elements(document, source):
+    """Cria no documento os nós e as conexões das colunas de um BinaryVisionMap."""
+    nodes = source.nodes
+    string = source.string
+    parents = nodes['parent']
+    full_texts = nodes['full_text']
+    
+    created = []
+    for row, (uid, x, y, width, height, kind, fill, outline, text) in enumerate(zip(
+            nodes['uid'], nodes['x'], nodes['y'], nodes['width'], nodes['height'],
+            nodes['type'], nodes['fill'], nodes['outline'], nodes['text'])):
+        kind = _NODE_KINDS[kind]
+        text = LazyText(source, text)
+        if kind == 'container':
+            node = document.add_container(x, y, width, height, text, string(fill), string(outline), uid=uid)
+        elif kind == 'note':
+            full_text = full_texts[row]
+            node = document.add_note(x, y, text, width, height, string(fill), string(outline),
+                                     None if full_text < 0 else LazyText(source, full_text), uid=uid)
+        else:
+            node = document.add_box(x, y, text, width, height, string(fill), string(outline), uid=uid)
+        created.append(node)
         
-        return boxes, containers, connections
+        # Os pais são sempre gravados antes dos filhos; como o nó acabou de ser
+        # criado, não há relação anterior a desfazer nem ciclo possível
+        parent = parents[row]
+        if 0 <= parent < row and created[parent].kind == 'container':
+            parent = created[parent]
+            if kind == 'container':
+                parent.child_containers.append(node)
+                node.parent_container = parent
+            else:
+                parent.boxes.append(node)
+                node.container = parent
+    
+    connections = source.connections
+    for uid, obj1, obj2, label, arrow in zip(connections['uid'], connections['obj1'], connections['obj2'],
+                                            connections['label'], connections['arrow']):
+        if not (0 <= obj1 < len(created) and 0 <= obj2 < len(created)):
+            print(f"Aviso: Conexão com linhas inválidas: {obj1}, {obj2}")
+            continue
+        document.add_connection(created[obj1], created[obj2], string(label), bool(arrow), uid=uid)
+
+
+def migrate_visionmap_file(file_path, target_path=None):
+    """Converte um arquivo antigo (pickle) para o formato atual.
+    
+    Sem target_path, o arquivo é substituído e o original é mantido com a extensão
+    .bak. A cópia de segurança é feita antes e o arquivo convertido é escrito em
+    um temporário e só então renomeado (ver save_visionmap_to_file): se a
+    conversão falhar, o original continua no lugar. Retorna False se o arquivo
+    já estiver no formato atual.
+    """
+    if not is_legacy_visionmap_file(file_path):
+        return False
+    
+    document = _read_legacy_document(file_path)
+    if target_path is None:
+        target_path = file_path
+        shutil.copy2(file_path, file_path + ".bak")
+    
+    save_visionmap_to_file(target_path, *document.as_lists())
+    return True
+
+
+def _add_record(document, record):
+    """Cria no documento o elemento descrito por um registro e o retorna (None se for inválido)."""
+    kind = record.get('type', 'box')
+    
+    if kind == 'container':
+        container = _add_container(document, record)
+        parent = document.get(record.get('parent_container_id'))
+        if isinstance(parent, ContainerData):
+            parent.add_child_container(container)
+        return container
+    
+    if kind == 'connection':
+        obj1 = document.get(record.get('obj1_id'))
+        obj2 = document.get(record.get('obj2_id'))
+        if not isinstance(obj1, (NodeData, ContainerData)) or not isinstance(obj2, (NodeData, ContainerData)):
+            print(f"Aviso: Conexão com identificadores inválidos: {record.get('obj1_id')}, {record.get('obj2_id')}")
+            return None
+        return document.add_connection(obj1, obj2, record.get('label_text', ""), record.get('arrow', True),
+                                       uid=record.get('id'))
+    
+    box = _add_box(document, record)
+    container = document.get(record.get('container_id'))
+    if isinstance(container, ContainerData):
+        container.add_box(box)
+    return box
+
+
+class _LegacyUnpickler(pickle.Unpickler):
+    """Unpickler do formato antigo, que só contém dicionários, listas, strings e números.
+    
+    Qualquer referência a uma classe ou função é recusada: um arquivo criado para
+    executar código ao ser aberto (por exemplo, com __reduce__) falha sem executá-lo.
+    """
+    
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Arquivo antigo com objeto não permitido: {module}.{name}")
+
+
+def _read_legacy_document(file_path):
+    """Lê um arquivo no formato antigo (dicionário serializado com pickle)."""
+    with open(file_path, 'rb') as f:
+        data = _LegacyUnpickler(f).load()
+    
+    # Verificar se os dados têm a estrutura esperada
+    if not isinstance(data, dict):
+        raise ValueError("Arquivo com formato inválido")
+    
+    # Garantir que as chaves esperadas existam
+    if 'boxes' not in data:
+        data['boxes'] = []
+    if 'containers' not in data:
+        data['containers'] = []
+    if 'connections' not in data:
+        data['connections'] = []
+    
+    document = Document()
+    if _uses_element_ids(data):
+        _read_elements_by_id(data, document)
+    else:
+        _read_elements_by_index(data, document)
+    return document
+
+
+def _uses_element_ids(data):
+    """Verifica se o arquivo usa identificadores estáveis (formatos antigos usam índices)."""
+    return any('id' in states[0] for states in (data['containers'], data['boxes']) if states)
+
+
+def _add_container(document, container_data):
+    """Cria no documento o container descrito pelo estado salvo."""
+    return document.add_container(
+        container_data['x'], container_data['y'],
+        container_data.get('width', 300), 
+        container_data.get('height', 200),
+        container_data.get('title', 'Novo Container'),
+        container_data.get('fill_color', "#F0F0F0"),
+        container_data.get('outline_color', "#888888"),
+        uid=container_data.get('id')
+    )
+
+
+def _add_box(document, box_data):
+    """Cria no documento a caixa ou anotação descrita pelo estado salvo."""
+    # Verificar o tipo da caixa (normal ou anotação)
+    if box_data.get('type') == 'note':
+        return document.add_note(
+            box_data['x'], box_data['y'],
+            box_data.get('text', 'Nova Anotação'),
+            box_data.get('width', 150),
+            box_data.get('height', 80),
+            box_data.get('fill_color', "#FFFFD0"),
+            box_data.get('outline_color', "#CCCCCC"),
+            box_data.get('full_text'),
+            uid=box_data.get('id')
+        )
+    return document.add_box(
+        box_data['x'], box_data['y'],
+        box_data['text'], 
+        box_data['width'], box_data['height'],
+        box_data.get('fill_color', "lightblue"),
+        box_data.get('outline_color', "#CCCCCC"),
+        uid=box_data.get('id')
+    )
+
+
+def _read_elements_by_id(data, document):
+    """Recria os elementos de um arquivo em que as referências são identificadores estáveis."""
+    for container_data in data['containers']:
+        _add_container(document, container_data)
+    
+    # A hierarquia é montada depois que todos os containers existem
+    for container_data in data['containers']:
+        parent = document.get(container_data.get('parent_container_id'))
+        if isinstance(parent, ContainerData):
+            parent.add_child_container(document.get(container_data['id']))
+    
+    for box_data in data['boxes']:
+        box = _add_box(document, box_data)
+        container = document.get(box_data.get('container_id'))
+        if isinstance(container, ContainerData):
+            container.add_box(box)
+    
+    for conn_data in data['connections']:
+        obj1 = document.get(conn_data.get('obj1_id'))
+        obj2 = document.get(conn_data.get('obj2_id'))
+        if not isinstance(obj1, (NodeData, ContainerData)) or not isinstance(obj2, (NodeData, ContainerData)):
+            print(f"Aviso: Conexão com identificadores inválidos: {conn_data.get('obj1_id')}, {conn_data.get('obj2_id')}")
+            continue
         
+        document.add_connection(obj1, obj2, conn_data.get('label_text', ""), uid=conn_data.get('id'))
+
+
+def _read_elements_by_index(data, document):
+    """Recria os elementos de um arquivo no formato antigo, em que as referências são índices."""
+    boxes = document.boxes
+    containers = document.containers
+    
+    # Recriar todos os containers primeiro
+    containers_map = {}  # Mapear índices para objetos de container
+    
+    for i, container_data in enumerate(data['containers']):
+        container = _add_container(document, container_data)
+        containers_map[i] = container
+        
+        # Relacionar ao container pai, que é salvo antes dos filhos
+        if 'parent_container_index' in container_data and container_data['parent_container_index'] is not None:
+            parent_index = container_data['parent_container_index']
+            if parent_index in containers_map:
+                containers_map[parent_index].add_child_container(container)
+    
+    # Recriar todas as caixas
+    for box_data in data['boxes']:
+        box = _add_box(document, box_data)
+        
+        # Associar a caixa ao container, se necessário
+        if 'container_index' in box_data and box_data['container_index'] in containers_map:
+            containers_map[box_data['container_index']].add_box(box)
+    
+    # Recriar todas as conexões
+    for conn_data in data['connections']:
+        try:
+            # Obter o primeiro objeto (caixa ou container)
+            if 'obj1_type' in conn_data:  # Formato com índices por tipo
+                obj1_type = conn_data['obj1_type']
+                obj1_index = conn_data['obj1_index']
+                
+                # Verificar se o índice é válido
+                if obj1_type == 'container':
+                    if obj1_index >= len(containers):
+                        print(f"Aviso: Índice de container inválido: {obj1_index}")
+                        continue
+                    obj1 = containers[obj1_index]
+                else:
+                    if obj1_index >= len(boxes):
+                        print(f"Aviso: Índice de caixa inválido: {obj1_index}")
+                        continue
+                    obj1 = boxes[obj1_index]
+                
+                # Obter o segundo objeto (caixa ou container)
+                obj2_type = conn_data['obj2_type']
+                obj2_index = conn_data['obj2_index']
+                
+                # Verificar se o índice é válido
+                if obj2_type == 'container':
+                    if obj2_index >= len(containers):
+                        print(f"Aviso: Índice de container inválido: {obj2_index}")
+                        continue
+                    obj2 = containers[obj2_index]
+                else:
+                    if obj2_index >= len(boxes):
+                        print(f"Aviso: Índice de caixa inválido: {obj2_index}")
+                        continue
+                    obj2 = boxes[obj2_index]
+            else:  # Formato mais antigo (apenas caixas)
+                if 'box1_index' not in conn_data or 'box2_index' not in conn_data:
+                    print("Aviso: Dados de conexão incompletos")
+                    continue
+                
+                box1_index = conn_data['box1_index']
+                box2_index = conn_data['box2_index']
+                
+                if box1_index >= len(boxes) or box2_index >= len(boxes):
+                    print(f"Aviso: Índices de caixa inválidos: {box1_index}, {box2_index}")
+                    continue
+                
+                obj1 = boxes[box1_index]
+                obj2 = boxes[box2_index]
+            
+            document.add_connection(obj1, obj2, conn_data.get('label_text', ""))
+            
+        except (IndexError, KeyError, ValueError) as e:
+            print(f"Erro ao recriar conexão: {e}")
+            continue
+
+
+def load_visionmap_from_file(file_path, canvas=None):
+    """Carrega um visionmap a partir do arquivo especificado.
+    
+    Com um canvas, os elementos do Tk são criados à medida que o arquivo é lido e
+    retornados já desenhados; sem canvas, retorna os elementos do documento (sem
+    precisar de uma janela do Tk).
+    """
+    if canvas is None:
+        return read_visionmap_document(file_path).as_lists()
+    
+    boxes = []
+    containers = []
+    connections = []
+    lists = {'container': containers, 'connection': connections}
+    
+    try:
+        for element in iter_visionmap_elements(file_path, canvas):
+            lists.get(element.kind, boxes).append(element)
     except Exception as e:
+        # Os elementos lidos antes do erro permanecem no canvas
         messagebox.showerror("Erro ao Abrir", f"Não foi possível abrir o arquivo: {str(e)}")
-        return [], [], []
\ No newline at end of file
+    
+    # As relações que não estavam no arquivo são completadas pelo motor de
+    # pertinência do canvas, que reavalia os elementos recém-criados
+    membership = getattr(canvas, 'membership', None)
+    if membership is not None:
+        membership.flush()
+    
+    return boxes, containers, connections
\ No newline at end of file
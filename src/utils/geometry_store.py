@@ -0,0 +1,250 @@
+"""
+Armazenamento colunar da geometria dos elementos (x, y, largura e altura em arrays contíguos)
+"""
+
+from array import array
+from itertools import repeat
+from operator import add, sub, mul
+
+try:
+    import numpy
+except ImportError:  # NumPy é opcional: sem ele as operações em lote usam o módulo array
+    numpy = None
+
+
+class GeometryStore:
+    """Guarda a geometria dos elementos em colunas contíguas de floats, indexadas por slot.
+    
+    Cada elemento ocupa um slot (seu atributo _slot) e lê e escreve x, y, width e
+    height diretamente nas colunas (ver GeometryView). As colunas são mantidas
+    densas: ao liberar um slot, o último elemento é movido para a vaga. Assim as
+    consultas sobre o mapa inteiro (limites, translação, contenção e sobreposição)
+    são uma única chamada que percorre os arrays em C (ou em NumPy, se disponível).
+    """
+    
+    def __init__(self):
+        self.x = array('d')
+        self.y = array('d')
+        self.width = array('d')
+        self.height = array('d')
+        
+        # slot -> elemento que o ocupa
+        self.owners = []
+    
+    def __len__(self):
+        return len(self.owners)
+    
+    def attach(self, owner, x, y, width, height):
+        """Reserva um slot para o elemento com a geometria informada."""
+        owner._geometry = self
+        owner._slot = len(self.owners)
+        self.owners.append(owner)
+        self.x.append(x)
+        self.y.append(y)
+        self.width.append(width)
+        self.height.append(height)
+    
+    def detach(self, owner):
+        """Libera o slot do elemento, que passa a guardar a geometria em um armazenamento próprio."""
+        slot = owner._slot
+        if owner._geometry is not self or slot >= len(self.owners) or self.owners[slot] is not owner:
+            return
+        
+        values = (self.x[slot], self.y[slot], self.width[slot], self.height[slot])
+        
+        # Mover o último elemento para a vaga, mantendo as colunas densas
+        last = len(self.owners) - 1
+        if slot != last:
+            moved = self.owners[last]
+            self.owners[slot] = moved
+            moved._slot = slot
+            for column in (self.x, self.y, self.width, self.height):
+                column[slot] = column[last]
+        
+        self.owners.pop()
+        for column in (self.x, self.y, self.width, self.height):
+            column.pop()
+        
+        # O elemento continua utilizável (ex.: referências antigas), mas fora das consultas
+        GeometryStore().attach(owner, *values)
+    
+    def clear(self):
+        """Libera todos os slots (usado quando o canvas é limpo)."""
+        for owner in list(self.owners):
+            GeometryStore().attach(owner, self.x[owner._slot], self.y[owner._slot],
+                                   self.width[owner._slot], self.height[owner._slot])
+        
+        self.owners = []
+        self.x = array('d')
+        self.y = array('d')
+        self.width = array('d')
+        self.height = array('d')
+    
+    def _columns(self, slots):
+        """Retorna as colunas (x, y, width, height), restritas aos slots informados, se houver."""
+        if slots is None:
+            return self.x, self.y, self.width, self.height
+        
+        slots = list(slots)
+        return tuple(array('d', map(column.__getitem__, slots))
+                     for column in (self.x, self.y, self.width, self.height))
+    
+    def bounds(self, slots=None):
+        """Retorna a caixa (x1, y1, x2, y2) que envolve os elementos, ou None se não houver nenhum."""
+        xs, ys, widths, heights = self._columns(slots)
+        if not xs:
+            return None
+        
+        if numpy is not None:
+            xs, ys = numpy.frombuffer(xs), numpy.frombuffer(ys)
+            half_w, half_h = numpy.frombuffer(widths) / 2, numpy.frombuffer(heights) / 2
+            return (float((xs - half_w).min()), float((ys - half_h).min()),
+                    float((xs + half_w).max()), float((ys + half_h).max()))
+        
+        half_w = list(map(mul, widths, repeat(0.5)))
+        half_h = list(map(mul, heights, repeat(0.5)))
+        return (min(map(sub, xs, half_w)), min(map(sub, ys, half_h)),
+                max(map(add, xs, half_w)), max(map(add, ys, half_h)))
+    
+    def extent(self, slots=None):
+        """Retorna (min_x, min_y, max_x, max_y) dos centros dos elementos, ou None se não houver nenhum."""
+        xs, ys = self._columns(slots)[:2]
+        if not xs:
+            return None
+        return min(xs), min(ys), max(xs), max(ys)
+    
+    def translate(self, slots, dx, dy):
+        """Desloca os elementos dos slots informados (todos, se None)."""
+        if not self.owners:
+            return
+        
+        if numpy is not None:
+            if slots is None:
+                numpy.frombuffer(self.x)[:] += dx
+                numpy.frombuffer(self.y)[:] += dy
+            else:
+                index = numpy.fromiter(slots, dtype=numpy.intp)
+                numpy.frombuffer(self.x)[index] += dx
+                numpy.frombuffer(self.y)[index] += dy
+            return
+        
+        if slots is None:
+            # Todas as linhas: uma passagem em C por coluna
+            self.x[:] = array('d', map(add, self.x, repeat(dx)))
+            self.y[:] = array('d', map(add, self.y, repeat(dy)))
+            return
+        
+        xs, ys = self.x, self.y
+        for slot in slots:
+            xs[slot] += dx
+            ys[slot] += dy
+    
+    def _select(self, predicate_np, predicate):
+        """Retorna os elementos cujas caixas satisfazem o predicado."""
+        if not self.owners:
+            return []
+        
+        if numpy is not None:
+            xs, ys = numpy.frombuffer(self.x), numpy.frombuffer(self.y)
+            half_w, half_h = numpy.frombuffer(self.width) / 2, numpy.frombuffer(self.height) / 2
+            mask = predicate_np(xs - half_w, ys - half_h, xs + half_w, ys + half_h)
+            return [self.owners[slot] for slot in numpy.flatnonzero(mask)]
+        
+        return [owner for owner, x, y, w, h in zip(self.owners, self.x, self.y, self.width, self.height)
+                if predicate(x - w/2, y - h/2, x + w/2, y + h/2)]
+    
+    def query_inside(self, x1, y1, x2, y2):
+        """Retorna os elementos inteiramente contidos na área (x1, y1, x2, y2)."""
+        return self._select(
+            lambda ex1, ey1, ex2, ey2: (ex1 >= x1) & (ey1 >= y1) & (ex2 <= x2) & (ey2 <= y2),
+            lambda ex1, ey1, ex2, ey2: ex1 >= x1 and ey1 >= y1 and ex2 <= x2 and ey2 <= y2)
+    
+    def query_overlap(self, x1, y1, x2, y2):
+        """Retorna os elementos cuja caixa cruza a área (x1, y1, x2, y2)."""
+        return self._select(
+            lambda ex1, ey1, ex2, ey2: (ex1 <= x2) & (ex2 >= x1) & (ey1 <= y2) & (ey2 >= y1),
+            lambda ex1, ey1, ex2, ey2: ex1 <= x2 and ex2 >= x1 and ey1 <= y2 and ey2 >= y1)
+
+
+class GeometryView:
+    """Expõe x, y, width e height de um elemento a partir do seu slot em um GeometryStore."""
+    
+    __slots__ = ()
+    
+    @property
+    def x(self):
+        return self._geometry.x[self._slot]
+    
+    @x.setter
+    def x(self, value):
+        self._geometry.x[self._slot] = value
+    
+    @property
+    def y(self):
+        return self._geometry.y[self._slot]
+    
+    @y.setter
+    def y(self, value):
+        self._geometry.y[self._slot] = value
+    
+    @property
+    def width(self):
+        return self._geometry.width[self._slot]
+    
+    @width.setter
+    def width(self, value):
+        self._geometry.width[self._slot] = value
+    
+    @property
+    def height(self):
+        return self._geometry.height[self._slot]
+    
+    @height.setter
+    def height(self, value):
+        self._geometry.height[self._slot] = value
+
+
+def get_geometry_store(canvas):
+    """Retorna o GeometryStore do canvas, criando-o no primeiro uso."""
+    store = getattr(canvas, 'geometry_store', None)
+    if store is None:
+        store = GeometryStore()
+        canvas.geometry_store = store
+    return store
+
+
+def shared_store(elements):
+    """Retorna o GeometryStore que contém exatamente os elementos informados, ou None."""
+    if not elements:
+        return None
+    
+    store = getattr(elements[0], '_geometry', None)
+    if store is None or len(store) != len(elements):
+        return None
+    if not all(getattr(element, '_geometry', None) is store for element in elements):
+        return None
+    return store
+
+
+def elements_bounds(elements):
+    """Retorna a caixa (x1, y1, x2, y2) que envolve os elementos, ou None se a lista estiver vazia."""
+    store = shared_store(elements)
+    if store is not None:
+        return store.bounds()
+    if not elements:
+        return None
+    return (min([element.x - element.width/2 for element in elements]),
+            min([element.y - element.height/2 for element in elements]),
+            max([element.x + element.width/2 for element in elements]),
+            max([element.y + element.height/2 for element in elements]))
+
+
+def elements_extent(elements):
+    """Retorna (min_x, min_y, max_x, max_y) dos centros dos elementos, ou None se a lista estiver vazia."""
+    store = shared_store(elements)
+    if store is not None:
+        return store.extent()
+    if not elements:
+        return None
+    return (min([element.x for element in elements]), min([element.y for element in elements]),
+            max([element.x for element in elements]), max([element.y for element in elements]))
\ No newline at end of file
@@ -2,24 +2,33 @@
 Utilitários para importação (Mermaid)
 """
 
+import html
 import re
-from ..models.box import VisionMapBox
-from ..models.note_box import NoteBox
-from ..models.container import Container
-from ..models.connection import Connection
+from ..models.document import Document, containers_parents_first
+
+
+# Quebras de linha nos textos exportados
+_LINE_BREAK = re.compile(r"<br\s*/?>")
 
 
 def parse_mermaid_code(canvas, mermaid_code):
-    """Analisa o código Mermaid e cria elementos no visionmap."""
+    """Analisa o código Mermaid e cria elementos no visionmap.
+    
+    Com canvas None, retorna os elementos do documento sem criar nada no Tk.
+    """
+    document = parse_mermaid_document(mermaid_code)
+    if canvas is None:
+        return document.as_lists()
+    return document.build_view(canvas)
+
+
+def parse_mermaid_document(mermaid_code):
+    """Analisa o código Mermaid e retorna o visionmap como um Document, sem usar o Tk."""
     # Dicionários para mapear IDs para objetos
     node_objects = {}  # ID Mermaid -> objeto (caixa ou container)
     style_data = {}    # ID Mermaid -> dados de estilo
-    subgraphs = {}     # ID Mermaid -> lista de IDs de nós filhos
     
-    # Listas para retorno
-    boxes = []
-    containers = []
-    connections = []
+    document = Document()
     
     # Posições iniciais para os elementos
     start_x, start_y = 100, 100
@@ -29,7 +38,7 @@ def parse_mermaid_code(canvas, mermaid_code):
     current_y = start_y
     
     # Extrair definições de estilo
-    style_matches = re.findall(r"style\s+(\w+)\s+([^\\n]+)", mermaid_code)
+    style_matches = re.findall(r"^\s*style\s+(\w+)\s+([^\n]+)", mermaid_code, re.MULTILINE)
     for style_match in style_matches:
         node_id, style_text = style_match
         style_data[node_id] = {}
@@ -40,7 +49,7 @@ def parse_mermaid_code(canvas, mermaid_code):
             style_data[node_id][prop.strip()] = value.strip()
     
     # Extrair definições de classe
-    class_matches = re.findall(r"classDef\s+(\w+)\s+([^\\n]+)", mermaid_code)
+    class_matches = re.findall(r"^\s*classDef\s+(\w+)\s+([^\n]+)", mermaid_code, re.MULTILINE)
     class_styles = {}
     for class_match in class_matches:
         class_name, style_text = class_match
@@ -53,8 +62,9 @@ def parse_mermaid_code(canvas, mermaid_code):
     
     # Encontrar nós e subgráficos
     lines = mermaid_code.split('\n')
-    in_subgraph = False
-    current_subgraph = None
+    
+    # Subgráficos abertos, do mais externo ao atual
+    open_subgraphs = []
     
     for line in lines:
         line = line.strip()
@@ -64,16 +74,13 @@ def parse_mermaid_code(canvas, mermaid_code):
             continue
             
         # Verificar se é um início de subgráfico
-        subgraph_match = re.match(r"subgraph\s+(\w+)(?:\[(.*?)\])?", line)
+        subgraph_match = re.match(r"subgraph\s+(\w+)(?:\[(.*)\])?", line)
         if subgraph_match:
-            in_subgraph = True
             subgraph_id = subgraph_match.group(1)
-            subgraph_title = subgraph_match.group(2) if subgraph_match.group(2) else "Container"
-            subgraph_title = subgraph_title.strip('"')
+            subgraph_title = _label(subgraph_match.group(2)) if subgraph_match.group(2) else "Container"
             
             # Criar container
-            container = Container(
-                canvas,
+            container = document.add_container(
                 current_x, current_y,
                 300, 200,  # tamanho padrão
                 subgraph_title,
@@ -88,45 +95,36 @@ def parse_mermaid_code(canvas, mermaid_code):
                 if 'stroke' in style:
                     container.outline_color = style['stroke']
             
-            containers.append(container)
             node_objects[subgraph_id] = container
-            subgraphs[subgraph_id] = []
-            current_subgraph = subgraph_id
+            
+            # Um subgráfico dentro de outro é um container filho
+            if open_subgraphs:
+                open_subgraphs[-1].add_child_container(container)
+            open_subgraphs.append(container)
             
             current_y += y_offset
             continue
         
         # Verificar se é um fim de subgráfico
-        if line == "end" and in_subgraph:
-            in_subgraph = False
-            current_subgraph = None
+        if line == "end" and open_subgraphs:
+            open_subgraphs.pop()
             continue
         
         # Verificar se é um nó normal
-        node_match = re.match(r"(\w+)(?:\[(.*?)\]|\[\[(.*?)\]\])", line)
+        # (textos entre aspas vão até a aspa que fecha o colchete: aspas internas vêm escapadas)
+        node_match = re.match(r'(\w+)(?:\[\["(.*?)"\]\]|\["(.*?)"\]|\[\[(.*?)\]\]|\[(.*?)\])', line)
         if node_match:
             node_id = node_match.group(1)
-            node_text = node_match.group(2) if node_match.group(2) else node_match.group(3)
-            node_text = node_text.strip('"')
             
-            # Determinar se é uma nota ou caixa normal
-            is_note = "[[" in line and "]]" in line
+            # Determinar se é uma nota ([[texto]]) ou caixa normal ([texto])
+            is_note = node_match.group(2) is not None or node_match.group(4) is not None
+            node_text = unescape_mermaid_text(next(text for text in node_match.groups()[1:] if text is not None))
             
             # Criar caixa ou nota
             if is_note:
-                box = NoteBox(canvas, current_x, current_y, node_text)
+                box = document.add_note(current_x, current_y, node_text)
             else:
-                box = VisionMapBox(canvas, current_x, current_y, node_text)
-            
-            # Aplicar estilo se disponível
-            if node_id in style_data:
-                style = style_data[node_id]
-                if 'fill' in style:
-                    box.fill_color = style['fill']
-                    box.update()
-                if 'stroke' in style:
-                    box.outline_color = style['stroke']
-                    box.update()
+                box = document.add_box(current_x, current_y, node_text)
             
             # Aplicar classe se houver
             class_match = re.search(r":::(\w+)", line)
@@ -135,19 +133,22 @@ def parse_mermaid_code(canvas, mermaid_code):
                 style = class_styles[class_name]
                 if 'fill' in style:
                     box.fill_color = style['fill']
-                    box.update()
                 if 'stroke' in style:
                     box.outline_color = style['stroke']
-                    box.update()
             
-            boxes.append(box)
+            # Aplicar estilo se disponível (tem precedência sobre a classe, como no Mermaid)
+            if node_id in style_data:
+                style = style_data[node_id]
+                if 'fill' in style:
+                    box.fill_color = style['fill']
+                if 'stroke' in style:
+                    box.outline_color = style['stroke']
+            
             node_objects[node_id] = box
             
             # Adicionar ao subgráfico atual, se estiver em um
-            if current_subgraph:
-                subgraphs[current_subgraph].append(node_id)
-                container = node_objects[current_subgraph]
-                container.add_box(box)
+            if open_subgraphs:
+                open_subgraphs[-1].add_box(box)
             
             current_x += x_offset
             if current_x > 800:  # Evitar que vá muito para a direita
@@ -157,12 +158,12 @@ def parse_mermaid_code(canvas, mermaid_code):
             continue
         
         # Verificar se é uma conexão
-        conn_match = re.match(r"(\w+)\s+(-->|---|\.->.|\.--.|\==>|\=\=\=)\s+(\w+)", line)
+        conn_match = re.match(r"(\w+)\s+(-->|---|\.->.|\.--.|\==>|\=\=\=)\s*(?:\|(.*)\|\s*)?(\w+)", line)
         if conn_match:
             try:
                 node1_id = conn_match.group(1)
                 conn_type = conn_match.group(2)
-                node2_id = conn_match.group(3)
+                node2_id = conn_match.group(4)
                 
                 # Verificar se os nós existem
                 if node1_id in node_objects and node2_id in node_objects:
@@ -171,55 +172,73 @@ def parse_mermaid_code(canvas, mermaid_code):
                     
                     # Verificar se há texto para o rótulo da conexão
                     label_text = ""
-                    label_match = re.search(r"\|(.+?)\|", line)
-                    if label_match:
-                        label_text = label_match.group(1).strip()
+                    if conn_match.group(3):
+                        label_text = _label(conn_match.group(3).strip())
                     
                     # Determinar se a conexão tem seta
                     has_arrow = "-->" in conn_type or ".->" in conn_type or "==>" in conn_type
                     
                     # Criar conexão
-                    connection = Connection(canvas, obj1, obj2, label_text)
-                    connection.arrow = has_arrow
-                    connections.append(connection)
+                    document.add_connection(obj1, obj2, label_text, has_arrow)
             except (IndexError, AttributeError, ValueError) as e:
                 print(f"Erro ao criar conexão: {e}")
                 continue
     
-    # Posicionar os containers de acordo com seus conteúdos
-    for container_id, box_ids in subgraphs.items():
-        if container_id in node_objects:
-            container = node_objects[container_id]
-            # Atualizar o container para ajustar seu tamanho aos elementos contidos
-            container.update()
-    
     # Reorganizar o layout para evitar sobreposições
-    _reorganize_layout(boxes, containers)
+    _reorganize_layout(document.boxes, document.containers)
     
-    return boxes, containers, connections
+    return document
+
+
+def unescape_mermaid_text(text):
+    """Desfaz o escape de um texto do Mermaid (<br>, entidades HTML e aspas com barra invertida)."""
+    return html.unescape(_LINE_BREAK.sub("\n", text).replace('\\"', '"'))
+
+
+def _label(text):
+    """Retorna o texto de um nó, subgráfico ou rótulo, sem as aspas externas e sem escape."""
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        text = text[1:-1]
+    return unescape_mermaid_text(text)
+
+
+# Layout dos containers importados: margem interna, espaço entre elementos e
+# caixas por linha dentro de um container
+CONTAINER_PADDING = 20
+ELEMENT_SPACING = 50
+BOXES_PER_ROW = 4
 
 
 def _reorganize_layout(boxes, containers):
     """Reorganiza o layout para evitar sobreposições."""
-    # Primeiro, reposicionar os containers com alguma distância entre eles
+    # Ajustar os containers ao conteúdo, incluindo os containers filhos
+    _fit_containers(containers)
+    
+    # Primeiro, reposicionar os containers de nível superior (cada um com todo o
+    # seu conteúdo) com alguma distância entre eles
     container_spacing = 350
     current_x = 100
     current_y = 100
+    row_height = 0
     
     for container in containers:
-        container.move_to(current_x + container.width/2, current_y + container.height/2)
+        if container.parent_container is not None:
+            continue
+        _place_container(container, current_x, current_y)
         current_x += container.width + container_spacing
+        row_height = max(row_height, container.height)
         
         # Mudar para a próxima linha se ficar muito largo
         if current_x > 1000:
             current_x = 100
-            current_y += 300
+            current_y += max(300, row_height + 100)
+            row_height = 0
     
     # Depois, reposicionar as caixas que não estão em containers
     box_spacing = 200
     if current_x > 800:
         current_x = 100
-        current_y += 250
+        current_y += max(250, row_height + 50)
     
     for box in boxes:
         if not box.container:
@@ -229,4 +248,58 @@ def _reorganize_layout(boxes, containers):
             # Mudar para a próxima linha se ficar muito largo
             if current_x > 1000:
                 current_x = 100
-                current_y += 150
\ No newline at end of file
+                current_y += 150
+
+
+def _box_grid(boxes):
+    """Retorna (largura da célula, altura da célula, largura, altura) da grade de caixas de um container."""
+    if not boxes:
+        return 0, 0, 0, 0
+    cell_width = max(box.width for box in boxes) + ELEMENT_SPACING
+    cell_height = max(box.height for box in boxes) + ELEMENT_SPACING
+    rows = (len(boxes) + BOXES_PER_ROW - 1) // BOXES_PER_ROW
+    return (cell_width, cell_height,
+            min(len(boxes), BOXES_PER_ROW) * cell_width - ELEMENT_SPACING, rows * cell_height - ELEMENT_SPACING)
+
+
+def _fit_containers(containers):
+    """Ajusta o tamanho de cada container às suas caixas (em grade) e aos containers filhos (lado a lado, abaixo).
+    
+    Os filhos são ajustados antes dos pais e cada container é visitado uma vez.
+    """
+    for container in reversed(containers_parents_first(containers)):
+        _, _, grid_width, grid_height = _box_grid(container.boxes)
+        children = container.child_containers
+        children_width = sum(child.width for child in children) + ELEMENT_SPACING * max(len(children) - 1, 0)
+        children_height = max((child.height for child in children), default=0)
+        spacing = ELEMENT_SPACING if container.boxes and children else 0
+        
+        container.width = max(300, max(grid_width, children_width) + 2 * CONTAINER_PADDING)
+        container.height = max(200, container.title_height + grid_height + spacing + children_height +
+                               2 * CONTAINER_PADDING)
+
+
+def _place_container(container, left, top):
+    """Posiciona o container (canto superior esquerdo em left, top), suas caixas e seus descendentes.
+    
+    Usa uma pilha em vez de recursão e define cada posição uma única vez.
+    """
+    stack = [(container, left, top)]
+    while stack:
+        container, left, top = stack.pop()
+        container.x = left + container.width / 2
+        container.y = top + container.height / 2
+        
+        inner_left = left + CONTAINER_PADDING
+        inner_top = top + container.title_height + CONTAINER_PADDING
+        cell_width, cell_height, _, grid_height = _box_grid(container.boxes)
+        for i, box in enumerate(container.boxes):
+            row, column = divmod(i, BOXES_PER_ROW)
+            box.x = inner_left + column * cell_width + (cell_width - ELEMENT_SPACING) / 2
+            box.y = inner_top + row * cell_height + (cell_height - ELEMENT_SPACING) / 2
+        
+        child_left = inner_left
+        child_top = inner_top + grid_height + (ELEMENT_SPACING if container.boxes else 0)
+        for child in container.child_containers:
+            stack.append((child, child_left, child_top))
+            child_left += child.width + ELEMENT_SPACING
\ No newline at end of file
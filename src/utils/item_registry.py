@@ -0,0 +1,48 @@
+"""
+Registro que associa os itens do canvas Tk aos elementos do modelo
+"""
+
+
+class CanvasItemRegistry:
+    """Mapa reverso: id de item do canvas -> elemento (caixa, container ou conexão) dono do item.
+    
+    Permite usar a árvore de itens do próprio Tk (find_overlapping / find_closest)
+    para o hit testing, resolvendo cada item encontrado com uma única consulta ao dicionário.
+    """
+    
+    def __init__(self):
+        self.owners = {}
+    
+    def __len__(self):
+        return len(self.owners)
+    
+    def register(self, owner, *item_ids):
+        """Associa um ou mais itens do canvas ao elemento informado."""
+        for item_id in item_ids:
+            if item_id:
+                self.owners[item_id] = owner
+    
+    def unregister(self, *item_ids):
+        """Remove a associação dos itens informados."""
+        for item_id in item_ids:
+            self.owners.pop(item_id, None)
+    
+    def owner_of(self, item_id):
+        """Retorna o elemento dono do item, ou None se o item não for de nenhum elemento."""
+        return self.owners.get(item_id)
+    
+    def owners_of(self, item_ids):
+        """Retorna os donos distintos de uma sequência de itens, preservando a ordem."""
+        owners = self.owners
+        result = []
+        seen = set()
+        for item_id in item_ids:
+            owner = owners.get(item_id)
+            if owner is not None and owner not in seen:
+                seen.add(owner)
+                result.append(owner)
+        return result
+    
+    def clear(self):
+        """Remove todas as associações."""
+        self.owners.clear()
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+Diário de salvamentos incrementais do .vmap (arquivo JSON Lines ao lado do arquivo principal)
+
+Cada salvamento incremental acrescenta ao diário um lote com os registros dos
+elementos alterados (no mesmo formato das linhas do .vmap) e marcas de exclusão,
+terminado por uma linha de confirmação. Lotes sem confirmação (ex.: interrompidos
+por uma queda) são ignorados. O cabeçalho guarda o token do arquivo principal a
+que o diário se refere (gravado no cabeçalho do .vmap e trocado a cada
+gravação completa): se o arquivo principal for salvo por completo, o diário
+deixa de valer. Copiar, restaurar ou tocar o par de arquivos não altera o token.
+"""
+
+import json
+import os
+import threading
+
+from ..models.lazy_text import encode_lazy_text
+
+JOURNAL_FORMAT = "visionmap-journal"
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = ".journal"
+
+# O diário é compactado quando passa deste tamanho e de metade do arquivo principal
+JOURNAL_COMPACT_MIN_SIZE = 64 * 1024
+
+# Serializa as escritas no diário e as substituições do arquivo principal, já que
+# a compactação roda em outra thread
+journal_lock = threading.Lock()
+
+# Textos de anotações ainda não lidos (LazyText) são gravados sem ficar nas anotações
+_encode = json.JSONEncoder(ensure_ascii=False, default=encode_lazy_text).encode
+
+# Linha que confirma um lote
+_COMMIT_LINE = (_encode({'type': 'commit'}) + "\n").encode('utf-8')
+
+
+def journal_path(file_path):
+    """Retorna o caminho do diário do arquivo."""
+    return file_path + JOURNAL_SUFFIX
+
+
+def append_journal(file_path, token, records, deleted):
+    """Acrescenta um lote ao diário do arquivo. Retorna o número de entradas gravadas.
+    
+    token é o token do arquivo principal (ver file_manager.snapshot_token). Deve
+    ser chamada com journal_lock adquirido. Se o diário não existir ou se referir
+    a outra versão do arquivo principal, um novo é iniciado.
+    """
+    if token is None:
+        raise ValueError("Arquivo sem token: salvamentos incrementais exigem um salvamento completo antes")
+    
+    lines = [(_encode(record) + "\n").encode('utf-8') for record in records]
+    lines.extend((_encode({'type': 'deleted', 'id': uid}) + "\n").encode('utf-8') for uid in deleted)
+    if not lines:
+        return 0
+    lines.append(_COMMIT_LINE)
+    
+    path = journal_path(file_path)
+    if _read_header(path) == token:
+        # Descartar um lote não confirmado no final (ex.: gravação interrompida)
+        f = open(path, 'r+b')
+        f.seek(_committed_end(f))
+        f.truncate()
+    else:
+        f = open(path, 'wb')
+        f.write(_header(token).encode('utf-8'))
+    
+    with f:
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+    return len(lines) - 1
+
+
+def read_journal(file_path, token):
+    """Lê os lotes confirmados do diário do arquivo.
+    
+    Retorna (entradas, posição do fim do último lote confirmado), ou None se não
+    houver diário válido para a versão atual do arquivo principal (de token token).
+    """
+    if not has_journal(file_path, token):
+        return None
+    path = journal_path(file_path)
+    
+    entries = []
+    batch = []
+    with open(path, 'rb') as f:
+        f.readline()
+        end = f.tell()
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Linha incompleta: o último lote não chegou a ser confirmado
+                break
+            if entry.get('type') == 'commit':
+                entries.extend(batch)
+                batch = []
+                end = f.tell()
+            else:
+                batch.append(entry)
+    return entries, end
+
+
+def _committed_end(f):
+    """Retorna a posição do fim do último lote confirmado do diário aberto em f."""
+    f.seek(0)
+    f.readline()
+    end = f.tell()
+    for line in f:
+        if line == _COMMIT_LINE:
+            end = f.tell()
+    return end
+
+
+def has_journal(file_path, token):
+    """Verifica se o arquivo tem um diário válido para a sua versão atual (de token token).
+    
+    Arquivos gravados antes dos tokens (token None) usam diários marcados com o
+    tamanho e a data do arquivo principal; esses diários ainda são lidos, mas
+    nenhum novo é criado para eles.
+    """
+    path = journal_path(file_path)
+    if not os.path.exists(path):
+        return False
+    base = _read_header(path)
+    if token is None:
+        stat = os.stat(file_path)
+        return base == [stat.st_size, stat.st_mtime_ns]
+    return base == token
+
+
+def needs_compaction(file_path):
+    """Verifica se o diário cresceu o bastante para ser incorporado ao arquivo principal."""
+    path = journal_path(file_path)
+    if not os.path.exists(path):
+        return False
+    size = os.path.getsize(path)
+    return size > JOURNAL_COMPACT_MIN_SIZE and size > os.path.getsize(file_path) / 2
+
+
+def rebase_journal(file_path, token, tail):
+    """Recomeça o diário para a nova versão do arquivo principal (de token token), mantendo os lotes de tail.
+    
+    Usada pela compactação (com journal_lock adquirido) para preservar os lotes
+    gravados enquanto ela rodava.
+    """
+    path = journal_path(file_path)
+    if not tail:
+        remove_journal(file_path)
+        return
+    
+    with open(path, 'wb') as f:
+        f.write(_header(token).encode('utf-8'))
+        f.write(tail)
+
+
+def remove_journal(file_path):
+    """Apaga o diário do arquivo, se existir."""
+    try:
+        os.remove(journal_path(file_path))
+    except FileNotFoundError:
+        pass
+
+
+def replay_journal(records, entries):
+    """Aplica as entradas do diário sobre os registros do arquivo principal.
+    
+    Retorna os registros resultantes na ordem de leitura do .vmap: containers (pais
+    antes dos filhos), caixas e anotações, e conexões.
+    """
+    merged = {record.get('id'): record for record in records}
+    for entry in entries:
+        if entry.get('type') == 'deleted':
+            merged.pop(entry.get('id'), None)
+        else:
+            merged[entry.get('id')] = entry
+    
+    containers = {uid: record for uid, record in merged.items() if record.get('type') == 'container'}
+    boxes = [record for record in merged.values() if record.get('type', 'box') not in ('container', 'connection')]
+    connections = [record for record in merged.values() if record.get('type') == 'connection']
+    
+    ordered = []
+    seen = set()
+    for record in containers.values():
+        # Subir pela cadeia de pais ainda não visitados e incluí-los de cima para baixo
+        chain = []
+        current = record
+        while current is not None and current.get('id') not in seen:
+            seen.add(current.get('id'))
+            chain.append(current)
+            current = containers.get(current.get('parent_container_id'))
+        ordered.extend(reversed(chain))
+    
+    return ordered + boxes + connections
+
+
+def _header(token):
+    """Retorna a linha de cabeçalho do diário."""
+    return _encode({'format': JOURNAL_FORMAT, 'version': JOURNAL_VERSION, 'base': token}) + "\n"
+
+
+def _read_header(path):
+    """Retorna o token do arquivo principal registrado no diário, ou None."""
+    try:
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline() or 'null')
+    except (OSError, ValueError):
+        return None
+    if not isinstance(header, dict) or header.get('format') != JOURNAL_FORMAT:
+        return None
+    if header.get('version', 0) > JOURNAL_VERSION:
+        return None
+    return header.get('base')
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Exportação do visionmap em Mermaid, gerada em fluxo (trechos de texto, sem montar o código inteiro)
+"""
+
+# Linhas acumuladas em cada trecho gerado
+CHUNK_LINES = 4000
+
+# Níveis de recuo do código: containers mais profundos usam o recuo máximo, para
+# que o tamanho do texto não cresça com o quadrado da profundidade
+MAX_INDENT = 16
+_INDENTS = ["    " * level for level in range(MAX_INDENT + 1)]
+
+_HEADER = "```mermaid\nflowchart TD\n"
+_FOOTER = "    classDef noteStyle fill:#FFFFD0,stroke:#CCCCCC,color:#000000\n```"
+
+
+def export_to_mermaid(boxes, containers, connections):
+    """Exporta o visionmap como código Mermaid."""
+    return "".join(iter_mermaid(boxes, containers, connections))
+
+
+def write_mermaid(boxes, containers, connections, f):
+    """Grava o código Mermaid do visionmap em um arquivo (ou outro objeto com write), em trechos."""
+    for chunk in iter_mermaid(boxes, containers, connections):
+        f.write(chunk)
+
+
+def iter_mermaid(boxes, containers, connections):
+    """Gera o código Mermaid do visionmap em trechos de até CHUNK_LINES linhas.
+    
+    Caixas fora de containers, a árvore de containers como subgraphs aninhados
+    (cada um com as suas caixas e os seus containers filhos) e, por fim, as
+    conexões. A árvore é percorrida uma única vez, com uma pilha, e os IDs vêm
+    dos identificadores dos elementos (ver mermaid_id): o tempo é linear mesmo
+    para árvores muito profundas e, além de um trecho do texto, só os
+    identificadores dos containers ficam na memória.
+    """
+    # Elementos cujo container não foi exportado ficam no nível de cima
+    exported = {container.uid for container in containers}
+    
+    lines = [_HEADER]
+    
+    # Caixas não contidas
+    for box in boxes:
+        if box.container is None or box.container.uid not in exported:
+            lines.append(_node(box, _INDENTS[1]))
+            if len(lines) >= CHUNK_LINES:
+                yield "".join(lines)
+                lines = []
+    
+    # Containers em profundidade, a partir das raízes (na ordem da lista). Cada
+    # item da pilha é (container, nível) ou (None, nível) para fechar um subgraph
+    stack = [(container, 1) for container in reversed(containers)
+             if container.parent_container is None or container.parent_container.uid not in exported]
+    while stack:
+        container, level = stack.pop()
+        indent = _INDENTS[min(level, MAX_INDENT)]
+        if container is None:
+            lines.append(f"{indent}end\n")
+            continue
+        
+        container_id = mermaid_id(container)
+        inner = _INDENTS[min(level + 1, MAX_INDENT)]
+        lines.append(f"{indent}subgraph {container_id}[\"{_escape(container.title)}\"]\n"
+                     f"{inner}style {container_id} fill:{container.fill_color},"
+                     f"stroke:{container.outline_color},color:#000000\n")
+        for box in container.boxes:
+            lines.append(_node(box, inner))
+            if len(lines) >= CHUNK_LINES:
+                yield "".join(lines)
+                lines = []
+        
+        stack.append((None, level))
+        stack.extend((child, level + 1) for child in reversed(container.child_containers))
+        if len(lines) >= CHUNK_LINES:
+            yield "".join(lines)
+            lines = []
+    
+    # Conexões (seta ou linha simples, com o rótulo, se houver)
+    for connection in connections:
+        line_type = "-->" if connection.arrow else "---"
+        if connection.label_text:
+            line_type += f"|\"{_escape(connection.label_text)}\"|"
+        lines.append(f"    {mermaid_id(connection.obj1)} {line_type} {mermaid_id(connection.obj2)}\n")
+        if len(lines) >= CHUNK_LINES:
+            yield "".join(lines)
+            lines = []
+    
+    lines.append(_FOOTER)
+    yield "".join(lines)
+
+
+def mermaid_id(element):
+    """Retorna o ID Mermaid de uma caixa, anotação ou container.
+    
+    Derivado do identificador estável do elemento (c12 para containers, n12 para
+    caixas e anotações): único no mapa, igual em todas as exportações e
+    independente da posição nas listas e dos textos.
+    """
+    return f"c{element.uid}" if element.kind == 'container' else f"n{element.uid}"
+
+
+def _node(box, indent):
+    """Retorna a definição e o estilo (texto preto) de uma caixa ou anotação."""
+    box_id = mermaid_id(box)
+    text = _escape(box.text)
+    if box.kind == 'note':
+        node = f"{indent}{box_id}[[\"{text}\"]]:::noteStyle\n"
+    else:
+        node = f"{indent}{box_id}[\"{text}\"]\n"
+    return f"{node}{indent}style {box_id} fill:{box.fill_color},stroke:{box.outline_color},color:#000000\n"
+
+
+def _escape(text):
+    """Escapa um texto para uso entre aspas no Mermaid (desfeito por import_utils.unescape_mermaid_text).
+    
+    Entidades HTML para &, aspas, menor/maior e a barra vertical (que delimita os
+    rótulos) e <br> para as quebras de linha. Substituições em C são mais rápidas
+    que uma passada única com str.translate ou re.sub (que chamam código Python
+    por caractere ou por ocorrência).
+    """
+    return (text.replace('&', '&amp;').replace('"', '&quot;').replace('<', '&lt;')
+            .replace('>', '&gt;').replace('|', '&#124;').replace('\n', '<br>'))
\ No newline at end of file
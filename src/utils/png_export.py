@@ -0,0 +1,277 @@
+"""
+Exportação do visionmap em PNG em resolução total, desenhada com o Pillow em blocos (sem o canvas do Tk)
+
+A imagem é dividida em faixas horizontais de blocos. Cada bloco recebe apenas as
+formas que o atravessam (ver utils.scene) e é desenhado com o Pillow em um
+processo separado; as linhas de cada faixa são comprimidas e gravadas no PNG
+assim que a faixa fica pronta. A imagem inteira nunca fica na memória: o pico é
+proporcional à largura da imagem vezes a altura de uma faixa, e não ao tamanho
+do mapa.
+"""
+
+import math
+import multiprocessing
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from .geometry_store import elements_bounds
+from .scene import (scene_shapes, shape_bounds, css_color, RECT, TEXT, FONT_SIZE, LINE_HEIGHT,
+                    CONNECTION_COLOR, CONNECTION_WIDTH, ARROW_SIZE)
+
+
+# Margem ao redor do mapa (em coordenadas do modelo)
+MARGIN = 50
+
+# Resolução do canvas: com scale=1 e DEFAULT_DPI, um pixel da imagem por unidade do modelo
+DEFAULT_DPI = 96
+
+# Tamanho dos blocos (pixels): uma faixa tem TILE_HEIGHT linhas da imagem
+TILE_WIDTH = 2048
+TILE_HEIGHT = 512
+
+# Tamanho máximo de cada bloco IDAT do PNG (bytes comprimidos)
+IDAT_SIZE = 1 << 20
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def export_to_png(boxes, containers, connections, file_path, dpi=DEFAULT_DPI, scale=1.0, workers=None):
+    """Exporta o visionmap inteiro como PNG. Retorna (largura, altura) da imagem em pixels.
+    
+    Funciona com os elementos do Tk e com os do documento (sem janela), sem
+    depender da área visível nem do zoom. Cada unidade do modelo vira
+    scale * dpi / DEFAULT_DPI pixels e a resolução é gravada no arquivo, de modo
+    que o tamanho impresso não depende do DPI escolhido. Os blocos são desenhados
+    em até workers processos (padrão: um por núcleo), iniciados com spawn: um
+    fork copiaria travas (diário, seções de textos das anotações) que outras
+    threads podem estar segurando. Requer o Pillow.
+    """
+    # Falhar antes de abrir o arquivo ou iniciar os processos
+    from PIL import Image, ImageDraw  # noqa: F401
+    
+    factor = scale * dpi / DEFAULT_DPI
+    bounds = elements_bounds(boxes + containers) or (0, 0, 800, 600)
+    left, top = (bounds[0] - MARGIN) * factor, (bounds[1] - MARGIN) * factor
+    width = max(int(math.ceil((bounds[2] - bounds[0] + 2 * MARGIN) * factor)), 1)
+    height = max(int(math.ceil((bounds[3] - bounds[1] + 2 * MARGIN) * factor)), 1)
+    
+    columns = (width + TILE_WIDTH - 1) // TILE_WIDTH
+    bands = (height + TILE_HEIGHT - 1) // TILE_HEIGHT
+    tiles = _assign_tiles(scene_shapes(boxes, containers, connections), factor, left, top, columns, bands)
+    
+    def band_tasks(band):
+        """Retorna as tarefas dos blocos da faixa, da esquerda para a direita."""
+        tile_top = band * TILE_HEIGHT
+        tile_height = min(TILE_HEIGHT, height - tile_top)
+        return [(left + column * TILE_WIDTH, top + tile_top,
+                 min(TILE_WIDTH, width - column * TILE_WIDTH), tile_height,
+                 factor, tiles.pop((band, column), []))
+                for column in range(columns)]
+    
+    workers = workers or os.cpu_count() or 1
+    with open(file_path, 'wb') as f:
+        png = _PngWriter(f, width, height, dpi)
+        if workers == 1 or columns * bands == 1:
+            for band in range(bands):
+                png.write_band([_render_tile(task) for task in band_tasks(band)])
+        else:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                # A faixa seguinte já é desenhada enquanto a atual é gravada
+                pending = [pool.submit(_render_tile, task) for task in band_tasks(0)]
+                for band in range(bands):
+                    current = pending
+                    if band + 1 < bands:
+                        pending = [pool.submit(_render_tile, task) for task in band_tasks(band + 1)]
+                    png.write_band([future.result() for future in current])
+        png.close()
+    
+    return width, height
+
+
+def _assign_tiles(shapes, factor, left, top, columns, bands):
+    """Distribui as formas entre os blocos que elas atravessam. Retorna {(faixa, coluna): formas}."""
+    tiles = {}
+    for shape in shapes:
+        x1, y1, x2, y2 = shape_bounds(shape)
+        first_column = max(int((x1 * factor - left) // TILE_WIDTH), 0)
+        last_column = min(int((x2 * factor - left) // TILE_WIDTH), columns - 1)
+        first_band = max(int((y1 * factor - top) // TILE_HEIGHT), 0)
+        last_band = min(int((y2 * factor - top) // TILE_HEIGHT), bands - 1)
+        for band in range(first_band, last_band + 1):
+            for column in range(first_column, last_column + 1):
+                tiles.setdefault((band, column), []).append(shape)
+    return tiles
+
+
+def _render_tile(task):
+    """Desenha um bloco e retorna seus pixels RGB (executado nos processos de desenho)."""
+    from PIL import Image, ImageDraw
+    
+    left, top, width, height, factor, shapes = task
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    
+    # Coordenadas do modelo -> pixels do bloco
+    px = lambda x: x * factor - left
+    py = lambda y: y * factor - top
+    
+    # As formas chegam copiadas pelo pickle: os tipos são comparados por valor, não por identidade
+    for shape in shapes:
+        kind = shape[0]
+        if kind == RECT:
+            _, x1, y1, x2, y2, fill, outline, stroke_width = shape
+            draw.rectangle((px(x1), py(y1), px(x2), py(y2)), fill=_rgb(fill), outline=_rgb(outline),
+                           width=max(int(round(stroke_width * factor)), 1))
+        elif kind == TEXT:
+            _, x, y, lines, bold = shape
+            _draw_text(draw, px(x), py(y), lines, bold, factor)
+        else:
+            _, x1, y1, x2, y2, arrow = shape
+            _draw_line(draw, px(x1), py(y1), px(x2), py(y2), arrow, factor)
+    
+    return image.tobytes()
+
+
+def _draw_line(draw, x1, y1, x2, y2, arrow, factor):
+    """Desenha a linha de uma conexão, com a ponta de seta no final."""
+    color = _rgb(CONNECTION_COLOR)
+    draw.line((x1, y1, x2, y2), fill=color, width=max(int(round(CONNECTION_WIDTH * factor)), 1))
+    
+    length = math.hypot(x2 - x1, y2 - y1)
+    if not arrow or not length:
+        return
+    
+    # Triângulo com a ponta em (x2, y2), como o marcador do SVG
+    ux, uy = (x2 - x1) / length, (y2 - y1) / length
+    arrow_length, arrow_width = ARROW_SIZE[0] * factor, ARROW_SIZE[1] * factor / 2
+    base_x, base_y = x2 - ux * arrow_length, y2 - uy * arrow_length
+    draw.polygon(((x2, y2),
+                  (base_x - uy * arrow_width, base_y + ux * arrow_width),
+                  (base_x + uy * arrow_width, base_y - ux * arrow_width)), fill=color)
+
+
+def _draw_text(draw, x, y, lines, bold, factor):
+    """Desenha as linhas de texto centradas em (x, y)."""
+    font = _font(max(int(round(FONT_SIZE * factor)), 1), bold)
+    line_height = LINE_HEIGHT * factor
+    first = y - (len(lines) - 1) * line_height / 2
+    for i, line in enumerate(lines):
+        if not line:
+            continue
+        left, top, right, bottom = draw.textbbox((0, 0), line, font=font)
+        draw.text((x - (left + right) / 2, first + i * line_height - (top + bottom) / 2),
+                  line, font=font, fill="black")
+
+
+# Fontes já carregadas em cada processo: (tamanho, negrito) -> fonte
+_fonts = {}
+
+# Arquivos tentados para a fonte do canvas (Arial), normal e negrito
+_FONT_FILES = {
+    False: ("arial.ttf", "Arial.ttf", "DejaVuSans.ttf", "LiberationSans-Regular.ttf"),
+    True: ("arialbd.ttf", "Arial Bold.ttf", "DejaVuSans-Bold.ttf", "LiberationSans-Bold.ttf"),
+}
+
+
+def _font(size, bold):
+    """Retorna a fonte do tamanho pedido, usando a fonte padrão do Pillow se a Arial não existir."""
+    key = (size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        from PIL import ImageFont
+        
+        for name in _FONT_FILES[bold]:
+            try:
+                font = ImageFont.truetype(name, size)
+                break
+            except OSError:
+                continue
+        else:
+            try:
+                font = ImageFont.load_default(size)
+            except TypeError:
+                # Pillow anterior à 10.1: fonte padrão sem tamanho
+                font = ImageFont.load_default()
+        _fonts[key] = font
+    return font
+
+
+# Cor do Tk -> RGB (ou None para cores vazias)
+_colors = {}
+
+
+def _rgb(color):
+    """Converte uma cor do Tk para RGB (cores desconhecidas viram cinza)."""
+    if color not in _colors:
+        from PIL import ImageColor
+        
+        converted = css_color(color)
+        if converted is not None:
+            try:
+                converted = ImageColor.getrgb(converted)
+            except ValueError:
+                converted = (128, 128, 128)
+        _colors[color] = converted
+    return _colors[color]
+
+
+class _PngWriter:
+    """Grava um PNG RGB de 8 bits linha a linha, comprimindo em fluxo com zlib."""
+    
+    def __init__(self, f, width, height, dpi):
+        self.f = f
+        self.width = width
+        self.compressor = zlib.compressobj(6)
+        self.buffer = []
+        self.buffered = 0
+        
+        f.write(_PNG_SIGNATURE)
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        
+        # Resolução em pixels por metro
+        pixels_per_meter = int(round(dpi / 0.0254))
+        self._chunk(b"pHYs", struct.pack(">IIB", pixels_per_meter, pixels_per_meter, 1))
+    
+    def write_band(self, tiles):
+        """Grava uma faixa a partir dos pixels dos seus blocos (da esquerda para a direita)."""
+        views = [memoryview(tile) for tile in tiles]
+        rows = len(views[0]) // (3 * min(TILE_WIDTH, self.width))
+        strides = [len(view) // rows for view in views]
+        
+        compress = self.compressor.compress
+        for row in range(rows):
+            # Filtro 0 (nenhum) seguido dos pixels da linha em todos os blocos
+            data = b"\0" + b"".join(view[row * stride:(row + 1) * stride]
+                                    for view, stride in zip(views, strides))
+            self._add(compress(data))
+    
+    def close(self):
+        """Finaliza a compressão e grava o fim do arquivo."""
+        self._add(self.compressor.flush())
+        self._flush()
+        self._chunk(b"IEND", b"")
+    
+    def _add(self, data):
+        """Acumula dados comprimidos, gravando um bloco IDAT quando passam do limite."""
+        if data:
+            self.buffer.append(data)
+            self.buffered += len(data)
+            if self.buffered >= IDAT_SIZE:
+                self._flush()
+    
+    def _flush(self):
+        """Grava os dados comprimidos acumulados em um bloco IDAT."""
+        if self.buffer:
+            self._chunk(b"IDAT", b"".join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+    
+    def _chunk(self, kind, data):
+        """Grava um bloco do PNG (tamanho, tipo, dados e CRC)."""
+        self.f.write(struct.pack(">I", len(data)))
+        self.f.write(kind)
+        self.f.write(data)
+        self.f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)) & 0xffffffff))
\ No newline at end of file
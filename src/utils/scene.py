@@ -0,0 +1,130 @@
+"""
+Formas de desenho dos elementos (retângulos, textos e linhas), independentes do Tk
+
+Usadas pelas exportações que desenham o mapa sem o canvas (SVG, PNG): cada
+elemento é decomposto nas mesmas formas que o canvas cria para ele, em
+coordenadas do modelo (zoom 1).
+"""
+
+from ..models.connection import border_intersection, label_position
+from ..models.document import containers_parents_first
+
+
+# Tipos de forma (primeiro item de cada tupla):
+#   (RECT, x1, y1, x2, y2, preenchimento, contorno, espessura)
+#   (TEXT, x, y, linhas, negrito) - linhas centradas em (x, y)
+#   (LINE, x1, y1, x2, y2, seta)
+RECT = 'rect'
+TEXT = 'text'
+LINE = 'line'
+
+# Fonte usada no canvas (Arial 10): tamanho, altura da linha e largura média de um
+# caractere, em pixels, usadas para quebrar os textos como o Tk faz
+FONT_SIZE = 13
+LINE_HEIGHT = 16
+CHAR_WIDTH = 7
+
+# Cor e espessura das conexões e tamanho da ponta de seta (comprimento, largura)
+CONNECTION_COLOR = "gray"
+CONNECTION_WIDTH = 2
+ARROW_SIZE = (10, 8)
+
+
+def scene_shapes(boxes, containers, connections):
+    """Gera as formas do mapa na ordem de desenho (a mesma da leitura de um arquivo).
+    
+    Containers (pais antes dos filhos), caixas e anotações e, por cima, as
+    conexões. Funciona com os elementos do Tk e com os do documento.
+    """
+    for container in containers_parents_first(containers):
+        yield from container_shapes(container)
+    for box in boxes:
+        yield from box_shapes(box)
+    for connection in connections:
+        yield from connection_shapes(connection)
+
+
+def container_shapes(container):
+    """Gera o retângulo, a barra de título, o título e o manipulador de redimensionamento."""
+    x, y, width, height = container.x, container.y, container.width, container.height
+    x1, y1, x2, y2 = x - width/2, y - height/2, x + width/2, y + height/2
+    outline = container.outline_color
+    
+    yield (RECT, x1, y1, x2, y2, container.fill_color, outline, 2)
+    yield (RECT, x1, y1, x2, y1 + container.title_height, "#DDDDDD", outline, 1)
+    yield (TEXT, x, y1 + container.title_height/2, wrap_text(container.title), True)
+    yield (RECT, x2 - 10, y2 - 10, x2, y2, "#AAAAAA", outline, 1)
+
+
+def box_shapes(box):
+    """Gera o retângulo e o texto da caixa (e o botão de expansão das anotações)."""
+    x, y, width, height = box.x, box.y, box.width, box.height
+    x1, y1, x2 = x - width/2, y - height/2, x + width/2
+    
+    yield (RECT, x1, y1, x2, y + height/2, box.fill_color, box.outline_color, 1)
+    yield (TEXT, x, y, wrap_text(box.text, width - 10), False)
+    
+    if box.kind == 'note':
+        button_x, button_y = x2 - 10, y1 + 10
+        yield (RECT, button_x - 7.5, button_y - 7.5, button_x + 7.5, button_y + 7.5, "#F0F0F0", "#CCCCCC", 1)
+        yield (TEXT, button_x, button_y, ["+"], True)
+
+
+def connection_shapes(connection):
+    """Gera a linha da conexão (de borda a borda) e o rótulo."""
+    x1, y1 = border_intersection(connection.obj1, connection.obj2)
+    x2, y2 = border_intersection(connection.obj2, connection.obj1)
+    
+    yield (LINE, x1, y1, x2, y2, connection.arrow)
+    if connection.label_text:
+        yield (TEXT, *label_position(x1, y1, x2, y2), wrap_text(connection.label_text), False)
+
+
+def shape_bounds(shape):
+    """Retorna a caixa (x1, y1, x2, y2) ocupada pela forma (estimada para textos)."""
+    kind = shape[0]
+    if kind is TEXT:
+        _, x, y, lines, _ = shape
+        half_width = max(len(line) for line in lines) * CHAR_WIDTH / 2 + CHAR_WIDTH
+        half_height = len(lines) * LINE_HEIGHT / 2
+        return x - half_width, y - half_height, x + half_width, y + half_height
+    
+    x1, y1, x2, y2 = shape[1:5]
+    margin = ARROW_SIZE[0] if kind is LINE else shape[7]
+    return min(x1, x2) - margin, min(y1, y2) - margin, max(x1, x2) + margin, max(y1, y2) + margin
+
+
+def wrap_text(text, width=None):
+    """Quebra o texto em linhas que cabem na largura (em pixels), pelas palavras."""
+    text = text or ""
+    if width is None:
+        return text.split("\n")
+    
+    limit = max(int(width // CHAR_WIDTH), 1)
+    lines = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if len(candidate) <= limit:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            
+            # Palavras maiores que a largura são partidas, como no Tk
+            while len(word) > limit:
+                lines.append(word[:limit])
+                word = word[limit:]
+            line = word
+        lines.append(line)
+    return lines
+
+
+def css_color(color):
+    """Converte uma cor do Tk para CSS/SVG ("light blue" vira "lightblue"; vazia vira None)."""
+    if not color:
+        return None
+    if color.startswith("#"):
+        return color
+    return color.replace(" ", "").lower()
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Índice espacial em grade uniforme para consultas rápidas de elementos no canvas
+"""
+
+
+class SpatialIndex:
+    """Índice espacial que distribui os elementos em células (buckets) de tamanho fixo.
+    
+    Cada elemento é registrado com sua caixa delimitadora (x1, y1, x2, y2) em todas as
+    células que ela cobre. Uma consulta por ponto só examina os elementos da célula
+    correspondente, em vez de percorrer todas as listas da aplicação.
+    
+    O índice também mantém a ordem de empilhamento (z-order) dos elementos, para que
+    as consultas retornem primeiro o elemento que está no topo.
+    """
+    
+    def __init__(self, cell_size=200):
+        self.cell_size = cell_size
+        
+        # (cx, cy) -> conjunto de elementos cuja caixa cobre a célula
+        self.cells = {}
+        
+        # elemento -> (caixa delimitadora, intervalo de células cobertas)
+        self.entries = {}
+        
+        # elemento -> posição na pilha (maior = mais acima)
+        self.z_order = {}
+        self._z_top = 0
+        self._z_bottom = 0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __contains__(self, obj):
+        return obj in self.entries
+    
+    def _cell_range(self, x1, y1, x2, y2):
+        """Retorna o intervalo de células (cx1, cy1, cx2, cy2) coberto por uma caixa."""
+        size = self.cell_size
+        return (int(x1 // size), int(y1 // size), int(x2 // size), int(y2 // size))
+    
+    def _add_to_cells(self, obj, cell_range):
+        cx1, cy1, cx2, cy2 = cell_range
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket is None:
+                    bucket = self.cells[(cx, cy)] = set()
+                bucket.add(obj)
+    
+    def _remove_from_cells(self, obj, cell_range):
+        cx1, cy1, cx2, cy2 = cell_range
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket is not None:
+                    bucket.discard(obj)
+                    if not bucket:
+                        del self.cells[(cx, cy)]
+    
+    def insert(self, obj, bbox):
+        """Registra um elemento no topo da pilha com a caixa delimitadora informada."""
+        if obj in self.entries:
+            self.update(obj, bbox)
+            return
+        
+        cell_range = self._cell_range(*bbox)
+        self._add_to_cells(obj, cell_range)
+        self.entries[obj] = (bbox, cell_range)
+        
+        self._z_top += 1
+        self.z_order[obj] = self._z_top
+    
+    def update(self, obj, bbox):
+        """Atualiza a caixa delimitadora de um elemento (após mover ou redimensionar)."""
+        entry = self.entries.get(obj)
+        if entry is None:
+            self.insert(obj, bbox)
+            return
+        
+        old_range = entry[1]
+        new_range = self._cell_range(*bbox)
+        
+        # Só mexer nas células se o elemento realmente mudou de célula
+        if new_range != old_range:
+            self._remove_from_cells(obj, old_range)
+            self._add_to_cells(obj, new_range)
+        
+        self.entries[obj] = (bbox, new_range)
+    
+    def remove(self, obj):
+        """Remove um elemento do índice."""
+        entry = self.entries.pop(obj, None)
+        if entry is None:
+            return
+        
+        self._remove_from_cells(obj, entry[1])
+        self.z_order.pop(obj, None)
+    
+    def clear(self):
+        """Remove todos os elementos do índice."""
+        self.cells.clear()
+        self.entries.clear()
+        self.z_order.clear()
+        self._z_top = 0
+        self._z_bottom = 0
+    
+    def raise_to_top(self, obj):
+        """Coloca o elemento no topo da pilha (acompanha tag_raise)."""
+        if obj in self.entries:
+            self._z_top += 1
+            self.z_order[obj] = self._z_top
+    
+    def lower_to_bottom(self, obj):
+        """Coloca o elemento no fundo da pilha (acompanha tag_lower)."""
+        if obj in self.entries:
+            self._z_bottom -= 1
+            self.z_order[obj] = self._z_bottom
+    
+    def query_point(self, x, y):
+        """Retorna os elementos cuja caixa contém o ponto, do topo para o fundo."""
+        size = self.cell_size
+        bucket = self.cells.get((int(x // size), int(y // size)))
+        if not bucket:
+            return []
+        
+        entries = self.entries
+        hits = []
+        for obj in bucket:
+            x1, y1, x2, y2 = entries[obj][0]
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                hits.append(obj)
+        
+        if len(hits) > 1:
+            hits.sort(key=self.z_order.__getitem__, reverse=True)
+        return hits
+    
+    def query_rect(self, x1, y1, x2, y2, inside=False):
+        """Retorna os elementos que intersectam o retângulo, na ordem de empilhamento.
+        
+        Com inside=True, retorna apenas os elementos totalmente contidos no retângulo.
+        """
+        min_x, max_x = min(x1, x2), max(x1, x2)
+        min_y, max_y = min(y1, y2), max(y1, y2)
+        
+        cx1, cy1, cx2, cy2 = self._cell_range(min_x, min_y, max_x, max_y)
+        
+        # Para retângulos que cobrem muitas células vazias, é mais barato
+        # percorrer as células ocupadas do que todas as células do retângulo
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self.cells):
+            buckets = [bucket for (cx, cy), bucket in self.cells.items()
+                       if cx1 <= cx <= cx2 and cy1 <= cy <= cy2]
+        else:
+            buckets = []
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    bucket = self.cells.get((cx, cy))
+                    if bucket:
+                        buckets.append(bucket)
+        
+        entries = self.entries
+        seen = set()
+        hits = []
+        for bucket in buckets:
+            for obj in bucket:
+                if obj in seen:
+                    continue
+                seen.add(obj)
+                
+                bx1, by1, bx2, by2 = entries[obj][0]
+                if inside:
+                    if bx1 >= min_x and bx2 <= max_x and by1 >= min_y and by2 <= max_y:
+                        hits.append(obj)
+                elif bx1 <= max_x and bx2 >= min_x and by1 <= max_y and by2 >= min_y:
+                    hits.append(obj)
+        
+        hits.sort(key=self.z_order.__getitem__)
+        return hits
\ No newline at end of file
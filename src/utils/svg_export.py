@@ -0,0 +1,113 @@
+"""
+Exportação do visionmap em SVG, gerado direto dos elementos (sem o canvas do Tk)
+"""
+
+import re
+from xml.sax.saxutils import escape
+
+from .geometry_store import elements_bounds
+from .scene import (scene_shapes, css_color, RECT, TEXT, FONT_SIZE, LINE_HEIGHT,
+                    CONNECTION_COLOR, CONNECTION_WIDTH, ARROW_SIZE)
+
+
+# Margem ao redor do mapa
+MARGIN = 50
+
+# Formas gravadas por escrita no arquivo
+WRITE_BATCH = 4000
+
+# Caracteres proibidos no XML 1.0 (controles, exceto tabulação e quebras de linha)
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" viewBox="{x:.1f} {y:.1f} {width:.1f} {height:.1f}">
+<defs>
+<marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="{arrow_length}" markerHeight="{arrow_width}" markerUnits="userSpaceOnUse" orient="auto">
+<path d="M0,0 L10,5 L0,10 z" fill="{line_color}"/>
+</marker>
+</defs>
+<style>
+text {{ font-family: Arial, Helvetica, sans-serif; font-size: {font}px; text-anchor: middle; dominant-baseline: central; }}
+.title {{ font-weight: bold; }}
+.connection {{ stroke: {line_color}; stroke-width: {line_width}; }}
+</style>
+<rect x="{x:.1f}" y="{y:.1f}" width="{width:.1f}" height="{height:.1f}" fill="white"/>
+"""
+
+
+def export_to_svg(boxes, containers, connections, file_path):
+    """Exporta o visionmap como SVG.
+    
+    Funciona com os elementos do Tk e com os do documento (sem janela). O mapa
+    inteiro é exportado, independentemente da área visível e do zoom, com a
+    aparência do canvas em tamanho real (ver utils.scene). O arquivo é escrito
+    em fluxo, em lotes de formas.
+    """
+    bounds = elements_bounds(boxes + containers) or (0, 0, 800, 600)
+    x_min, y_min = bounds[0] - MARGIN, bounds[1] - MARGIN
+    width, height = bounds[2] - bounds[0] + 2 * MARGIN, bounds[3] - bounds[1] + 2 * MARGIN
+    
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(_HEADER.format(x=x_min, y=y_min, width=width, height=height, font=FONT_SIZE,
+                               arrow_length=ARROW_SIZE[0], arrow_width=ARROW_SIZE[1],
+                               line_color=CONNECTION_COLOR, line_width=CONNECTION_WIDTH))
+        
+        parts = []
+        for shape in scene_shapes(boxes, containers, connections):
+            kind = shape[0]
+            if kind is RECT:
+                parts.append(_rect(*shape[1:]))
+            elif kind is TEXT:
+                parts.append(_text(*shape[1:]))
+            else:
+                parts.append(_line(*shape[1:]))
+            
+            if len(parts) >= WRITE_BATCH:
+                f.write("".join(parts))
+                parts = []
+        
+        parts.append("</svg>\n")
+        f.write("".join(parts))
+
+
+def _rect(x1, y1, x2, y2, fill, outline, stroke_width):
+    """Retorna um retângulo SVG."""
+    return (f'<rect x="{x1:.1f}" y="{y1:.1f}" width="{x2 - x1:.1f}" height="{y2 - y1:.1f}" '
+            f'fill="{_color(fill)}" stroke="{_color(outline)}" stroke-width="{stroke_width}"/>\n')
+
+
+def _line(x1, y1, x2, y2, arrow):
+    """Retorna a linha SVG de uma conexão, com a ponta de seta no final."""
+    marker = ' marker-end="url(#arrow)"' if arrow else ''
+    return f'<line class="connection" x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}"{marker}/>\n'
+
+
+def _text(x, y, lines, bold):
+    """Retorna um texto SVG com as linhas centradas em (x, y)."""
+    attributes = ' class="title"' if bold else ''
+    if len(lines) == 1:
+        return f'<text x="{x:.1f}" y="{y:.1f}"{attributes}>{_escape(lines[0])}</text>\n'
+    
+    # Linhas centradas verticalmente em torno de y
+    top = y - (len(lines) - 1) * LINE_HEIGHT / 2
+    spans = "".join(f'<tspan x="{x:.1f}" y="{top + i * LINE_HEIGHT:.1f}">{_escape(line)}</tspan>'
+                    for i, line in enumerate(lines))
+    return f'<text{attributes}>{spans}</text>\n'
+
+
+# Cor do Tk -> cor SVG (já escapada para uso em atributos)
+_colors = {}
+
+
+def _color(color):
+    """Converte uma cor do Tk para um valor de atributo SVG."""
+    converted = _colors.get(color)
+    if converted is None:
+        converted = _escape(css_color(color) or "none", {'"': "&quot;"})
+        _colors[color] = converted
+    return converted
+
+
+def _escape(text, entities=None):
+    """Escapa um texto para o XML, removendo os caracteres que o XML 1.0 não admite."""
+    return escape(_INVALID_XML.sub("", text), entities)
\ No newline at end of file
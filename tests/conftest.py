@@ -0,0 +1,121 @@
+"""
+Configuração comum dos testes (executar a partir da raiz do projeto: python -m pytest)
+"""
+
+import itertools
+import os
+import sys
+import tkinter as tk
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.spatial_index import SpatialIndex  # noqa: E402
+
+
+class HeadlessCanvas:
+    """Canvas mínimo em memória, com a semântica de tags do Tk, para testes sem display.
+    
+    Implementa apenas os métodos usados pelos elementos do mapa; move e coords
+    alteram as coordenadas guardadas, e moves conta as chamadas a move.
+    """
+    
+    def __init__(self):
+        self.coordinates = {}
+        self.tags = {}
+        self.item_tags = {}
+        self.moves = 0
+        self._ids = itertools.count(1)
+    
+    def _create(self, coords, options):
+        item = next(self._ids)
+        if len(coords) == 1:
+            coords = coords[0]
+        self.coordinates[item] = [float(value) for value in coords]
+        self.item_tags[item] = set()
+        tags = options.get('tags', ())
+        for tag in (tags,) if isinstance(tags, str) else tags:
+            self._tag(item, tag)
+        return item
+    
+    def _tag(self, item, tag):
+        self.item_tags[item].add(tag)
+        self.tags.setdefault(tag, set()).add(item)
+    
+    def _items(self, tag_or_id):
+        if isinstance(tag_or_id, int):
+            return [tag_or_id] if tag_or_id in self.coordinates else []
+        if tag_or_id == 'all':
+            return list(self.coordinates)
+        return sorted(self.tags.get(tag_or_id, ()))
+    
+    def create_rectangle(self, *coords, **options):
+        return self._create(coords, options)
+    
+    create_text = create_line = create_rectangle
+    
+    def coords(self, tag_or_id, *coords):
+        items = self._items(tag_or_id)
+        if not coords:
+            return list(self.coordinates[items[0]]) if items else []
+        if len(coords) == 1:
+            coords = coords[0]
+        if items:
+            self.coordinates[items[0]] = [float(value) for value in coords]
+    
+    def move(self, tag_or_id, dx, dy):
+        self.moves += 1
+        for item in self._items(tag_or_id):
+            values = self.coordinates[item]
+            values[0::2] = [value + dx for value in values[0::2]]
+            values[1::2] = [value + dy for value in values[1::2]]
+    
+    def addtag_withtag(self, new_tag, tag_or_id):
+        for item in self._items(tag_or_id):
+            self._tag(item, new_tag)
+    
+    def dtag(self, tag_or_id, tag_to_delete=None):
+        tag_to_delete = tag_or_id if tag_to_delete is None else tag_to_delete
+        for item in self._items(tag_or_id):
+            self.item_tags[item].discard(tag_to_delete)
+            self.tags.get(tag_to_delete, set()).discard(item)
+    
+    def delete(self, tag_or_id):
+        for item in self._items(tag_or_id):
+            for tag in self.item_tags.pop(item):
+                self.tags[tag].discard(item)
+            del self.coordinates[item]
+    
+    def itemconfig(self, tag_or_id, **options):
+        pass
+    
+    def tag_raise(self, *args):
+        pass
+    
+    tag_lower = tag_bind = tag_raise
+    
+    def update_idletasks(self):
+        pass
+    
+    def winfo_rootx(self):
+        return 0
+    
+    winfo_rooty = winfo_rootx
+
+
+@pytest.fixture
+def canvas():
+    """Canvas do Tk com índice espacial (HeadlessCanvas se não houver display)."""
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        canvas = HeadlessCanvas()
+        canvas.spatial_index = SpatialIndex()
+        yield canvas
+        return
+    root.withdraw()
+    canvas = tk.Canvas(root)
+    canvas.spatial_index = SpatialIndex()
+    yield canvas
+    root.destroy()
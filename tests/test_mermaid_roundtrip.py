@@ -0,0 +1,206 @@
+"""
+Testes da exportação Mermaid e da importação do código exportado (ida e volta)
+
+Textos com caracteres especiais, cores, estrutura de subgraphs aninhados e
+conexões devem voltar iguais; os IDs vêm dos identificadores dos elementos; e
+uma cadeia profunda de containers é exportada em tempo e tamanho lineares.
+"""
+
+import re
+import sys
+import time
+
+import pytest
+
+from src.models.document import Document
+from src.utils.import_utils import parse_mermaid_document
+from src.utils.mermaid_export import export_to_mermaid, write_mermaid, mermaid_id, MAX_INDENT
+
+
+TEXTS = [
+    'aspas "duplas" e \'simples\'',
+    'x <y> & z',
+    'tag <b>negrito</b> e <br> literal',
+    'entidades &lt; &amp; &#124;',
+    'barra | vertical || dupla',
+    'linha 1\nlinha 2\n\nlinha 4',
+    'colchetes ] e ]] e [[x]]',
+    'barra invertida \\" aspas',
+    'end',
+    '#35; cerquilha',
+    'ação çé ü',
+    'style n1 fill:red',
+    '-->|falso| n2',
+]
+
+
+def structure(boxes, containers, connections):
+    """Retorna a estrutura do mapa sem posições nem identificadores, para comparação."""
+    def node(box):
+        return box.kind, box.text, box.fill_color, box.outline_color
+    
+    def container(c):
+        return ('container', c.title, c.fill_color, c.outline_color,
+                tuple(map(node, c.boxes)), tuple(map(container, c.child_containers)))
+    
+    def endpoint(element):
+        return container(element)[:2] if element.kind == 'container' else node(element)
+    
+    roots = tuple(container(c) for c in containers if c.parent_container is None)
+    free = tuple(node(box) for box in boxes if box.container is None)
+    edges = sorted((endpoint(k.obj1), endpoint(k.obj2), k.label_text, bool(k.arrow)) for k in connections)
+    return roots, free, edges
+
+
+def round_trip(document):
+    """Exporta o documento e importa o código de volta."""
+    return parse_mermaid_document(export_to_mermaid(*document.as_lists()))
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_box_and_note_texts_round_trip(text):
+    document = Document()
+    document.add_box(0, 0, text)
+    document.add_note(0, 0, text)
+    container = document.add_container(0, 0, title=text)
+    container.add_box(document.add_box(0, 0, text))
+    
+    result = round_trip(document)
+    assert structure(*result.as_lists()) == structure(*document.as_lists())
+
+
+@pytest.mark.parametrize("label", TEXTS + [''])
+@pytest.mark.parametrize("arrow", [True, False])
+def test_connection_labels_and_arrows_round_trip(label, arrow):
+    document = Document()
+    a = document.add_box(0, 0, "a")
+    b = document.add_box(0, 0, "b")
+    container = document.add_container(0, 0, title="c")
+    document.add_connection(a, b, label, arrow)
+    document.add_connection(b, container, label, not arrow)
+    
+    result = round_trip(document)
+    assert [(k.label_text, k.arrow) for k in result.connections] == [(label, arrow), (label, not arrow)]
+    assert structure(*result.as_lists()) == structure(*document.as_lists())
+
+
+def test_nested_subgraphs_and_colors_round_trip():
+    document = Document()
+    outer = document.add_container(0, 0, title="externo", fill_color="#E0FFE0", outline_color="green")
+    middle = document.add_container(0, 0, title="meio \"m\"")
+    inner = document.add_container(0, 0, title="interno | i", fill_color="lightyellow")
+    sibling = document.add_container(0, 0, title="irmão")
+    outer.add_child_container(middle)
+    middle.add_child_container(inner)
+    outer.add_child_container(sibling)
+    other = document.add_container(0, 0, title="outra raiz")
+    
+    for i, container in enumerate([outer, middle, inner, sibling, other, None]):
+        box = document.add_box(0, 0, f"caixa {i}", fill_color="lightgreen" if i % 2 else "lightblue",
+                               outline_color="#123456")
+        note = document.add_note(0, 0, f"nota {i}", fill_color="#FFEECC")
+        if container is not None:
+            container.add_box(box)
+            container.add_box(note)
+    document.add_connection(document.boxes[0], inner, "para dentro")
+    document.add_connection(other, document.boxes[-1], arrow=False)
+    
+    result = round_trip(document)
+    assert structure(*result.as_lists()) == structure(*document.as_lists())
+    
+    # A segunda ida e volta não muda nada
+    again = round_trip(result)
+    assert structure(*again.as_lists()) == structure(*result.as_lists())
+
+
+def test_ids_come_from_element_uids():
+    document = Document()
+    container = document.add_container(0, 0, title="c")
+    box = document.add_box(0, 0, "b")
+    note = document.add_note(0, 0, "n")
+    container.add_box(box)
+    document.add_connection(box, note)
+    
+    assert mermaid_id(container) == f"c{container.uid}"
+    assert mermaid_id(box) == f"n{box.uid}"
+    assert mermaid_id(note) == f"n{note.uid}"
+    
+    code = export_to_mermaid(*document.as_lists())
+    ids = set(re.findall(r"\b[nc]\d+\b", code))
+    assert ids == {mermaid_id(container), mermaid_id(box), mermaid_id(note)}
+    
+    # Os IDs não dependem da ordem das listas nem dos textos
+    box.text = "outro texto"
+    reordered = export_to_mermaid(list(reversed(document.boxes)), document.containers, document.connections)
+    assert set(re.findall(r"\b[nc]\d+\b", reordered)) == ids
+    assert f"{mermaid_id(box)} --> {mermaid_id(note)}" in reordered
+
+
+def test_write_mermaid_matches_export():
+    document = Document()
+    parent = None
+    for i in range(50):
+        container = document.add_container(0, 0, title=f"c{i}")
+        if parent is not None:
+            parent.add_child_container(container)
+        for j in range(100):
+            container.add_box(document.add_box(0, 0, f"b{i}.{j}"))
+        parent = container
+    
+    chunks = []
+    
+    class Sink:
+        def write(self, chunk):
+            chunks.append(chunk)
+    
+    write_mermaid(*document.as_lists(), Sink())
+    assert len(chunks) > 1
+    assert "".join(chunks) == export_to_mermaid(*document.as_lists())
+
+
+def chain(length):
+    """Cria uma cadeia de containers aninhados, cada um com uma caixa."""
+    document = Document()
+    parent = None
+    for i in range(length):
+        container = document.add_container(0, 0, title=f"c{i}")
+        if parent is not None:
+            parent.add_child_container(container)
+        container.add_box(document.add_box(0, 0, f"b{i}"))
+        parent = container
+    return document
+
+
+def export_time(document):
+    """Retorna o menor tempo de exportação em algumas repetições."""
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        export_to_mermaid(*document.as_lists())
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def test_deep_chain_is_linear():
+    length = max(5000, sys.getrecursionlimit() + 1000)
+    short, deep = chain(length // 4), chain(length)
+    short_code = export_to_mermaid(*short.as_lists())
+    code = export_to_mermaid(*deep.as_lists())
+    
+    # O recuo é limitado por MAX_INDENT: o texto cresce linearmente com a profundidade
+    assert max(len(line) - len(line.lstrip(" ")) for line in code.split("\n")) <= 4 * (MAX_INDENT + 1)
+    assert len(code) < 4.5 * len(short_code)
+    
+    # Tempo linear (um crescimento quadrático seria 16 vezes maior)
+    assert export_time(deep) < 10 * export_time(short)
+    
+    # A importação reconstrói a cadeia inteira, sem recursão
+    result = parse_mermaid_document(code)
+    roots = [c for c in result.containers if c.parent_container is None]
+    assert len(result.containers) == length and len(roots) == 1
+    depth, container = 1, roots[0]
+    while container.child_containers:
+        assert len(container.child_containers) == 1 and len(container.boxes) == 1
+        container = container.child_containers[0]
+        depth += 1
+    assert depth == length and container.boxes[0].text == f"b{length - 1}"
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+Testes da subárvore de containers aninhados e do seu movimento
+
+Com 10 níveis e alguns milhares de caixas e anotações: cada descendente deve
+aparecer uma única vez na subárvore e ser deslocado exatamente uma vez quando o
+container se move, e o trabalho de um movimento é proporcional ao tamanho da
+subárvore movida (e não ao do mapa). A subárvore dos containers do Tk fica em
+cache e é descartada quando a hierarquia muda.
+"""
+
+import pytest
+
+from src.models.document import Document
+from src.utils.geometry_store import GeometryStore
+
+
+LEVELS = 10
+BOXES_PER_LEVEL = 300
+
+
+@pytest.fixture
+def translations(monkeypatch):
+    """Registra os slots passados a cada GeometryStore.translate."""
+    calls = []
+    translate = GeometryStore.translate
+    
+    def recording(store, slots, dx, dy):
+        calls.append(None if slots is None else list(slots))
+        return translate(store, slots, dx, dy)
+    
+    monkeypatch.setattr(GeometryStore, "translate", recording)
+    return calls
+
+
+def build_document_tree():
+    """Cria LEVELS containers aninhados no documento, cada um com BOXES_PER_LEVEL caixas e anotações."""
+    document = Document()
+    containers = []
+    parent = None
+    for level in range(LEVELS):
+        size = 20000 - level * 1500
+        container = document.add_container(10000, 10000, size, size, title=f"nível {level}")
+        if parent is not None:
+            parent.add_child_container(container)
+        for i in range(BOXES_PER_LEVEL):
+            add = document.add_note if i % 10 == 0 else document.add_box
+            container.add_box(add(10000 + i, 10000 + level))
+        containers.append(container)
+        parent = container
+    return document, containers
+
+
+def positions(elements):
+    """Retorna {elemento: (x, y)}."""
+    return {element: (element.x, element.y) for element in elements}
+
+
+def assert_translated_once(calls, subtree):
+    """Confere que um único translate deslocou cada slot da subárvore exatamente uma vez."""
+    assert len(calls) == 1
+    slots = calls.pop()
+    assert len(slots) == len(set(slots)) == len(subtree)
+    assert set(slots) == {element._slot for element in subtree}
+
+
+def test_document_subtree_lists_each_element_once():
+    document, containers = build_document_tree()
+    subtree = containers[0].get_subtree()
+    
+    assert len(subtree) == len({id(element) for element in subtree}) == LEVELS * (BOXES_PER_LEVEL + 1)
+    assert set(map(id, subtree)) == set(map(id, document.containers + document.boxes))
+    assert subtree[0] is containers[0]
+    
+    inner = containers[LEVELS - 2].get_subtree()
+    assert set(map(id, inner)) == set(map(id, containers[LEVELS - 2:] + containers[LEVELS - 2].boxes
+                                          + containers[LEVELS - 1].boxes))
+
+
+def test_document_move_shifts_each_descendant_exactly_once(translations):
+    document, containers = build_document_tree()
+    elements = document.containers + document.boxes
+    before = positions(elements)
+    
+    top = containers[0]
+    for _ in range(3):
+        top.move_to(top.x + 7, top.y - 4)
+        assert_translated_once(translations, top.get_subtree())
+    
+    assert positions(elements) == {element: (x + 21, y - 12) for element, (x, y) in before.items()}
+
+
+def test_document_move_work_follows_subtree_size(translations):
+    document, containers = build_document_tree()
+    
+    # Cada nível a menos na subárvore tira BOXES_PER_LEVEL + 1 elementos do movimento
+    for level in (0, LEVELS // 2, LEVELS - 1):
+        container = containers[level]
+        container.move_to(container.x + 1, container.y)
+        assert_translated_once(translations, container.get_subtree())
+        assert len(container.get_subtree()) == (LEVELS - level) * (BOXES_PER_LEVEL + 1)
+
+
+def test_document_move_after_detaching_a_subtree(translations):
+    document, containers = build_document_tree()
+    elements = document.containers + document.boxes
+    before = positions(elements)
+    
+    middle = containers[LEVELS // 2]
+    middle.parent_container.remove_child_container(middle)
+    top = containers[0]
+    top.move_to(top.x + 1, top.y + 1)
+    assert_translated_once(translations, top.get_subtree())
+    
+    detached = {id(element) for element in middle.get_subtree()}
+    assert detached.isdisjoint(map(id, top.get_subtree()))
+    for element, (x, y) in before.items():
+        expected = (x, y) if id(element) in detached else (x + 1, y + 1)
+        assert (element.x, element.y) == expected
+
+
+def test_document_cycle_is_ignored():
+    document, containers = build_document_tree()
+    containers[-1].add_child_container(containers[0])
+    
+    assert containers[0].parent_container is None
+    assert len(containers[0].get_subtree()) == len(document.containers) + len(document.boxes)
+
+
+def build_canvas_tree(canvas):
+    """Cria LEVELS containers aninhados no canvas, cada um com BOXES_PER_LEVEL caixas e anotações."""
+    from src.models.box import VisionMapBox
+    from src.models.note_box import NoteBox
+    from src.models.container import Container
+    
+    containers = []
+    elements = []
+    parent = None
+    for level in range(LEVELS):
+        size = 20000 - level * 1500
+        container = Container(canvas, 10000, 10000, width=size, height=size)
+        if parent is not None:
+            parent.add_child_container(container)
+        containers.append(container)
+        elements.append(container)
+        for i in range(BOXES_PER_LEVEL):
+            cls = NoteBox if i % 10 == 0 else VisionMapBox
+            box = cls(canvas, 10000 + i, 10000 + level)
+            container.add_box(box)
+            elements.append(box)
+        parent = container
+    return containers, elements
+
+
+def canvas_center(canvas, element):
+    """Retorna o centro do retângulo do elemento no canvas."""
+    x1, y1, x2, y2 = canvas.coords(element.rect)
+    return (x1 + x2) / 2, (y1 + y2) / 2
+
+
+def assert_positions(canvas, expected):
+    """Confere a posição no modelo e no canvas de cada elemento."""
+    for element, (x, y) in expected.items():
+        assert (element.x, element.y) == (x, y)
+        cx, cy = canvas_center(canvas, element)
+        assert abs(cx - x) < 1e-6 and abs(cy - y) < 1e-6
+
+
+def test_canvas_subtree_is_cached_and_invalidated(canvas):
+    from src.models.box import VisionMapBox
+    
+    containers, elements = build_canvas_tree(canvas)
+    top, middle, inner = containers[0], containers[LEVELS // 2], containers[-1]
+    
+    subtree = top.get_subtree()
+    assert top.get_subtree() is subtree
+    assert len(subtree) == len(set(subtree)) == len(elements)
+    
+    # Mudanças em um descendente descartam o cache dele e dos ancestrais
+    middle_subtree = middle.get_subtree()
+    box = VisionMapBox(canvas, 10000, 10000)
+    inner.add_box(box)
+    assert top.get_subtree() is not subtree and box in top.get_subtree()
+    assert middle.get_subtree() is not middle_subtree and box in middle.get_subtree()
+    
+    subtree = top.get_subtree()
+    inner.remove_box(box)
+    assert box not in top.get_subtree() and top.get_subtree() is not subtree
+    
+    middle.parent_container.remove_child_container(middle)
+    assert middle not in top.get_subtree() and inner not in top.get_subtree()
+    assert inner in middle.get_subtree()
+
+
+def test_canvas_move_shifts_each_descendant_exactly_once(canvas, translations):
+    containers, elements = build_canvas_tree(canvas)
+    top = containers[0]
+    before = positions(elements)
+    moves = getattr(canvas, 'moves', None)
+    
+    for _ in range(4):
+        top.move_to(top.x + 1, top.y + 1)
+        assert_translated_once(translations, top.get_subtree())
+    
+    # Sem display: uma única chamada a canvas.move (pela tag da subárvore) por movimento
+    if moves is not None:
+        assert canvas.moves - moves == 4
+    assert_positions(canvas, {element: (x + 4, y + 4) for element, (x, y) in before.items()})
+    
+    # Depois de destacar uma subárvore, só o restante acompanha o container raiz
+    middle = containers[LEVELS // 2]
+    middle.parent_container.remove_child_container(middle)
+    moved = set(top.get_subtree())
+    top.move_to(top.x + 1, top.y + 1)
+    assert_translated_once(translations, top.get_subtree())
+    assert len(moved) == LEVELS // 2 * (BOXES_PER_LEVEL + 1)
+    assert_positions(canvas, {element: (x + 5, y + 5) if element in moved else (x + 4, y + 4)
+                              for element, (x, y) in before.items()})
@@ -0,0 +1,81 @@
+"""
+Testes da exportação PNG: o arquivo gravado é decodificado com o Pillow
+
+Confere o tamanho da imagem, a resolução gravada no bloco pHYs e as cores de
+alguns pixels, com um processo e com vários (blocos pequenos, para que o mapa
+ocupe várias faixas e colunas).
+"""
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from src.models.document import Document  # noqa: E402
+from src.utils import png_export  # noqa: E402
+
+
+DPI = 192
+
+# Cores em RGB das formas conferidas
+WHITE = (255, 255, 255)
+CONTAINER_FILL = (240, 240, 240)
+TITLE_BAR = (221, 221, 221)
+BOX_FILL = (255, 128, 0)
+CONNECTION = (128, 128, 128)
+
+
+def build_document():
+    """Container de 300x200 em (300, 250) e duas caixas ligadas por uma conexão horizontal.
+    
+    Os limites do mapa vão de (150, 150) a (550, 525); com a margem, a origem da
+    imagem fica em (100, 100) nas coordenadas do modelo.
+    """
+    document = Document()
+    document.add_container(300, 250, 300, 200, title="", fill_color="#F0F0F0")
+    a = document.add_box(200, 500, "", fill_color="#FF8000")
+    b = document.add_box(500, 500, "", fill_color="#FF8000")
+    document.add_connection(a, b)
+    return document
+
+
+def pixel(image, x, y):
+    """Cor do pixel correspondente ao ponto (x, y) do modelo."""
+    factor = DPI / png_export.DEFAULT_DPI
+    return image.getpixel((int((x - 100) * factor), int((y - 100) * factor)))
+
+
+@pytest.fixture
+def small_tiles(monkeypatch):
+    """Blocos pequenos, para que a imagem tenha várias faixas e colunas."""
+    monkeypatch.setattr(png_export, "TILE_WIDTH", 256)
+    monkeypatch.setattr(png_export, "TILE_HEIGHT", 128)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_png_size_resolution_and_colors(tmp_path, small_tiles, workers):
+    file_path = tmp_path / "mapa.png"
+    size = png_export.export_to_png(*build_document().as_lists(), str(file_path), dpi=DPI, workers=workers)
+    
+    with Image.open(file_path) as image:
+        image.load()
+        assert image.format == "PNG" and image.mode == "RGB"
+        assert image.size == size == (1000, 950)
+        assert tuple(round(value) for value in image.info["dpi"]) == (DPI, DPI)
+        
+        assert pixel(image, 120, 120) == WHITE
+        assert pixel(image, 400, 330) == CONTAINER_FILL
+        assert pixel(image, 160, 165) == TITLE_BAR
+        assert pixel(image, 160, 480) == BOX_FILL
+        assert pixel(image, 540, 520) == BOX_FILL
+        assert pixel(image, 350, 500) == CONNECTION
+        assert pixel(image, 350, 420) == WHITE
+
+
+def test_png_is_the_same_with_one_or_many_processes(tmp_path, small_tiles):
+    lists = build_document().as_lists()
+    single, pooled = tmp_path / "um.png", tmp_path / "varios.png"
+    png_export.export_to_png(*lists, str(single), dpi=DPI, workers=1)
+    png_export.export_to_png(*lists, str(pooled), dpi=DPI, workers=3)
+    
+    with Image.open(single) as a, Image.open(pooled) as b:
+        assert a.tobytes() == b.tobytes()
\ No newline at end of file
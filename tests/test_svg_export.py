@@ -0,0 +1,32 @@
+"""
+Testes da exportação SVG: o arquivo gravado deve ser XML bem formado
+"""
+
+from xml.dom import minidom
+
+from src.models.document import Document
+from src.utils.svg_export import export_to_svg
+
+
+def text_content(node):
+    """Retorna o texto de um elemento e dos seus filhos (linhas de um <text> concatenadas)."""
+    return "".join(child.data if child.nodeType == child.TEXT_NODE else text_content(child)
+                   for child in node.childNodes)
+
+
+def test_svg_is_well_formed_with_special_and_control_characters(tmp_path):
+    document = Document()
+    container = document.add_container(0, 0, width=1000, title="título \x01<b>&</b>")
+    box = document.add_box(0, 0, "a\x0bb\x0cc\x00d\"aspas\"'x']]>", width=1000)
+    note = document.add_note(0, 300, "linha 1\nlinha\x1f 2\ttab")
+    container.add_box(box)
+    document.add_connection(box, note, "rótulo \x08")
+    
+    file_path = tmp_path / "mapa.svg"
+    export_to_svg(*document.as_lists(), str(file_path))
+    
+    texts = [text_content(text) for text in minidom.parse(str(file_path)).getElementsByTagName("text")]
+    assert "título <b>&</b>" in texts
+    assert "abcd\"aspas\"'x']]>" in texts
+    assert "linha 1linha 2\ttab" in texts
+    assert "rótulo " in texts
\ No newline at end of file